@@ -0,0 +1,120 @@
+"""
+Agent Pool
+Process-wide pool of ready-to-use agent graphs shared across requests.
+
+Building the model client and compiling every agent's LangGraph is expensive, so the
+server keeps warm agent sets around instead of rebuilding them for each scan. Sets are
+built lazily on first demand (up to AGENT_POOL_SIZE) and checked out per request.
+"""
+from Agents.statementExtractorAgent import StatementExtractorAgent
+from Agents.factCheckerAgent import FactCheckerAgent
+from Agents.sourceAnalyzerAgent import SourceAnalyzerAgent
+from Agents.politicalBiasAgent import PoliticalBiasAgent
+from Agents.mediaAnalyzerAgent import MediaAnalyzerAgent
+from Agents.verdictSynthesizerAgent import VerdictSynthesizerAgent
+from Agents.reportGeneratorAgent import ReportGeneratorAgent
+from Agents.model_factory import create_model
+from config import Config
+import queue
+import threading
+import time
+
+
+class AgentSet:
+    """One instance of every pipeline agent, sharing a single model client"""
+
+    def __init__(self, model):
+        self.statement_extractor = StatementExtractorAgent(model=model)
+        self.fact_checker = FactCheckerAgent(model=model)
+        self.source_analyzer = SourceAnalyzerAgent(model=model)
+        self.political_bias_analyzer = PoliticalBiasAgent(model=model)
+        self.media_analyzer = MediaAnalyzerAgent(model=model)
+        self.verdict_synthesizer = VerdictSynthesizerAgent(model=model)
+        self.report_generator = ReportGeneratorAgent(model=model)
+
+
+class AgentPool:
+    """Lazily built, bounded pool of AgentSets"""
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max(1, max_size or Config.AGENT_POOL_SIZE)
+        self._idle = queue.LifoQueue()  # LIFO keeps the most recently used set warm
+        self._lock = threading.Lock()
+        self._model = None
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._build_ms_total = 0
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                self._model = create_model()
+            return self._model
+
+    def _build(self) -> AgentSet:
+        start = time.perf_counter()
+        agent_set = AgentSet(self._get_model())
+        with self._lock:
+            self._build_ms_total += int((time.perf_counter() - start) * 1000)
+        return agent_set
+
+    def acquire(self, timeout: float = None) -> AgentSet:
+        """
+        Check out an AgentSet, building one if the pool has spare capacity.
+        Blocks until a set is returned when the pool is exhausted, for at most
+        timeout seconds (default: AGENT_POOL_ACQUIRE_TIMEOUT).
+
+        Raises:
+            TimeoutError: if no set was returned in time
+        """
+        if timeout is None:
+            timeout = Config.AGENT_POOL_ACQUIRE_TIMEOUT
+        try:
+            agent_set = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_build = self._created < self.max_size
+                if can_build:
+                    self._created += 1
+            if can_build:
+                try:
+                    agent_set = self._build()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    agent_set = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"All {self.max_size} agent sets stayed busy for {timeout:g}s; try again later"
+                    ) from None
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return agent_set
+
+    def release(self, agent_set: AgentSet):
+        """Return an AgentSet to the pool"""
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(agent_set)
+
+    def stats(self) -> dict:
+        """Pool usage statistics"""
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "total_checkouts": self._checkouts,
+                "avg_build_ms": int(self._build_ms_total / self._created) if self._created else 0
+            }
+
+
+# Global pool instance (agent sets are built on first checkout)
+agent_pool = AgentPool()
@@ -0,0 +1,172 @@
+"""
+Batch Runner
+Streams large collections of documents through the misinformation detector.
+
+Documents are analyzed with bounded document-level concurrency (claim-level
+concurrency is set on the detector). Every finished document is appended to a JSONL
+output file, which doubles as the checkpoint: re-running with the same output file
+skips documents that already succeeded. Aggregate throughput statistics are written
+next to the output when the run ends.
+"""
+from Agents.content_fetcher import is_url, fetch_document_sync
+from Agents.rate_limit_utils import llm_call_counter
+from Agents.search_utils import search_call_counter, scan_search_log
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import Config
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+import json
+import os
+import time
+
+
+def read_jsonl(path: str) -> Iterable[dict]:
+    """Yield one document per non-empty JSONL line, assigning ids by line number"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            doc = json.loads(line)
+            if isinstance(doc, str):
+                doc = {"input": doc}
+            doc.setdefault("id", f"doc-{line_no}")
+            yield doc
+
+
+def load_checkpoint(out_path: str) -> set:
+    """Ids of documents already analyzed successfully in a previous run"""
+    done = set()
+    if not out_path or not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+class BatchRunner:
+    """Runs a detector over many documents with checkpointing and throughput stats"""
+
+    def __init__(self, detector, doc_concurrency: int = None):
+        self.detector = detector
+        self.doc_concurrency = max(1, doc_concurrency or Config.BATCH_DOC_CONCURRENCY)
+
+    def _prepare(self, doc: dict) -> tuple:
+        """Resolve a document to (text, url, fetched document or None), fetching URL-only inputs"""
+        text = doc.get("text")
+        url = doc.get("url")
+        user_input = (doc.get("input") or "").strip()
+
+        if not text and user_input:
+            if is_url(user_input):
+                url = url or user_input
+            else:
+                text = user_input
+        fetched = None
+        if not text and url:
+            fetched = fetch_document_sync(url)
+            text = fetched.text
+        if not text:
+            raise ValueError("Document has no input, text or url")
+        return text, url, fetched
+
+    def _analyze(self, doc: dict) -> dict:
+        doc_id = str(doc["id"])
+        try:
+            text, url, fetched = self._prepare(doc)
+            with scan_search_log():  # Keep concurrent documents' searches apart
+                result = self.detector.analyze(text, url, document=fetched)
+            return {"id": doc_id, "status": "ok", "result": result}
+        except Exception as e:
+            return {"id": doc_id, "status": "error", "error": str(e)}
+
+    def run(self, documents: Iterable[dict], out_path: Optional[str] = None,
+            on_record: Callable = None) -> dict:
+        """
+        Analyze documents, appending one JSON record per document to out_path.
+
+        Args:
+            documents: Iterable of dicts with 'id' and one of 'input', 'text' or 'url'
+            out_path: JSONL output / checkpoint file (optional)
+            on_record: Optional callback receiving each record as it finishes
+
+        Returns:
+            Aggregate throughput statistics
+        """
+        done_ids = load_checkpoint(out_path)
+        skipped = 0
+        succeeded = 0
+        failed = 0
+
+        start = time.perf_counter()
+        started_at = datetime.now(timezone.utc).isoformat()
+        llm_calls_start = llm_call_counter.value
+        search_calls_start = search_call_counter.value
+
+        out_file = open(out_path, "a", encoding="utf-8") if out_path else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.doc_concurrency) as executor:
+                in_flight = set()
+                for doc in documents:
+                    if str(doc.get("id")) in done_ids:
+                        skipped += 1
+                        continue
+
+                    # Keep a bounded window of submitted work so huge inputs stream
+                    if len(in_flight) >= self.doc_concurrency * 2:
+                        finished = next(as_completed(in_flight))
+                        in_flight.discard(finished)
+                        succeeded, failed = self._record(finished.result(), out_file, on_record, succeeded, failed)
+
+                    in_flight.add(executor.submit(self._analyze, doc))
+
+                for finished in as_completed(in_flight):
+                    succeeded, failed = self._record(finished.result(), out_file, on_record, succeeded, failed)
+        finally:
+            if out_file:
+                out_file.close()
+
+        elapsed = time.perf_counter() - start
+        processed = succeeded + failed
+        llm_calls = llm_call_counter.value - llm_calls_start
+        search_calls = search_call_counter.value - search_calls_start
+
+        stats = {
+            "started_at": started_at,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "elapsed_seconds": round(elapsed, 2),
+            "doc_concurrency": self.doc_concurrency,
+            "claim_concurrency": self.detector.MAX_PARALLEL_CLAIMS,
+            "docs_processed": processed,
+            "docs_succeeded": succeeded,
+            "docs_failed": failed,
+            "docs_skipped_from_checkpoint": skipped,
+            "docs_per_minute": round(processed / elapsed * 60, 2) if elapsed > 0 else 0,
+            "llm_calls": llm_calls,
+            "llm_calls_per_doc": round(llm_calls / processed, 2) if processed else 0,
+            "search_calls": search_calls,
+            "search_calls_per_doc": round(search_calls / processed, 2) if processed else 0
+        }
+
+        if out_path:
+            with open(f"{out_path}.stats.json", "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+
+        return stats
+
+    def _record(self, record: dict, out_file, on_record, succeeded: int, failed: int) -> tuple:
+        """Persist one finished record and update counts (called from the submitting thread only)"""
+        if out_file:
+            out_file.write(json.dumps(record, default=str) + "\n")
+            out_file.flush()
+        if on_record:
+            on_record(record)
+        if record["status"] == "ok":
+            return succeeded + 1, failed
+        return succeeded, failed + 1
@@ -0,0 +1,190 @@
+"""
+Cache utilities
+Two-tier (in-memory LRU + on-disk SQLite) key/value cache with TTL and size bounds.
+
+Used to memoize expensive external calls. Values must be JSON-serializable. The memory
+tier answers repeat lookups without touching disk; the SQLite tier survives restarts
+and is shared by every process pointing at the same file.
+"""
+from collections import OrderedDict
+from typing import Any, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_cache_key(*parts) -> str:
+    """Stable hash of the given key parts"""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TwoTierCache:
+    """Thread-safe LRU memory cache in front of a size-bounded SQLite store"""
+
+    def __init__(self, db_path: str, table: str = "cache",
+                 memory_entries: int = 1024, max_entries: int = 50000):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.db_path = db_path
+        self.table = table
+        self.memory_entries = max(0, memory_entries)
+        self.max_entries = max(1, max_entries)
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_count = None
+
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _db(self) -> sqlite3.Connection:
+        """Lazily open the shared connection (callers hold self._lock)"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed ON {self.table}(accessed_at)"
+            )
+            self._conn.commit()
+            self._disk_count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return self._conn
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        if not self.memory_entries:
+            return
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    return entry[1]
+                del self._memory[key]
+
+            try:
+                conn = self._db()
+                row = conn.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                if row[1] <= now:
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    conn.commit()
+                    self._disk_count -= 1
+                    self.misses += 1
+                    return None
+                conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"  ⚠️ Cache read error ({self.table}): {e}")
+                self.misses += 1
+                return None
+
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self.hits_disk += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        """Store a value in both tiers for ttl_seconds"""
+        if ttl_seconds <= 0:
+            return
+        now = time.time()
+        expires_at = now + ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            try:
+                conn = self._db()
+                existed = conn.execute(
+                    f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone() is not None
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, default=str), expires_at, now)
+                )
+                if not existed:
+                    self._disk_count += 1
+                self._evict_disk(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"  ⚠️ Cache write error ({self.table}): {e}")
+                return
+            self.stores += 1
+
+    def _evict_disk(self, conn: sqlite3.Connection, now: float):
+        """Drop expired rows, then least recently used rows beyond max_entries"""
+        if self._disk_count <= self.max_entries:
+            return
+        cursor = conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        removed = cursor.rowcount
+        overflow = self._disk_count - removed - self.max_entries
+        if overflow > 0:
+            # Evict a little extra so we don't run this on every insert
+            batch = overflow + max(1, self.max_entries // 20)
+            cursor = conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (batch,)
+            )
+            removed += cursor.rowcount
+        self._disk_count -= removed
+        self.evictions += removed
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            try:
+                conn = self._db()
+                conn.execute(f"DELETE FROM {self.table}")
+                conn.commit()
+                self._disk_count = 0
+            except sqlite3.Error as e:
+                print(f"  ⚠️ Cache clear error ({self.table}): {e}")
+
+    def stats(self) -> dict:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            hits = self.hits_memory + self.hits_disk
+            return {
+                "hits": hits,
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": f"{(hits / lookups * 100):.1f}%" if lookups else "N/A",
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count
+            }
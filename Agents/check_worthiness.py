@@ -0,0 +1,213 @@
+"""
+Check-worthiness pre-filter
+Cheap local scoring of sentences before the statement extractor runs.
+
+Each sentence gets a handful of surface features - numbers, dates, named entities,
+reporting verbs, questions, first-person opinion and instruction markers - combined
+with fixed weights into a score used to trim long documents to their best sentences
+before chunked extraction.
+
+Separately, a conservative test decides whether a sentence could carry a checkable
+claim at all. Only questions, greetings and filler, instructions and first-person
+statements of taste fail it, and only when they have no name, reporting verb or claim
+cue ("cures", "causes", "study"); any plain declarative sentence passes. An input with
+no passing sentence (a question, a recipe, "thanks, love it!") skips the extraction
+LLM call; otherwise short inputs reach the extractor unchanged. Everything is regex
+and NumPy: no model download, no network.
+"""
+from config import Config
+from typing import List, Optional, Tuple
+import re
+import threading
+
+import numpy as np
+
+
+MONTHS = ("january|february|march|april|may|june|july|august|september|october|"
+          "november|december|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec")
+
+REPORTING_VERBS = frozenset("""
+said says say stated states reported reports announced announces confirmed confirms
+according claimed claims revealed reveals found finds showed shows estimated estimates
+admitted denied accused testified published recorded measured surveyed polled ruled
+""".split())
+
+# Words that mark an opinion or a personal stance rather than a checkable statement
+OPINION_MARKERS = frozenset("""
+think believe feel love hate hope wish prefer favorite favourite delicious amazing
+awesome terrible beautiful best worst should must ought lovely wonderful horrible
+""".split())
+
+# The subset of opinion markers that express taste, wishes or obligation rather than
+# framing a claim ("I think X" still asserts X)
+TASTE_MARKERS = OPINION_MARKERS - frozenset("think believe feel".split())
+
+FIRST_PERSON = frozenset("i me my mine we us our".split())
+
+# Words that turn an instruction or a personal remark into a claim worth checking
+CLAIM_CUES = frozenset("""
+cure cures cured prevent prevents prevented cause causes caused kill kills killed heal
+heals proven proves prove fact facts true false fake hoax study studies research
+scientists doctors experts evidence banned illegal safe dangerous toxic poison
+""".split())
+
+# Greetings and filler that make up sentences with nothing to check
+FILLER_WORDS = frozenset("""
+hi hello hey thanks thank you so much very lol haha ok okay yes no yeah yep nope wow
+great nice cool good morning evening night bye please sorry welcome everyone all guys
+""".split())
+
+# Imperatives that open instructions (recipes, how-tos)
+INSTRUCTION_VERBS = frozenset("""
+add stir mix bake preheat chop slice whisk pour combine season serve heat boil simmer
+fry cook place remove let cover click tap open press select go try make take put
+""".split())
+
+# Feature order matches FEATURE_WEIGHTS
+FEATURES = ("number", "date", "entity", "reporting", "quantity", "question", "opinion",
+            "first_person", "instruction", "short")
+FEATURE_WEIGHTS = np.array([1.0, 0.75, 0.5, 0.75, 0.5, -1.5, -0.75, -0.5, -1.5, -1.0],
+                           dtype=np.float32)
+
+_NUMBER_RE = re.compile(r'\d')
+_DATE_RE = re.compile(rf'\b(?:(?:1[89]|20)\d{{2}}|{MONTHS})\b|\b\d{{1,2}}/\d{{1,2}}/\d{{2,4}}\b', re.IGNORECASE)
+_QUANTITY_RE = re.compile(r'%|\b(?:percent|million|billion|trillion|thousand|hundred|half|'
+                          r'twice|double|tripled?|majority|most|record|highest|lowest)\b', re.IGNORECASE)
+_WORD_RE = re.compile(r"\b[A-Za-z][A-Za-z'-]*")  # Not unit suffixes ("180C")
+
+# Sentence-final punctuation (plus closing quotes/brackets) followed by whitespace
+_BOUNDARY_RE = re.compile(r'[.!?]+["\')\]]*\s+')
+# Abbreviations whose period does not end a sentence
+ABBREVIATIONS = frozenset("""
+mr mrs ms dr prof sr jr st mt ft gen col lt sgt capt cmdr adm gov sen rep pres rev hon
+vs etc inc ltd co corp dept univ assn est approx no nos vol fig al ca cf
+jan feb mar apr jun jul aug sep sept oct nov dec
+""".split())
+_INITIALISM_RE = re.compile(r'^(?:[A-Za-z]\.)+[A-Za-z]?$')  # U.S, e.g, J
+
+_counts = {"inputs": 0, "short_circuited": 0, "sentences_in": 0, "sentences_checkable": 0,
+           "sentences_kept": 0}
+_counts_lock = threading.Lock()
+
+
+def _is_boundary(text: str, match) -> bool:
+    """False when the period ends an abbreviation or initial rather than a sentence"""
+    if text[match.start()] != ".":
+        return True
+    token = text[:match.start()].rsplit(None, 1)[-1] if text[:match.start()].strip() else ""
+    token = token.lstrip('"\'([')
+    if token.lower() in ABBREVIATIONS or (len(token) == 1 and token.isupper()):
+        return False
+    if _INITIALISM_RE.match(token):
+        # "the U.S. economy" continues; "in the U.S. The report" ends the sentence
+        following = text[match.end():match.end() + 1]
+        return following.isupper()
+    return True
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on line breaks and sentence-final punctuation"""
+    sentences = []
+    for line in (text or "").splitlines():
+        start = 0
+        for match in _BOUNDARY_RE.finditer(line):
+            if _is_boundary(line, match):
+                sentences.append(line[start:match.end()])
+                start = match.end()
+        sentences.append(line[start:])
+    return [s.strip() for s in sentences if s.strip()]
+
+
+def _features(sentence: str) -> List[float]:
+    words = _WORD_RE.findall(sentence)
+    lowered = [w.lower() for w in words]
+    # Capitalized words after the first are likely names, places or organizations
+    entities = sum(1 for w in words[1:] if w[0].isupper() and w.lower() not in FIRST_PERSON)
+    return [
+        1.0 if _NUMBER_RE.search(sentence) else 0.0,
+        1.0 if _DATE_RE.search(sentence) else 0.0,
+        min(entities, 3) / 3,
+        1.0 if any(w in REPORTING_VERBS for w in lowered) else 0.0,
+        1.0 if _QUANTITY_RE.search(sentence) else 0.0,
+        1.0 if sentence.rstrip().endswith("?") else 0.0,
+        1.0 if any(w in OPINION_MARKERS for w in lowered) else 0.0,
+        1.0 if any(w in FIRST_PERSON for w in lowered) else 0.0,
+        1.0 if lowered and lowered[0] in INSTRUCTION_VERBS else 0.0,
+        1.0 if len(words) < 3 else 0.0,
+    ]
+
+
+def is_checkable(sentence: str) -> bool:
+    """
+    Whether the sentence could carry a checkable claim (errs towards True).
+
+    False only for questions, greetings and filler, and for instructions or
+    first-person statements of taste without a name, reporting verb or claim cue.
+    """
+    if sentence.rstrip().endswith("?"):
+        return False
+    words = _WORD_RE.findall(sentence)
+    lowered = [w.lower() for w in words]
+    if not lowered or all(w in FILLER_WORDS for w in lowered):
+        return False
+    entities = any(w[0].isupper() and w.lower() not in FIRST_PERSON for w in words[1:])
+    if entities or any(w in REPORTING_VERBS or w in CLAIM_CUES for w in lowered):
+        return True
+    if lowered[0] in INSTRUCTION_VERBS:
+        return False  # "Preheat the oven to 180C" - numbers in instructions are amounts
+    if any(w in FIRST_PERSON for w in lowered) and any(w in TASTE_MARKERS for w in lowered):
+        return bool(_NUMBER_RE.search(sentence))
+    return True
+
+
+def score_sentences(sentences: List[str]) -> np.ndarray:
+    """Check-worthiness score per sentence (higher is more worth checking)"""
+    if not sentences:
+        return np.zeros(0, dtype=np.float32)
+    matrix = np.array([_features(s) for s in sentences], dtype=np.float32)
+    return matrix @ FEATURE_WEIGHTS
+
+
+def select_candidates(text: str, max_sentences: int = None) -> Tuple[List[str], int]:
+    """
+    Pick the sentences worth sending to the statement extractor.
+
+    Args:
+        text: Input text
+        max_sentences: Trim to the checkable sentences, and to this many of the
+                       best-scoring ones (None keeps every sentence of an input
+                       with anything checkable)
+
+    Returns:
+        (candidate sentences in document order, total sentence count); no
+        candidates when no sentence is checkable
+    """
+    sentences = split_sentences(text)
+    checkable = np.flatnonzero([is_checkable(s) for s in sentences])
+    if not len(checkable) or max_sentences is None:
+        keep = np.arange(len(sentences)) if len(checkable) else checkable
+    else:
+        keep = checkable
+        if len(keep) > max_sentences:
+            scores = score_sentences([sentences[i] for i in keep])
+            # Best scores first, ties broken by position; then restore document order
+            keep = np.sort(keep[np.lexsort((keep, -scores))[:max_sentences]])
+    with _counts_lock:
+        _counts["inputs"] += 1
+        _counts["short_circuited"] += 0 if len(keep) else 1
+        _counts["sentences_in"] += len(sentences)
+        _counts["sentences_checkable"] += len(checkable)
+        _counts["sentences_kept"] += len(keep)
+    return [sentences[i] for i in keep], len(sentences)
+
+
+def prefilter_stats() -> Optional[dict]:
+    if not Config.CHECK_WORTHINESS_ENABLED:
+        return None
+    with _counts_lock:
+        counts = dict(_counts)
+    sentences_in = counts["sentences_in"]
+    return {
+        **counts,
+        "kept_rate": f"{(counts['sentences_kept'] / sentences_in * 100):.1f}%" if sentences_in else "N/A"
+    }
@@ -0,0 +1,207 @@
+"""
+Claim Cache
+Cross-scan knowledge base of fact-checked claims.
+
+Each checked claim's verdict, evidence and check time is stored under a normalized
+form of its text (case, whitespace and punctuation folded, numbers canonicalized,
+signs and currency symbols spelled out), so
+an identical or trivially reworded claim seen in a later scan reuses the verdict
+instead of running the fact-checker agent again. TTLs depend on the verdict: settled
+facts live longer than unverifiable (often breaking) claims. Paraphrases are found
+through the near-duplicate claim index and seed the fact-checker; reusing their
+verdict outright is opt-in (CLAIM_SIMILAR_REUSE_ENABLED).
+"""
+from Agents.cache_utils import TwoTierCache, make_cache_key
+from config import Config
+from datetime import datetime, timezone
+from Agents.claim_index import claim_index, same_claim_shape
+from Agents.structured_output import ClaimVerdict
+from pydantic import ValidationError
+from typing import List, Optional, Tuple
+import re
+import threading
+import unicodedata
+
+
+# Persistent claim verdict cache (None when disabled)
+claim_cache = TwoTierCache(
+    Config.CLAIM_CACHE_PATH,
+    table="claim_cache",
+    memory_entries=Config.CLAIM_CACHE_MEMORY_ENTRIES,
+    max_entries=Config.CLAIM_CACHE_MAX_ENTRIES
+) if Config.CLAIM_CACHE_ENABLED else None
+
+# Per-claim fields that describe this scan rather than the verdict
+_SCAN_FIELDS = ("id", "text", "supported_by_media_id", "cached", "checked_at", "cache_match")
+
+_counts = {"exact_hits": 0, "similar_hits": 0, "seeds": 0, "misses": 0, "skipped": 0}
+_counts_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _counts_lock:
+        _counts[name] += 1
+
+
+# Currency symbols spelled out so "$10m" and "£10m" stay different claims
+CURRENCY_SIGNS = {
+    "$": "dollar", "£": "pound", "€": "euro", "¥": "yen", "₹": "rupee", "₽": "ruble",
+    "₩": "won", "¢": "cent",
+}
+_CURRENCY_RE = re.compile("[" + re.escape("".join(CURRENCY_SIGNS)) + "]")
+
+
+def _canonical_number(match: re.Match) -> str:
+    """'1,000.50' -> '1000.5', '007' -> '7'"""
+    number = match.group().replace(",", "")
+    if "." in number:
+        number = number.rstrip("0").rstrip(".")
+    return number.lstrip("0") or "0"
+
+
+def normalize_claim(text: str) -> str:
+    """Fold case, whitespace, punctuation and number formatting; keep signs and currencies"""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = text.replace("%", " percent ")
+    text = _CURRENCY_RE.sub(lambda m: f" {CURRENCY_SIGNS[m.group()]} ", text)
+    # A leading minus ("-5%", "−3°C") but not a hyphen or range ("covid-19", "2020-2021")
+    text = re.sub(r'(?<![\w.])[-\u2212](?=\d)', ' minus ', text)
+    text = re.sub(r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?', _canonical_number, text)
+    # Drop punctuation but keep decimal points inside numbers
+    text = re.sub(r'(?<!\d)\.|\.(?!\d)|[^\w\s.]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _cached_result(entry: dict, statement: str, claim_id: str, match: dict) -> dict:
+    """A stored verdict re-labelled with this scan's claim id and text"""
+    return {
+        **entry["result"],
+        "id": claim_id,
+        "text": statement,
+        "cached": True,
+        "checked_at": entry["checked_at"],
+        "cache_match": match
+    }
+
+
+def _similar_claim(normalized: str) -> Optional[Tuple[dict, float]]:
+    """Most similar stored claim above the seed threshold with the same signature and word order"""
+    if claim_index is None:
+        return None
+    try:
+        matches = claim_index.search(normalized, k=5)
+    except Exception as e:
+        print(f"  ⚠️ Claim index search failed: {e}")
+        return None
+    for key, similarity in matches:
+        if similarity < Config.CLAIM_SEED_THRESHOLD:
+            break
+        entry = claim_cache.get(key)
+        if entry is None:
+            continue  # Verdict expired
+        if not same_claim_shape(normalize_claim(entry["statement"]), normalized):
+            continue
+        return entry, similarity
+    return None
+
+
+def match_claim(statement: str, claim_id: str) -> Tuple[Optional[dict], Optional[dict]]:
+    """
+    Find a previously checked verdict for the statement.
+
+    An exact (normalized) match is reused outright. A near-duplicate above
+    CLAIM_SEED_THRESHOLD is returned as a seed the fact-checker can start from, or,
+    with CLAIM_SIMILAR_REUSE_ENABLED, reused outright above CLAIM_REUSE_THRESHOLD.
+
+    Returns:
+        (cached result flagged cached=True, or None; seed dict, or None)
+    """
+    normalized = normalize_claim(statement)
+    if claim_cache is None or not normalized:
+        return None, None
+
+    entry = claim_cache.get(make_cache_key("claim", normalized))
+    if entry is not None:
+        _count("exact_hits")
+        return _cached_result(entry, statement, claim_id, {"type": "exact", "similarity": 1.0}), None
+
+    similar = _similar_claim(normalized)
+    if similar is None:
+        _count("misses")
+        return None, None
+    entry, similarity = similar
+    if Config.CLAIM_SIMILAR_REUSE_ENABLED and similarity >= Config.CLAIM_REUSE_THRESHOLD:
+        _count("similar_hits")
+        return _cached_result(entry, statement, claim_id, {
+            "type": "similar",
+            "similarity": round(similarity, 3),
+            "matched_claim": entry["statement"]
+        }), None
+
+    _count("seeds")
+    return None, {
+        "text": entry["statement"],
+        "status": entry["result"].get("status"),
+        "note": entry["result"].get("note"),
+        "similarity": round(similarity, 3)
+    }
+
+
+def _is_verdict(result: dict) -> bool:
+    """A schema-valid verdict from the fact-checker (not a parse-failure or error fallback)"""
+    if not isinstance(result, dict) or result.get("fallback"):
+        return False
+    try:
+        ClaimVerdict.model_validate(result)
+    except ValidationError:
+        return False
+    return True
+
+
+def store_claim(statement: str, result: dict):
+    """Remember a fresh fact-check result for the statement's per-status TTL"""
+    store_claims([(statement, result)])
+
+
+def store_claims(items: List[Tuple[str, dict]]):
+    """
+    Remember several fresh (statement, result) fact-checks, indexing them in one write.
+
+    Fallback and error results are skipped (in the cache and the index alike), so a
+    failed check is retried next scan instead of being replayed as a verdict.
+    """
+    if claim_cache is None:
+        return
+    indexed = []
+    for statement, result in items:
+        if not _is_verdict(result):
+            _count("skipped")
+            continue
+        normalized = normalize_claim(statement)
+        ttl = Config.get_claim_cache_ttl(result.get("status", "UNVERIFIABLE"))
+        if not normalized or ttl <= 0:
+            continue
+        key = make_cache_key("claim", normalized)
+        claim_cache.set(key, {
+            "statement": statement,
+            "result": {k: v for k, v in result.items() if k not in _SCAN_FIELDS},
+            "checked_at": datetime.now(timezone.utc).isoformat()
+        }, ttl)
+        indexed.append((key, normalized))
+    if claim_index is not None and indexed:
+        try:
+            claim_index.add_many(indexed)
+        except Exception as e:
+            print(f"  ⚠️ Claim index update failed: {e}")
+
+
+def claim_cache_stats() -> Optional[dict]:
+    if claim_cache is None:
+        return None
+    with _counts_lock:
+        counts = dict(_counts)
+    return {
+        **counts,
+        "cache": claim_cache.stats(),
+        "index": claim_index.stats() if claim_index else None
+    }
@@ -0,0 +1,348 @@
+"""
+Claim Index
+Offline near-duplicate search over previously checked claims.
+
+Claims (already normalized by the claim cache) are embedded with a feature-hashing
+vectorizer (word stems, stem bigrams and character trigrams hashed into a fixed number
+of signed buckets, L2-normalized), so no model download or network access is needed. Vectors live in a memory-mapped float16
+matrix next to a compact sign-random-projection sketch of each row. A query first ranks
+all rows by sketch Hamming distance (a vectorized XOR/popcount over a few bytes per
+claim), then re-scores only the best candidates with exact cosine similarity. This keeps
+search approximate but fast, and lets the index grow to millions of claims without
+loading the vectors into memory.
+"""
+from config import Config
+from typing import List, Tuple
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+
+# Words that carry little meaning for matching claims
+STOPWORDS = frozenset("""
+a an the of to in on at by for from with and or but as is are was were be been being
+it its this that these those has have had do does did will would can could should
+than then there their they them he she his her we our you your i off
+""".split())
+
+# Spelling variants folded to one term before stemming
+SYNONYMS = {
+    "metres": "meters", "metre": "meter", "kilometres": "kilometers", "kilometre": "kilometer",
+    "centre": "center", "defence": "defense", "labour": "labor", "programme": "program",
+}
+
+_SUFFIXES = ("ations", "ation", "ments", "ment", "ing", "ed", "ly")
+
+
+def _stem(word: str) -> str:
+    """Crude plural and suffix stripping so inflections share features"""
+    word = SYNONYMS.get(word, word)
+    if word.isdigit() or len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+# Negations ("don't" normalizes to "don t")
+NEGATIONS = frozenset("not no never t cannot nobody nothing neither nor none".split())
+
+# Hedges and quantifiers: "X causes Y" and "X rarely causes Y" are different claims
+HEDGES = frozenset("""
+rarely seldom hardly barely scarcely sometimes occasionally often usually always mostly
+partly partially allegedly reportedly possibly probably may might could likely unlikely
+all every some few many most only almost nearly
+""".split())
+
+# Currency names ("£10m" normalizes to "pound 10m"): "$10m" and "£10m" are different claims
+CURRENCIES = frozenset("""
+dollar dollars pound pounds euro euros yen yuan rupee rupees ruble rubles won cent cents
+""".split())
+
+# Words whose direction or stance flips a claim
+POLARITY = {
+    **dict.fromkeys("""rose rise rises rising risen increase increased increases increasing
+        grew grow grows growing grown gain gained gains surge surged jump jumped climb
+        climbed soared higher more up""".split(), "up"),
+    **dict.fromkeys("""fell fall falls falling fallen decrease decreased decreases decreasing
+        decline declined declines dropped drop drops shrank shrink plunged plummeted lower
+        less fewer down""".split(), "down"),
+    **dict.fromkeys("""said says confirmed confirms admitted admits acknowledged
+        acknowledges agreed agrees""".split(), "assert"),
+    **dict.fromkeys("""denied denies deny rejected rejects refuted refutes disputed
+        disputes""".split(), "deny"),
+}
+
+
+def claim_signature(normalized: str) -> tuple:
+    """
+    Signed numbers, currencies, negation polarity, hedges and direction/stance words
+    of a normalized claim.
+
+    Claims with different signatures must never share a verdict, however similar
+    their vectors are ("cut 10% of staff" vs "cut 20% of staff", "-5%" vs "5%",
+    "$10m" vs "£10m", "X causes Y" vs "X does not cause Y" or "X rarely causes Y",
+    "rose" vs "fell", "said" vs "denied").
+    """
+    words = normalized.split()
+    negated = sum(1 for w in words if w in NEGATIONS) % 2 == 1
+    return (
+        frozenset(re.findall(r'(?:minus )?\d+(?:\.\d+)?', normalized)),
+        frozenset(w.rstrip("s") for w in words if w in CURRENCIES),
+        negated,
+        frozenset(w for w in words if w in HEDGES),
+        frozenset(POLARITY[w] for w in words if w in POLARITY)
+    )
+
+
+def _content_order(normalized: str) -> List[str]:
+    """Content-word stems in order of first appearance (numbers are compared by the signature)"""
+    seen, order = set(), []
+    for word in normalized.split():
+        if word in STOPWORDS or not word.isalpha():
+            continue
+        stem = _stem(word)
+        if stem not in seen:
+            seen.add(stem)
+            order.append(stem)
+    return order
+
+
+def same_claim_shape(a: str, b: str) -> bool:
+    """
+    Same signature, and the words both claims share appear in the same order - so
+    "Russia invaded Ukraine" never matches "Ukraine invaded Russia".
+    """
+    if claim_signature(a) != claim_signature(b):
+        return False
+    order_a, order_b = _content_order(a), _content_order(b)
+    shared = set(order_a) & set(order_b)
+    return [w for w in order_a if w in shared] == [w for w in order_b if w in shared]
+
+
+class HashingVectorizer:
+    """Stateless text -> fixed-size vector embedding via signed feature hashing"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _features(self, normalized: str) -> List[Tuple[str, float]]:
+        stems = [_stem(w) for w in normalized.split() if w not in STOPWORDS]
+        features = [(f"w:{s}", 1.0) for s in stems]
+        features += [(f"b:{a}_{b}", 0.5) for a, b in zip(stems, stems[1:])]
+        for s in stems:
+            padded = f"<{s}>"
+            features += [(f"c:{padded[i:i + 3]}", 0.25) for i in range(len(padded) - 2)]
+        return features
+
+    def transform(self, normalized: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(normalized):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += weight if (h // self.dim) & 1 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a uint64 matrix"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int32)
+
+
+class ClaimIndex:
+    """Memory-mapped vector index of claim cache keys (one row per key)"""
+
+    INITIAL_CAPACITY = 4096
+    KEY_BYTES = 64  # Claim cache keys are sha256 hex digests
+
+    def __init__(self, directory: str, dim: int = None, sketch_bits: int = None,
+                 candidates: int = None):
+        self.directory = directory
+        self.dim = dim or Config.CLAIM_INDEX_DIM
+        self.sketch_words = max(1, (sketch_bits or Config.CLAIM_INDEX_SKETCH_BITS) // 64)
+        self.candidates = candidates or Config.CLAIM_INDEX_CANDIDATES
+        self.vectorizer = HashingVectorizer(self.dim)
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.count = 0
+        self.capacity = 0
+        self.searches = 0
+
+    # Storage
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        """Open (or create) the memory-mapped files (callers hold self._lock)"""
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path = self._path("meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim or meta["sketch_words"] != self.sketch_words:
+                raise ValueError(
+                    f"Claim index at {self.directory} was built with dim={meta['dim']}, "
+                    f"sketch_words={meta['sketch_words']}; delete it or match the config"
+                )
+            self.count = meta["count"]
+            self.capacity = meta["capacity"]
+        else:
+            self.count = 0
+            self.capacity = self.INITIAL_CAPACITY
+            self._allocate(self.capacity)
+            self._write_meta()
+
+        # Fixed projection so sketches stay comparable across restarts
+        rng = np.random.default_rng(0)
+        self._planes = rng.standard_normal((self.dim, self.sketch_words * 64)).astype(np.float32)
+        self._open_maps()
+        # key -> row, so re-stored claims update their row instead of appending
+        self._rows = {key.decode("ascii"): row for row, key in enumerate(self._keys[:self.count])}
+        self._loaded = True
+
+    def _allocate(self, capacity: int):
+        sizes = {
+            "vectors.f16": capacity * self.dim * 2,
+            "sketches.u64": capacity * self.sketch_words * 8,
+            "keys.bin": capacity * self.KEY_BYTES
+        }
+        for name, size in sizes.items():
+            with open(self._path(name), "ab") as f:
+                f.truncate(size)
+
+    def _open_maps(self):
+        self._vectors = np.memmap(self._path("vectors.f16"), dtype=np.float16, mode="r+",
+                                  shape=(self.capacity, self.dim))
+        self._sketches = np.memmap(self._path("sketches.u64"), dtype=np.uint64, mode="r+",
+                                   shape=(self.capacity, self.sketch_words))
+        self._keys = np.memmap(self._path("keys.bin"), dtype=f"S{self.KEY_BYTES}", mode="r+",
+                               shape=(self.capacity,))
+
+    def _grow(self):
+        """Double the capacity of every file and remap"""
+        for array in (self._vectors, self._sketches, self._keys):
+            array.flush()
+        del self._vectors, self._sketches, self._keys
+        self.capacity *= 2
+        self._allocate(self.capacity)
+        self._open_maps()
+
+    def _write_meta(self):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "sketch_words": self.sketch_words,
+                "count": self.count,
+                "capacity": self.capacity
+            }, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _sketch(self, vectors: np.ndarray) -> np.ndarray:
+        bits = (vectors @ self._planes) > 0
+        return np.packbits(bits, axis=-1).view(np.uint64)
+
+    # Public API
+
+    def add(self, key: str, normalized: str):
+        """Index a normalized claim under its claim cache key"""
+        self.add_many([(key, normalized)])
+
+    def add_many(self, items: List[Tuple[str, str]]):
+        """
+        Index (claim cache key, normalized claim) pairs. A key already in the index
+        has its row updated in place; metadata is written once for the whole batch.
+        """
+        rows = [(key, self.vectorizer.transform(normalized)) for key, normalized in items]
+        rows = [(key, vector) for key, vector in rows if vector.any()]
+        if not rows:
+            return
+        with self._lock:
+            self._load()
+            count = self.count
+            for key, vector in rows:
+                row = self._rows.get(key)
+                if row is None:
+                    if count >= self.capacity:
+                        self._grow()
+                    row = count
+                    count += 1
+                self._vectors[row] = vector
+                self._sketches[row] = self._sketch(vector[np.newaxis, :])[0]
+                self._keys[row] = key.encode("ascii")
+                self._rows[key] = row
+            # Data first, then the count, so a crash never exposes a half-written row
+            self._vectors.flush()
+            self._sketches.flush()
+            self._keys.flush()
+            if count != self.count:
+                self.count = count
+                self._write_meta()
+
+    def search(self, normalized: str, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Approximate k nearest indexed claims to a normalized claim.
+
+        Returns:
+            (claim cache key, cosine similarity) pairs, most similar first
+        """
+        query = self.vectorizer.transform(normalized)
+        if not query.any():
+            return []
+        with self._lock:
+            self._load()
+            n = self.count
+            if n == 0:
+                return []
+            self.searches += 1
+
+            # Stage 1: rank every row by sketch Hamming distance
+            query_sketch = self._sketch(query[np.newaxis, :])
+            distances = _popcount(np.bitwise_xor(self._sketches[:n], query_sketch))
+            shortlist = min(self.candidates, n)
+            if shortlist < n:
+                candidates = np.argpartition(distances, shortlist - 1)[:shortlist]
+            else:
+                candidates = np.arange(n)
+
+            # Stage 2: exact cosine on the shortlist only
+            candidates.sort()  # Sequential reads from the memory map
+            similarities = self._vectors[candidates].astype(np.float32) @ query
+            order = np.argsort(-similarities)[:k]
+            keys = self._keys[candidates[order]]
+
+        return [(key.decode("ascii"), float(similarities[i])) for key, i in zip(keys, order)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "indexed_claims": self.count if self._loaded else None,
+                "capacity": self.capacity if self._loaded else None,
+                "dim": self.dim,
+                "sketch_bits": self.sketch_words * 64,
+                "searches": self.searches
+            }
+
+
+# Near-duplicate index over the claim cache (None when disabled)
+claim_index = ClaimIndex(Config.CLAIM_INDEX_DIR) if Config.CLAIM_INDEX_ENABLED else None
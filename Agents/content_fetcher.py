@@ -0,0 +1,228 @@
+"""
+Content Fetcher
+Fetches and cleans article content from URLs.
+
+Shared by the API server, background jobs and batch runs so every entry point turns
+a URL into analyzable text the same way. The HTML is parsed once: a single walk over
+the tags collects the canonical URL, publisher, publish date and media (with
+dimensions and alt text) before the page is flattened to text, and the resulting
+FetchedDocument is passed through the pipeline so no stage has to re-parse it.
+
+Publisher identity always comes from the URL that was actually fetched (after
+redirects). A page's own <link rel=canonical> is only trusted when it points at the
+same host; otherwise it is kept as metadata, so a page cannot claim another outlet's
+reputation by declaring its canonical URL.
+"""
+from Agents.http_client import get_http_session, http_timeout
+from bs4 import BeautifulSoup
+from config import Config
+from typing import List, Optional
+from urllib.parse import urljoin, urlsplit
+import json
+import re
+
+
+# Page chrome whose text and images are not part of the article
+NOISE_TAGS = ["script", "style", "nav", "footer", "header"]
+
+# <meta> names/properties, in order of preference
+PUBLISHED_META = ("article:published_time", "og:published_time", "datepublished", "pubdate",
+                  "publishdate", "publish-date", "dc.date.issued", "date")
+PUBLISHER_META = ("og:site_name", "application-name", "publisher")
+MEDIA_META = {"og:image": "image", "og:image:url": "image", "og:image:secure_url": "image",
+              "twitter:image": "image", "og:video": "video", "og:video:url": "video",
+              "og:video:secure_url": "video"}
+
+_EXTENSION_TYPES = {
+    "jpg": "image", "jpeg": "image", "png": "image", "gif": "image", "webp": "image",
+    "avif": "image", "svg": "image", "mp4": "video", "webm": "video", "mov": "video",
+    "avi": "video", "m3u8": "video", "mp3": "audio", "wav": "audio", "ogg": "audio",
+    "m4a": "audio"
+}
+
+
+class FetchedDocument:
+    """A fetched page: cleaned text plus the metadata and media found in its HTML"""
+
+    def __init__(self, text: str, url: str, canonical_url: str = None, publisher: str = None,
+                 published_at: str = None, media: List[dict] = None, fetched_url: str = None):
+        self.text = text
+        self.url = url
+        self.fetched_url = fetched_url or url  # After redirects
+        self.canonical_url = canonical_url  # As the page declares it (untrusted)
+        self.publisher = publisher  # Site name as the page declares it (og:site_name, JSON-LD)
+        self.published_at = published_at
+        self.media = media or []  # {"url", "type", "width", "height", "alt", "origin"}
+
+    @property
+    def source_url(self) -> str:
+        """The fetched URL, or the page's canonical URL when it is on the same host"""
+        if self.canonical_url and _host(self.canonical_url) == _host(self.fetched_url):
+            return self.canonical_url
+        return self.fetched_url
+
+    def media_urls(self) -> List[str]:
+        return [item["url"] for item in self.media]
+
+    def metadata(self) -> dict:
+        """Everything but the text, for reports and logs"""
+        return {
+            "url": self.url,
+            "fetched_url": self.fetched_url,
+            "canonical_url": self.canonical_url,
+            "publisher": self.publisher,
+            "published_at": self.published_at,
+            "media_count": len(self.media)
+        }
+
+
+def _host(url: str) -> str:
+    host = (urlsplit(url or "").hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_url(text: str) -> bool:
+    """Check if input is a URL"""
+    url_pattern = r'^https?://[^\s<>"{}|\\^`\[\]]+'
+    return bool(re.match(url_pattern, text.strip()))
+
+
+def _dimension(value) -> Optional[int]:
+    """'600', '600px' -> 600"""
+    match = re.match(r'\s*(\d+)', str(value or ""))
+    return int(match.group(1)) if match else None
+
+
+def _media_type(url: str, default: str) -> str:
+    extension = url.split("?", 1)[0].rsplit(".", 1)[-1].lower()
+    return _EXTENSION_TYPES.get(extension, default)
+
+
+def _json_ld_fields(script_text: str) -> tuple:
+    """(datePublished, publisher name) from a JSON-LD block"""
+    try:
+        data = json.loads(script_text or "")
+    except (json.JSONDecodeError, TypeError):
+        return None, None
+    items = data if isinstance(data, list) else [data]
+    items = [entry for item in items if isinstance(item, dict)
+             for entry in (item.get("@graph") if isinstance(item.get("@graph"), list) else [item])]
+    published, publisher = None, None
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        published = published or item.get("datePublished")
+        org = item.get("publisher")
+        if isinstance(org, list):
+            org = org[0] if org else None
+        if isinstance(org, dict):
+            publisher = publisher or org.get("name")
+    return published, publisher
+
+
+def parse_document(html: str, url: str, fetched_url: str = None) -> FetchedDocument:
+    """Turn fetched HTML into a FetchedDocument in one parse"""
+    base_url = fetched_url or url
+    soup = BeautifulSoup(html, 'html.parser')
+
+    canonical_url = None
+    meta = {}
+    json_ld_published, json_ld_publisher, time_published = None, None, None
+    media, seen = [], set()
+
+    def add_media(src, media_type, origin, width=None, height=None, alt=None) -> Optional[dict]:
+        if not src or src.startswith("data:"):
+            return None
+        src = urljoin(base_url, src.strip())
+        width, height = _dimension(width), _dimension(height)
+        if (width is not None and width <= 2) or (height is not None and height <= 2):
+            return None  # Tracking pixel
+        if src in seen or len(media) >= Config.MAX_MEDIA_ITEMS:
+            return None
+        seen.add(src)
+        media.append({
+            "url": src,
+            "type": _media_type(src, media_type),
+            "width": width,
+            "height": height,
+            "alt": (alt or "").strip() or None,
+            "origin": origin
+        })
+        return media[-1]
+
+    last_meta_image = None
+    for tag in soup.find_all(True):
+        name = tag.name
+        if name == "link" and "canonical" in (tag.get("rel") or []) and tag.get("href"):
+            canonical_url = canonical_url or urljoin(base_url, tag["href"])
+        elif name == "meta":
+            key = (tag.get("property") or tag.get("name") or tag.get("itemprop") or "").lower()
+            content = tag.get("content")
+            if not key or not content:
+                continue
+            meta.setdefault(key, content)
+            if key in MEDIA_META:
+                last_meta_image = add_media(content, MEDIA_META[key], key)
+            elif key in ("og:image:width", "og:image:height", "og:image:alt") and last_meta_image:
+                field = key.rsplit(":", 1)[-1]
+                last_meta_image[field] = _dimension(content) if field != "alt" else content
+        elif name == "script" and (tag.get("type") or "").lower() == "application/ld+json":
+            published, publisher = _json_ld_fields(tag.string)
+            json_ld_published = json_ld_published or published
+            json_ld_publisher = json_ld_publisher or publisher
+        elif name == "time" and tag.get("datetime"):
+            time_published = time_published or tag["datetime"]
+        elif name in ("img", "video", "audio", "source"):
+            if tag.find_parent(NOISE_TAGS):
+                continue
+            if name == "source":
+                parent = tag.find_parent(["video", "audio", "picture"])
+                media_type = "image" if parent is None or parent.name == "picture" else parent.name
+                src = tag.get("src") or (tag.get("srcset") or "").split(" ", 1)[0]
+                add_media(src, media_type, "source")
+            elif name == "img":
+                add_media(tag.get("src") or tag.get("data-src"), "image", "img",
+                          tag.get("width"), tag.get("height"), tag.get("alt"))
+            else:
+                add_media(tag.get("src"), name, name, tag.get("width"), tag.get("height"),
+                          tag.get("aria-label") or tag.get("title"))
+                if tag.get("poster"):
+                    add_media(tag["poster"], "image", f"{name}:poster")
+
+    published_at = next((meta[key] for key in PUBLISHED_META if key in meta), None)
+    publisher = next((meta[key] for key in PUBLISHER_META if key in meta), None)
+
+    # Remove script and style elements
+    for script in soup(NOISE_TAGS):
+        script.decompose()
+
+    # Get text content
+    text = soup.get_text(separator='\n', strip=True)
+
+    # Clean up whitespace
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    content = '\n'.join(lines)
+
+    # Safety cap only - long articles are extracted in chunks downstream
+    if len(content) > Config.MAX_DOCUMENT_CHARS:
+        content = content[:Config.MAX_DOCUMENT_CHARS] + "..."
+
+    return FetchedDocument(
+        text=content,
+        url=url,
+        canonical_url=canonical_url,
+        publisher=publisher or json_ld_publisher,
+        published_at=published_at or json_ld_published or time_published,
+        media=media,
+        fetched_url=fetched_url
+    )
+
+
+def fetch_document_sync(url: str) -> FetchedDocument:
+    """Fetch and parse a URL. Blocking - run off the event loop."""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+    response = get_http_session().get(url, headers=headers, timeout=http_timeout())
+    response.raise_for_status()
+    return parse_document(response.text, url, fetched_url=response.url)
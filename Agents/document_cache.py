@@ -0,0 +1,173 @@
+"""
+Document Cache
+Whole-scan result reuse for repeat submissions.
+
+A finished report is stored under a fingerprint of the document's normalized text
+(Unicode, case and whitespace folded) together with the scanned URL, so re-submitting
+the same link or pasting the same article inside the freshness window returns the
+earlier report - same scan_id, flagged cached - without running any stage. Lookups
+check a local two-tier cache first and then, when DOCUMENT_CACHE_NEO4J is on, the
+report stored on the matching Scan node, so workers share each other's scans.
+"""
+from Agents.cache_utils import TwoTierCache, make_cache_key
+from config import Config
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+
+
+# Local report cache (None when disabled)
+document_cache = TwoTierCache(
+    Config.DOCUMENT_CACHE_PATH,
+    table="documents",
+    memory_entries=Config.DOCUMENT_CACHE_MEMORY_ENTRIES,
+    max_entries=Config.DOCUMENT_CACHE_MAX_ENTRIES
+) if Config.DOCUMENT_CACHE_ENABLED else None
+
+# Report fields that describe one request rather than the scan result
+_REQUEST_FIELDS = ("search_logs", "search_summary")
+
+# Meta fields lookup() adds to a reused report
+_CACHE_META_FIELDS = ("cached", "cached_at", "cache_source")
+
+
+def document_fingerprint(text: str) -> str:
+    """sha256 of the text with Unicode forms, case and whitespace folded"""
+    normalized = unicodedata.normalize("NFKC", text or "").casefold()
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _cache_key(fingerprint: str, url: str) -> str:
+    return make_cache_key("document", fingerprint, url)
+
+
+class DocumentCache:
+    """Looks up and saves complete scan reports by content fingerprint and URL"""
+
+    def __init__(self, neo4j_client=None, ttl_seconds: int = None):
+        self.neo4j_client = neo4j_client
+        self.ttl_seconds = ttl_seconds or Config.DOCUMENT_CACHE_TTL_SECONDS
+        self._lock = threading.Lock()
+        self.hits_local = 0
+        self.hits_neo4j = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return document_cache is not None
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def skip(self):
+        """Record a lookup bypassed by force_refresh"""
+        if self.enabled:
+            self._count("refreshes")
+
+    def lookup(self, fingerprint: str, url: str) -> Optional[Tuple[dict, Optional[dict]]]:
+        """
+        Get the fresh report of an earlier scan of this content at this URL.
+
+        Returns:
+            (copy of the report with cached=True, cached_at and cache_source ("local"
+            or "neo4j") in its meta, detailed report or None if none was generated),
+            or None when no report is newer than the freshness window
+        """
+        if not self.enabled:
+            return None
+
+        key = _cache_key(fingerprint, url)
+        entry = document_cache.get(key)
+        cache_source = "local"
+        if entry is None and Config.DOCUMENT_CACHE_NEO4J and self.neo4j_client is not None \
+                and self.neo4j_client.available:
+            try:
+                entry = self.neo4j_client.find_scan_report(
+                    fingerprint, url, time.time() - self.ttl_seconds
+                )
+            except Exception as e:
+                print(f"  ⚠️ Document lookup failed: {e}")
+                entry = None
+            if entry is not None:
+                cache_source = "neo4j"
+                self._remember(key, entry)
+
+        if entry is None:
+            self._count("misses")
+            return None
+
+        self._count("hits_local" if cache_source == "local" else "hits_neo4j")
+        # The memory tier holds live objects; callers get their own copy
+        report = copy.deepcopy(entry["report"])
+        report["meta"].update({
+            "cached": True,
+            "cached_at": datetime.fromtimestamp(entry["stored_at"], timezone.utc).isoformat(),
+            "cache_source": cache_source
+        })
+        return report, copy.deepcopy(entry.get("detailed_report"))
+
+    def save(self, report: dict, detailed_report: dict = None):
+        """
+        Remember a fresh report (and optionally its detailed report) under its meta fingerprint.
+
+        A report served from the cache is not stored again, but a detailed report
+        generated for it is attached to the stored entry of the same scan.
+        """
+        meta = report.get("meta", {})
+        if not self.enabled or not meta.get("content_fingerprint"):
+            return
+        key = _cache_key(meta["content_fingerprint"], meta.get("url_scanned"))
+        existing = document_cache.get(key)
+        same_scan = existing is not None and existing["report"]["meta"].get("scan_id") == meta.get("scan_id")
+        if meta.get("cached") and (detailed_report is None or not same_scan):
+            return
+        if same_scan and detailed_report is None:
+            detailed_report = existing.get("detailed_report")
+        # Per-request fields (search logs, cache flags) are not part of the reusable result
+        stored = {k: v for k, v in report.items() if k not in _REQUEST_FIELDS}
+        stored["meta"] = {k: v for k, v in meta.items() if k not in _CACHE_META_FIELDS}
+        self._remember(key, json.loads(json.dumps({
+            "report": stored,
+            "detailed_report": detailed_report,
+            # Attaching a detailed report later keeps the scan's original age
+            "stored_at": existing["stored_at"] if same_scan else time.time()
+        }, default=str)))
+
+    def detailed_report(self, report: dict) -> Optional[dict]:
+        """Detailed report stored with a cached scan report, if one was generated"""
+        meta = report.get("meta", {})
+        if not self.enabled or not meta.get("content_fingerprint"):
+            return None
+        entry = document_cache.get(_cache_key(meta["content_fingerprint"], meta.get("url_scanned")))
+        if entry is None or entry["report"]["meta"].get("scan_id") != meta.get("scan_id"):
+            return None
+        return copy.deepcopy(entry.get("detailed_report"))
+
+    def _remember(self, key: str, entry: dict):
+        ttl = entry["stored_at"] + self.ttl_seconds - time.time()
+        if document_cache is not None and ttl > 0:
+            document_cache.set(key, entry, ttl)
+
+    def stats(self) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            lookups = self.hits_local + self.hits_neo4j + self.misses
+            hits = self.hits_local + self.hits_neo4j
+            return {
+                "hits_local": self.hits_local,
+                "hits_neo4j": self.hits_neo4j,
+                "misses": self.misses,
+                "forced_refreshes": self.refreshes,
+                "hit_rate": f"{(hits / lookups * 100):.1f}%" if lookups else "N/A",
+                "cache": document_cache.stats()
+            }
@@ -7,12 +7,21 @@ then assigns a verification status (VERIFIED, DEBUNKED, MISLEADING, etc.) with c
 """
 from langchain.agents import create_agent
 from langchain_core.tools import tool
-from Agents.prompts import FACT_CHECKER_PROMPT
+from Agents.prompts import FACT_CHECKER_PROMPT, FACT_CHECKER_BATCH_PROMPT
 from Agents.search_utils import perplexity_search
 from Agents.rate_limit_utils import invoke_with_rate_limit_retry
-from Agents.model_factory import create_model
-import json
-import re
+from Agents.llm_cache import register_agent
+from Agents.model_factory import create_model, cacheable_system_prompt
+from Agents.structured_output import StructuredOutput, ClaimVerdict, ClaimVerdictBatch
+from pydantic import ValidationError
+
+
+def _seed_hint(seed: dict) -> str:
+    return (
+        f"A similar claim was checked before: \"{seed['text']}\" was rated "
+        f"{seed.get('status')}. Note: {seed.get('note') or 'none'}\n"
+        "Use this as a lead, but verify whether it applies to this exact claim."
+    )
 
 
 class FactCheckerAgent:
@@ -20,6 +29,8 @@ class FactCheckerAgent:
     
     def __init__(self, model=None):
         self.model = model or create_model()
+        self.output = StructuredOutput(self.model, ClaimVerdict, "fact_checker")
+        self.batch_output = StructuredOutput(self.model, ClaimVerdictBatch, "fact_checker_batch")
         self._setup_agent()
     
     def _setup_agent(self):
@@ -31,36 +42,98 @@ class FactCheckerAgent:
         self.agent = create_agent(
             model=self.model,
             tools=[fact_check_search],
-            system_prompt=FACT_CHECKER_PROMPT
+            system_prompt=cacheable_system_prompt(FACT_CHECKER_PROMPT, self.model),
+            response_format=self.output.response_format
+        )
+        register_agent(self.agent, self.model, FACT_CHECKER_PROMPT, [fact_check_search],
+                       self.output.response_format)
+        self.batch_agent = create_agent(
+            model=self.model,
+            tools=[fact_check_search],
+            system_prompt=cacheable_system_prompt(FACT_CHECKER_BATCH_PROMPT, self.model),
+            response_format=self.batch_output.response_format
         )
+        register_agent(self.batch_agent, self.model, FACT_CHECKER_BATCH_PROMPT, [fact_check_search],
+                       self.batch_output.response_format)
     
-    def check(self, statement: str, claim_id: str = None) -> dict:
-        """Fact check a single statement."""
-        response = invoke_with_rate_limit_retry(self.agent, {
-            "messages": [{"role": "user", "content": f"Fact check (ID: {claim_id}): {statement}"}]
-        })
+    def check(self, statement: str, claim_id: str = None, seed: dict = None) -> dict:
+        """
+        Fact check a single statement.
         
-        content = response["messages"][-1].content if "messages" in response else str(response)
+        Args:
+            statement: The claim to check
+            claim_id: Claim ID echoed in the result
+            seed: Optional verdict of a similar, previously checked claim to start from
+        """
+        prompt = f"Fact check (ID: {claim_id}): {statement}"
+        if seed:
+            prompt += f"\n\n{_seed_hint(seed)}"
+        response = invoke_with_rate_limit_retry(self.agent, {
+            "messages": [{"role": "user", "content": prompt}]
+        }, agent_name="fact_checker", validate=self.output.is_valid)
         
-        try:
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                result = json.loads(match.group())
-                if claim_id and "id" not in result:
-                    result["id"] = claim_id
-                return result
-        except json.JSONDecodeError:
-            pass
+        result = self.output.parse(response)
+        if result is not None:
+            if claim_id and not result.get("id"):
+                result["id"] = claim_id
+            result["text"] = result.get("text") or statement
+            return result
         
+        # Parse failure: report the claim as unverifiable, flagged so it is never cached
+        content = response["messages"][-1].content if "messages" in response else str(response)
         return {
             "id": claim_id or "CLAIM_UNKNOWN",
             "text": statement,
             "status": "UNVERIFIABLE",
             "confidence": 0.5,
             "verification_source": None,
-            "note": content[:500] if content else None,
+            "note": content[:500] if isinstance(content, str) and content else None,
             "positive_count": 0,
             "negative_count": 0,
             "positive_evidence": [],
-            "negative_evidence": []
+            "negative_evidence": [],
+            "fallback": True
         }
+    
+    def check_batch(self, claims: list) -> dict:
+        """
+        Fact check several statements in one agent run.
+        
+        The agent sees every claim at once, so claims about the same entity can
+        share searches, and the system prompt is sent once instead of per claim.
+        
+        Args:
+            claims: (statement, claim_id, seed) tuples
+        
+        Returns:
+            Results by claim ID for the claims the agent answered with a valid
+            verdict; missing or malformed items are left out so the caller can
+            check them individually
+        """
+        lines = []
+        for statement, claim_id, seed in claims:
+            lines.append(f"- {claim_id}: {statement}")
+            if seed:
+                lines.append(f"  ({_seed_hint(seed)})")
+        prompt = f"Fact check each of these {len(claims)} claims:\n\n" + "\n".join(lines)
+        
+        response = invoke_with_rate_limit_retry(self.batch_agent, {
+            "messages": [{"role": "user", "content": prompt}]
+        }, agent_name="fact_checker_batch", validate=self.batch_output.is_valid)
+        
+        # No repair re-ask: unanswered claims are re-checked individually anyway
+        parsed = self.batch_output.parse(response, repair=False)
+        
+        statements = {claim_id: statement for statement, claim_id, _ in claims}
+        results = {}
+        for item in parsed["verdicts"] if parsed else []:
+            try:
+                item = ClaimVerdict.model_validate(item).model_dump()
+            except ValidationError:
+                continue
+            claim_id = item.get("id")
+            if claim_id not in statements or claim_id in results:
+                continue
+            item["text"] = item.get("text") or statements[claim_id]
+            results[claim_id] = item
+        return results
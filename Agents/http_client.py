@@ -0,0 +1,51 @@
+"""
+HTTP client utilities
+Process-wide pooled HTTP client with keep-alive connections.
+
+Every outbound call (Perplexity searches, URL fetches) reuses this client instead
+of opening a fresh TCP+TLS connection per request: one requests.Session per process,
+shared by all worker threads.
+
+There is deliberately no async client. Searches are made by synchronous agent tools
+running in worker threads - the server's asyncio handlers reach them through
+asyncio.to_thread - so an async pool would have no caller until the agents run async.
+"""
+from config import Config
+from requests.adapters import HTTPAdapter
+import requests
+import threading
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_timeout() -> tuple:
+    """(connect, read) timeout used by the pooled clients"""
+    return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+
+
+def get_http_session() -> requests.Session:
+    """Get the process-wide pooled requests session (thread-safe)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=Config.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=Config.HTTP_POOL_MAXSIZE
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def close_http_session():
+    """Close the process-wide sync session (call on shutdown)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
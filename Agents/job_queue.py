@@ -0,0 +1,306 @@
+"""
+Job Queue
+Persistent asynchronous scan jobs backed by a local SQLite store.
+
+Jobs are submitted and return an id immediately; an in-process worker pool runs them
+and records every progress event (same vocabulary as the WebSocket stream) so clients
+can poll status or replay the event log. Queued and interrupted jobs are re-queued on
+startup, so they survive a server reload.
+"""
+from config import Config
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Optional
+import json
+import queue
+import sqlite3
+import threading
+import traceback
+import uuid
+
+
+# Job lifecycle states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+TERMINAL_STATES = (COMPLETED, FAILED)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def make_event(log_type: str, message: str, data: dict = None) -> dict:
+    """A progress event entry (same shape as the WebSocket log messages)"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "type": log_type,
+        "message": message,
+        "data": data or {}
+    }
+
+
+class JobStore:
+    """SQLite-backed storage for jobs and their event logs"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.JOB_DB_PATH
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    input TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    progress TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    def create(self, user_input: str, options: dict) -> str:
+        """Insert a new queued job and return its id"""
+        job_id = f"job-{uuid.uuid4().hex[:12]}"
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, input, options, progress, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, user_input, json.dumps(options), json.dumps({}), _now())
+            )
+        return job_id
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[dict]:
+        """Get a job as a dictionary (None if unknown)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "options": json.loads(row["options"]),
+            "progress": json.loads(row["progress"]),
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"]
+        }
+        if include_result:
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def get_input(self, job_id: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT input FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row["input"] if row else None
+
+    def mark_running(self, job_id: str):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE job_id = ?",
+                (RUNNING, _now(), job_id)
+            )
+
+    def mark_completed(self, job_id: str, result: dict, event: dict = None):
+        """Store the result; the final event (if any) is written in the same transaction"""
+        with self._lock, self._connect() as conn:
+            if event is not None:
+                self._insert_event(conn, job_id, event)
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE job_id = ?",
+                (COMPLETED, json.dumps(result, default=str), _now(), job_id)
+            )
+
+    def mark_failed(self, job_id: str, error: str, event: dict = None):
+        """Store the error; the final event (if any) is written in the same transaction"""
+        with self._lock, self._connect() as conn:
+            if event is not None:
+                self._insert_event(conn, job_id, event)
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (FAILED, error, _now(), job_id)
+            )
+
+    def append_event(self, job_id: str, entry: dict) -> int:
+        """
+        Append a progress event and fold 'step' events into the job's progress.
+
+        Returns:
+            The event sequence number (1-based)
+        """
+        with self._lock, self._connect() as conn:
+            return self._insert_event(conn, job_id, entry)
+
+    @staticmethod
+    def _insert_event(conn, job_id: str, entry: dict) -> int:
+        """append_event inside an open transaction"""
+        row = conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) AS seq FROM job_events WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        seq = row["seq"] + 1
+        conn.execute(
+            "INSERT INTO job_events (job_id, seq, event) VALUES (?, ?, ?)",
+            (job_id, seq, json.dumps(entry, default=str))
+        )
+        if entry.get("type") == "step":
+            data = entry.get("data", {})
+            progress_row = conn.execute(
+                "SELECT progress FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            progress = json.loads(progress_row["progress"]) if progress_row else {}
+            progress[str(data.get("step"))] = {
+                "name": data.get("name"),
+                "status": data.get("status"),
+                "updated_at": entry.get("timestamp")
+            }
+            conn.execute(
+                "UPDATE jobs SET progress = ? WHERE job_id = ?",
+                (json.dumps(progress), job_id)
+            )
+        return seq
+
+    def get_events(self, job_id: str, after_seq: int = 0) -> list:
+        """Get (seq, event) pairs with seq greater than after_seq"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq)
+            ).fetchall()
+        return [(row["seq"], json.loads(row["event"])) for row in rows]
+
+    def reset_events(self, job_id: str):
+        """Drop events and progress of a job that is about to be re-run"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, started_at = NULL WHERE job_id = ?",
+                (QUEUED, json.dumps({}), job_id)
+            )
+
+    def unfinished_job_ids(self) -> list:
+        """Ids of queued or interrupted jobs, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def counts(self) -> dict:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class JobManager:
+    """
+    In-process worker pool that runs queued jobs.
+
+    The runner is called as runner(user_input, options, emit) and must return the
+    job result; emit(log_type, message, data) records a progress event.
+    """
+
+    def __init__(self, runner: Callable, store: JobStore = None, num_workers: int = None):
+        self.runner = runner
+        self.store = store or JobStore()
+        self.num_workers = max(1, num_workers or Config.JOB_WORKERS)
+        self._queue = queue.Queue()
+        self._workers = []
+        self._started = False
+
+    def start(self):
+        """Start workers and re-queue jobs left unfinished by a previous process"""
+        if self._started:
+            return
+        self._started = True
+
+        for job_id in self.store.unfinished_job_ids():
+            self.store.reset_events(job_id)
+            self._queue.put(job_id)
+
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        """Signal workers to exit after their current job"""
+        if not self._started:
+            return
+        for _ in self._workers:
+            self._queue.put(None)
+        self._workers = []
+        self._started = False
+
+    def submit(self, user_input: str, options: dict = None) -> str:
+        """Queue a new job and return its id"""
+        job_id = self.store.create(user_input, options or {})
+        self._queue.put(job_id)
+        return job_id
+
+    def _make_emitter(self, job_id: str):
+        def emit(log_type: str, message: str, data: dict = None):
+            self.store.append_event(job_id, make_event(log_type, message, data))
+        return emit
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            self._run_job(job_id)
+
+    def _run_job(self, job_id: str):
+        job = self.store.get(job_id, include_result=False)
+        if job is None or job["status"] in TERMINAL_STATES:
+            return
+
+        emit = self._make_emitter(job_id)
+        self.store.mark_running(job_id)
+        emit("info", "Job started", {"job_id": job_id})
+
+        try:
+            result = self.runner(self.store.get_input(job_id), job["options"], emit)
+            # The final event is committed with the status, so a stream that sees the
+            # job finished always finds its result (or error) event
+            self.store.mark_completed(job_id, result, make_event(
+                "result", "Analysis complete", {"job_id": job_id, "result": result}
+            ))
+        except Exception as e:
+            traceback.print_exc()
+            self.store.mark_failed(job_id, str(e), make_event("error", str(e), {"error": str(e)}))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.num_workers,
+            "queued_in_memory": self._queue.qsize(),
+            "jobs_by_status": self.store.counts()
+        }
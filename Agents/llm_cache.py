@@ -0,0 +1,120 @@
+"""
+LLM Response Cache
+Content-addressed cache of agent responses (opt-in).
+
+A response is keyed on everything that determines it at temperature 0: provider,
+model, temperature, a hash of the agent's system prompt, the tool schemas it can call
+and the input messages. Re-scanning the same article therefore replays cached answers
+instead of LLM calls. Agents register their system prompt and tools once at creation
+(register_agent); unregistered agents and agents with temperature > 0 bypass the
+cache. Only the final message and the schema-validated output are stored, which is all
+the agents read, and only for answers the calling agent could parse (see the validate
+argument of invoke_with_rate_limit_retry).
+"""
+from Agents.cache_utils import TwoTierCache, make_cache_key
+from config import Config
+from typing import Optional
+import hashlib
+import threading
+import weakref
+
+
+# Persistent LLM response cache (None when disabled)
+llm_response_cache = TwoTierCache(
+    Config.LLM_CACHE_PATH,
+    table="llm_responses",
+    memory_entries=Config.LLM_CACHE_MEMORY_ENTRIES,
+    max_entries=Config.LLM_CACHE_MAX_ENTRIES
+) if Config.LLM_CACHE_ENABLED else None
+
+# agent -> fingerprint of what, besides the input, shapes its responses
+_fingerprints = weakref.WeakKeyDictionary()
+
+_agent_counts = {}  # agent name -> {"hits", "misses", "stores", "bypassed"}
+_counts_lock = threading.Lock()
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _tool_schema(tool) -> dict:
+    return {
+        "name": getattr(tool, "name", getattr(tool, "__name__", str(tool))),
+        "description": getattr(tool, "description", None),
+        "args": getattr(tool, "args", None)
+    }
+
+
+def register_agent(agent, model, system_prompt: str, tools: list = None, response_schema=None):
+    """Record the model settings, system prompt, tools and response schema an agent was created with"""
+    _fingerprints[agent] = {
+        "provider": Config.get_model_provider(),
+        "model": getattr(model, "model", None) or getattr(model, "model_name", None) or Config.get_model(),
+        "temperature": getattr(model, "temperature", None),
+        "system_prompt": _hash(system_prompt),
+        "tools": make_cache_key([_tool_schema(t) for t in tools or []]),
+        "response_schema": make_cache_key(response_schema.model_json_schema()) if response_schema else None
+    }
+
+
+def _count(agent_name: str, counter: str):
+    with _counts_lock:
+        counts = _agent_counts.setdefault(agent_name, {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0})
+        counts[counter] += 1
+
+
+def response_cache_key(agent, agent_name: str, input_data: dict) -> Optional[str]:
+    """Cache key for this invocation, or None when it must not be cached"""
+    if llm_response_cache is None or not agent_name:
+        return None
+    try:
+        fingerprint = _fingerprints.get(agent)
+    except TypeError:
+        fingerprint = None
+    temperature = fingerprint.get("temperature") if fingerprint else None
+    if temperature is None:
+        temperature = Config.MODEL_TEMPERATURE
+    if fingerprint is None or temperature > 0:
+        _count(agent_name, "bypassed")
+        return None
+    return make_cache_key("llm", agent_name, fingerprint, temperature, input_data)
+
+
+def get_cached_response(key: str, agent_name: str) -> Optional[dict]:
+    """Cached agent response in the shape agents read ({"messages": [final message], "structured_response"})"""
+    entry = llm_response_cache.get(key)
+    if entry is None:
+        _count(agent_name, "misses")
+        return None
+    _count(agent_name, "hits")
+    from langchain_core.messages import AIMessage
+    response = {"messages": [AIMessage(content=entry["content"])], "cached": True}
+    if entry.get("structured") is not None:
+        response["structured_response"] = entry["structured"]
+    return response
+
+
+def store_response(key: str, agent_name: str, response):
+    """Cache the final message (and schema-validated output) of a fresh agent response"""
+    messages = response.get("messages") if isinstance(response, dict) else None
+    content = getattr(messages[-1], "content", None) if messages else None
+    structured = response.get("structured_response") if isinstance(response, dict) else None
+    if hasattr(structured, "model_dump"):
+        structured = structured.model_dump()
+    if not content and structured is None:
+        return  # Nothing worth replaying
+    llm_response_cache.set(key, {"content": content or "", "structured": structured},
+                           Config.get_llm_cache_ttl(agent_name))
+    _count(agent_name, "stores")
+
+
+def llm_cache_stats() -> Optional[dict]:
+    if llm_response_cache is None:
+        return None
+    with _counts_lock:
+        agents = {name: dict(counts) for name, counts in _agent_counts.items()}
+    for counts in agents.values():
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = f"{(counts['hits'] / lookups * 100):.1f}%" if lookups else "N/A"
+    return {"agents": agents, "cache": llm_response_cache.stats()}
@@ -10,16 +10,35 @@ from langchain_core.tools import tool
 from Agents.prompts import MEDIA_ANALYZER_PROMPT
 from Agents.search_utils import perplexity_search
 from Agents.rate_limit_utils import invoke_with_rate_limit_retry
-from Agents.model_factory import create_model
-import json
+from Agents.llm_cache import register_agent
+from Agents.model_factory import create_model, cacheable_system_prompt
+from Agents.structured_output import StructuredOutput, MediaAnalysis
+from config import Config
 import re
 
 
+# Textual references to specific media worth sending to the agent even without media URLs
+MEDIA_MENTION_PATTERN = re.compile(
+    r"\b(?:the|this|that|a|an|viral|leaked|new)\s+(?:video|photo|photograph|image|picture|footage|"
+    r"clip|recording|audio|screenshot|livestream)s?\s+(?:shows?|showed|showing|depicts?|depicting|"
+    r"appears?|reveals?|revealing|captured|captures|of|from|purport(?:s|ing)?)\b"
+    r"|\b(?:deepfakes?|doctored|photoshopped|manipulated\s+(?:video|photo|image)s?|"
+    r"ai[- ]generated\s+(?:video|photo|image|picture)s?|caught\s+on\s+(?:camera|video|tape))\b",
+    re.IGNORECASE
+)
+
+
+def mentions_media(text: str) -> bool:
+    """Whether the text talks about a specific photo, video or recording"""
+    return bool(MEDIA_MENTION_PATTERN.search(text or ""))
+
+
 class MediaAnalyzerAgent:
     """Agent that analyzes media for deepfakes and manipulation"""
     
     def __init__(self, model=None):
         self.model = model or create_model()
+        self.output = StructuredOutput(self.model, MediaAnalysis, "media_analyzer")
         self._setup_agent()
     
     def _setup_agent(self):
@@ -31,27 +50,52 @@ class MediaAnalyzerAgent:
         self.agent = create_agent(
             model=self.model,
             tools=[reverse_image_search],
-            system_prompt=MEDIA_ANALYZER_PROMPT
+            system_prompt=cacheable_system_prompt(MEDIA_ANALYZER_PROMPT, self.model),
+            response_format=self.output.response_format
         )
+        register_agent(self.agent, self.model, MEDIA_ANALYZER_PROMPT, [reverse_image_search],
+                       self.output.response_format)
     
-    def analyze(self, text: str, media_urls: list = None) -> dict:
-        """Analyze media in content"""
+    def analyze(self, text: str, media_urls: list = None, media_items: list = None) -> dict:
+        """
+        Analyze media in content.
+        
+        Args:
+            text: Content text
+            media_urls: Media URLs found in the text
+            media_items: Media parsed from the page HTML (url, type, width, height,
+                         alt), which replaces media_urls when given
+        """
+        if media_items:
+            media_urls = [item["url"] for item in media_items]
+        # Text-only content: nothing for the agent to look at, skip the LLM call
+        if not media_urls and not mentions_media(text):
+            return {
+                "assets": [],
+                "deepfake_probability_avg": 0.0
+            }
+        
+        # media_urls are extracted from the full text, so only the prose is capped
+        if len(text) > Config.ANALYSIS_CONTEXT_CHARS:
+            text = text[:Config.ANALYSIS_CONTEXT_CHARS] + "..."
         prompt = f"Analyze media in this content:\n\n{text}"
-        if media_urls:
+        if media_items:
+            prompt += "\n\nMedia found on the page:\n" + "\n".join(
+                f"- {item['type']}: {item['url']}"
+                + (f" ({item['width']}x{item['height']})" if item.get("width") and item.get("height") else "")
+                + (f" alt=\"{item['alt']}\"" if item.get("alt") else "")
+                for item in media_items
+            )
+        elif media_urls:
             prompt += f"\n\nMedia URLs found: {media_urls}"
         
         response = invoke_with_rate_limit_retry(self.agent, {
             "messages": [{"role": "user", "content": prompt}]
-        })
-        
-        content = response["messages"][-1].content if "messages" in response else str(response)
+        }, agent_name="media_analyzer", validate=self.output.is_valid)
         
-        try:
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                return json.loads(match.group())
-        except json.JSONDecodeError:
-            pass
+        result = self.output.parse(response)
+        if result is not None:
+            return result
         
         return {
             "assets": [],
@@ -4,8 +4,9 @@ Coordinates all subagents to produce comprehensive analysis.
 Uses parallel processing for claim verification.
 
 This is the main orchestrator that coordinates statement extraction, fact-checking,
-source analysis, bias detection, media analysis, and verdict synthesis. It uses
-ThreadPoolExecutor for parallel claim verification to improve performance.
+source analysis, bias detection, media analysis, and verdict synthesis. Stages run as
+a dependency graph (see stage_scheduler) and claims are verified in parallel with a
+ThreadPoolExecutor, all under one shared concurrency budget.
 """
 from Agents.statementExtractorAgent import StatementExtractorAgent
 from Agents.factCheckerAgent import FactCheckerAgent
@@ -14,15 +15,37 @@ from Agents.politicalBiasAgent import PoliticalBiasAgent
 from Agents.mediaAnalyzerAgent import MediaAnalyzerAgent
 from Agents.verdictSynthesizerAgent import VerdictSynthesizerAgent
 from Agents.neo4j_tools import Neo4jClient
+from Agents.neo4j_writer import Neo4jWriteQueue
+from Agents.publisher_store import PublisherStore
+from Agents.document_cache import DocumentCache, document_fingerprint
+from Agents.claim_cache import match_claim, store_claim, store_claims
 from Agents.model_factory import create_model
+from Agents.stage_scheduler import StageScheduler
+from Agents.content_fetcher import FetchedDocument
 from config import Config
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextvars
 import uuid
 from datetime import datetime, timezone
 import re
 import threading
 
 
+# Pipeline step names, shared with the progress events sent to clients
+PIPELINE_STEPS = [
+    "Extracting factual statements",
+    "Fact-checking claims",
+    "Analyzing source reputation",
+    "Analyzing political bias",
+    "Analyzing media content",
+    "Synthesizing final verdict"
+]
+
+
+def _no_event(log_type: str, message: str, data: dict = None):
+    """Default progress callback that discards events"""
+
+
 class MisinformationDetector:
     """
     Main orchestrator for misinformation detection.
@@ -32,9 +55,13 @@ class MisinformationDetector:
     
     VERSION = "v3.1.0"
     
-    def __init__(self, store_in_neo4j: bool = True):
+    def __init__(self, store_in_neo4j: bool = True, neo4j_client: Neo4jClient = None,
+                 max_parallel_claims: int = None, neo4j_writer: Neo4jWriteQueue = None,
+                 publisher_store: PublisherStore = None, document_cache: DocumentCache = None):
         self.model = create_model()
-        self.MAX_PARALLEL_CLAIMS = Config.MAX_PARALLEL_CLAIMS  # Max concurrent claim checks from config
+        self.MAX_PARALLEL_CLAIMS = max_parallel_claims or Config.MAX_PARALLEL_CLAIMS  # Max concurrent claim checks (defaults to config)
+        self.MAX_CONCURRENT_STAGES = Config.MAX_CONCURRENT_STAGES  # Shared LLM budget across all stages
+        self.FACT_CHECK_BATCH_SIZE = max(1, Config.FACT_CHECK_BATCH_SIZE)  # Claims per fact-checker run (1 = one run per claim)
         
         # Initialize all subagents
         self.statement_extractor = StatementExtractorAgent(model=self.model)
@@ -44,9 +71,25 @@ class MisinformationDetector:
         self.media_analyzer = MediaAnalyzerAgent(model=self.model)
         self.verdict_synthesizer = VerdictSynthesizerAgent(model=self.model)
         
-        # Neo4j storage
+        # Neo4j storage (write-behind, so scans never wait on the graph)
         self.store_in_neo4j = store_in_neo4j
-        self.neo4j_client = Neo4jClient() if store_in_neo4j else None
+        # A client or writer passed in is shared (e.g. the server's process-wide one) and not closed here
+        if neo4j_writer is not None:
+            neo4j_client = neo4j_writer.client
+        self._owns_neo4j_client = neo4j_client is None
+        self._owns_neo4j_writer = neo4j_writer is None
+        if store_in_neo4j:
+            self.neo4j_client = neo4j_client or Neo4jClient()
+            self.neo4j_writer = neo4j_writer or Neo4jWriteQueue(self.neo4j_client)
+        else:
+            self.neo4j_client = None
+            self.neo4j_writer = None
+        
+        # Publisher ratings reused across scans (local cache, then shared Neo4j nodes)
+        self.publisher_store = publisher_store or PublisherStore(self.neo4j_client)
+        
+        # Whole-scan reports reused for repeat submissions of the same content
+        self.document_cache = document_cache or DocumentCache(self.neo4j_client)
         
         # Thread-safe print lock
         self._print_lock = threading.Lock()
@@ -70,13 +113,75 @@ class MisinformationDetector:
         match = re.search(r'https?://(?:www\.)?([^/]+)', url)
         return match.group(1) if match else "Unknown Source"
     
-    def _check_single_claim(self, statement: str, claim_id: str) -> dict:
+    def _check_single_claim(self, statement: str, claim_id: str, budget=None, emit=None,
+                            seed: dict = None) -> dict:
         """Check a single claim (used by parallel executor)"""
-        with self._print_lock:
-            print(f"  🔄 Starting {claim_id}...")
+        emit = emit or _no_event
+        self._announce_claim(statement, claim_id, emit)
+        return self._fact_check_claim(statement, claim_id, budget, emit, seed)
+    
+    def _check_claim_batch(self, claims: list, budget=None, emit=None) -> dict:
+        """
+        Check several claims in one fact-checker run (used by parallel executor).
+        
+        Claims the batch run doesn't answer with a valid verdict fall back to
+        individual checks.
+        
+        Returns:
+            Results by claim ID
+        """
+        emit = emit or _no_event
+        if len(claims) == 1:
+            statement, claim_id, seed = claims[0]
+            return {claim_id: self._check_single_claim(statement, claim_id, budget, emit, seed)}
         
-        result = self.fact_checker.check(statement, claim_id)
+        for statement, claim_id, _ in claims:
+            self._announce_claim(statement, claim_id, emit)
+        try:
+            if budget is not None:
+                with budget():
+                    answered = self.fact_checker.check_batch(claims)
+            else:
+                answered = self.fact_checker.check_batch(claims)
+        except Exception as e:
+            with self._print_lock:
+                print(f"  ⚠️ Batch fact-check failed, checking {len(claims)} claims individually: {e}")
+            answered = {}
         
+        results = {}
+        store_claims([(statement, answered[claim_id]) for statement, claim_id, _ in claims
+                      if claim_id in answered])
+        for statement, claim_id, seed in claims:
+            result = answered.get(claim_id)
+            if result is None:
+                results[claim_id] = self._fact_check_claim(statement, claim_id, budget, emit, seed)
+                continue
+            self._report_claim(result, statement, claim_id, emit)
+            results[claim_id] = result
+        return results
+    
+    def _announce_claim(self, statement: str, claim_id: str, emit):
+        with self._print_lock:
+            print(f"  🔄 Starting {claim_id}...")
+        emit("claim_start", f"Checking {claim_id}...", {
+            "id": claim_id,
+            "text": statement[:100] + "..." if len(statement) > 100 else statement
+        })
+    
+    def _fact_check_claim(self, statement: str, claim_id: str, budget, emit, seed: dict = None) -> dict:
+        """Run, store and report the per-claim fact-check"""
+        if budget is not None:
+            with budget():
+                result = self.fact_checker.check(statement, claim_id, seed)
+        else:
+            result = self.fact_checker.check(statement, claim_id, seed)
+        store_claim(statement, result)
+        
+        self._report_claim(result, statement, claim_id, emit)
+        return result
+    
+    def _report_claim(self, result: dict, statement: str, claim_id: str, emit):
+        """Print and emit a finished claim"""
         with self._print_lock:
             status = result.get('status', 'UNKNOWN')
             status_emoji = {
@@ -86,16 +191,26 @@ class MisinformationDetector:
                 'MISSING_CONTEXT': '📝',
                 'UNVERIFIABLE': '❓'
             }.get(status, '❓')
-            print(f"  {status_emoji} {claim_id}: {status}")
-        
-        return result
+            cached = " (cached verdict)" if result.get("cached") else ""
+            print(f"  {status_emoji} {claim_id}: {status}{cached}")
+        emit("claim", f"{claim_id}: {status}", {
+            "id": result.get("id", claim_id),
+            "text": result.get("text", statement),
+            "status": status,
+            "confidence": result.get("confidence", 0.5),
+            "note": result.get("note"),
+            "cached": result.get("cached", False)
+        })
     
-    def _parallel_fact_check(self, statements: list) -> list:
+    def _parallel_fact_check(self, statements: list, budget=None, emit=None) -> list:
         """
         Fact-check multiple statements in parallel.
         
         Args:
             statements: List of statement strings
+            budget: Optional context manager factory limiting concurrent LLM work
+                    (shared with the other pipeline stages)
+            emit: Optional progress callback (see analyze)
             
         Returns:
             List of fact-check results (ordered by claim ID)
@@ -111,95 +226,214 @@ class MisinformationDetector:
         
         results = {}
         
+        # Reuse verdicts of identical or near-duplicate claims checked in earlier scans
+        to_check = []
+        for stmt, cid in claims_data:
+            cached, seed = match_claim(stmt, cid)
+            if cached is not None:
+                results[cid] = cached
+                self._report_claim(cached, stmt, cid, emit or _no_event)
+            else:
+                to_check.append((stmt, cid, seed))
+        
+        # Group claims per fact-checker run (groups of one unless batch mode is on)
+        size = self.FACT_CHECK_BATCH_SIZE
+        groups = [to_check[i:i + size] for i in range(0, len(to_check), size)]
+        
         # Use ThreadPoolExecutor for parallel execution
         with ThreadPoolExecutor(max_workers=self.MAX_PARALLEL_CLAIMS) as executor:
             # Submit all tasks
-            future_to_claim = {
-                executor.submit(self._check_single_claim, stmt, cid): cid
-                for stmt, cid in claims_data
+            future_to_group = {
+                executor.submit(contextvars.copy_context().run, self._check_claim_batch, group, budget, emit): group
+                for group in groups
             }
             
             # Collect results as they complete
-            for future in as_completed(future_to_claim):
-                claim_id = future_to_claim[future]
+            for future in as_completed(future_to_group):
                 try:
-                    result = future.result()
-                    results[claim_id] = result
+                    results.update(future.result())
                 except Exception as e:
-                    with self._print_lock:
-                        print(f"  ❌ {claim_id}: Error - {str(e)}")
-                    results[claim_id] = {
-                        "id": claim_id,
-                        "text": "",
-                        "status": "UNVERIFIABLE",
-                        "confidence": 0,
-                        "note": f"Error during verification: {str(e)}"
-                    }
+                    for _, claim_id, _ in future_to_group[future]:
+                        with self._print_lock:
+                            print(f"  ❌ {claim_id}: Error - {str(e)}")
+                        results[claim_id] = {
+                            "id": claim_id,
+                            "text": "",
+                            "status": "UNVERIFIABLE",
+                            "confidence": 0,
+                            "note": f"Error during verification: {str(e)}",
+                            "fallback": True
+                        }
         
         # Return results in order
         return [results[f"CLAIM_A{i}"] for i in range(1, len(statements) + 1)]
+    
+    def _log(self, *lines):
+        """Print a block of lines atomically (stages run concurrently)"""
+        with self._print_lock:
+            for line in lines:
+                print(line)
+    
+    @staticmethod
+    def _emit_step(emit, step: int, status: str = "running"):
+        """Emit a step progress event (same shape as the WebSocket 'step' event)"""
+        name = PIPELINE_STEPS[step - 1]
+        emit("step", f"[{step}/{len(PIPELINE_STEPS)}] {name}", {
+            "step": step,
+            "total": len(PIPELINE_STEPS),
+            "name": name,
+            "status": status
+        })
+    
+    def _build_scheduler(self, text: str, publisher: str, emit=None,
+                         document: FetchedDocument = None) -> StageScheduler:
+        """
+        Build the stage dependency graph for one scan.
+        
+        Source, bias and media analysis only need the input, so they run
+        alongside extraction and fact-checking. Only the verdict waits for all.
+        Media comes from the fetched document when there is one, and is only
+        searched for in the text for pasted input.
+        """
+        emit = emit or _no_event
+        scheduler = StageScheduler(self.MAX_CONCURRENT_STAGES)
+        
+        def extract():
+            self._log("\n[1/6] Extracting factual statements...")
+            self._emit_step(emit, 1)
+            statements = self.statement_extractor.extract(text, Config.MAX_CLAIMS_TO_CHECK, budget=scheduler.budget)
+            self._log(f"  → Found {len(statements)} statements" if statements else "  → No checkable claims found")
+            emit("info", f"Found {len(statements)} statements", {"statements": statements})
+            self._emit_step(emit, 1, "complete")
+            return statements
+        
+        def fact_check(extract):
+            self._log("\n[2/6] Fact-checking claims (parallel)...")
+            self._emit_step(emit, 2)
+            claims_results = self._parallel_fact_check(extract, budget=scheduler.budget, emit=emit)
+            self._log(f"  → Completed {len(claims_results)} claim checks")
+            self._emit_step(emit, 2, "complete")
+            return claims_results
+        
+        def source():
+            self._log("\n[3/6] Analyzing source reputation...")
+            self._emit_step(emit, 3)
+            source_data = self.publisher_store.get_or_analyze(publisher, self.source_analyzer.analyze)
+            rating_text = source_data.get('credibility_score', {}).get('rating_text', 'Unknown')
+            self._log(
+                f"  → Publisher: {source_data.get('publisher_name', 'Unknown')}",
+                f"  → Credibility: {rating_text}"
+                + (f" (stored rating, {source_data['cache_source']})" if source_data.get("cached") else "")
+            )
+            emit("source", f"Source credibility: {rating_text}", source_data)
+            self._emit_step(emit, 3, "complete")
+            return source_data
+        
+        def bias():
+            self._log("\n[4/6] Analyzing political bias...")
+            self._emit_step(emit, 4)
+            bias_data = self.political_bias_analyzer.analyze(text)
+            self._log(f"  → Rating: {bias_data.get('rating', 'Unknown')}")
+            emit("bias", f"Political bias: {bias_data.get('rating', 'Unknown')}", bias_data)
+            self._emit_step(emit, 4, "complete")
+            return bias_data
+        
+        def media():
+            self._log("\n[5/6] Analyzing media content...")
+            self._emit_step(emit, 5)
+            if document is not None:
+                media_data = self.media_analyzer.analyze(text, media_items=document.media)
+            else:
+                media_urls = self.media_analyzer.extract_media_urls(text)
+                media_data = self.media_analyzer.analyze(text, media_urls)
+            deepfake_prob = media_data.get('deepfake_probability_avg', 0)
+            try:
+                deepfake_prob = float(deepfake_prob) if deepfake_prob else 0.0
+                deepfake_msg = f"Deepfake probability: {deepfake_prob:.1%}"
+            except (ValueError, TypeError):
+                deepfake_msg = f"Deepfake probability: {deepfake_prob}"
+            self._log(f"  → Found {len(media_data.get('assets', []))} media assets", f"  → {deepfake_msg}")
+            emit("media", deepfake_msg, media_data)
+            self._emit_step(emit, 5, "complete")
+            return media_data
+        
+        def verdict(fact_check, source, bias, media):
+            self._log("\n[6/6] Synthesizing final verdict...")
+            self._emit_step(emit, 6)
+            verdict_data = self.verdict_synthesizer.synthesize(fact_check, source, bias, media)
+            self._log(
+                f"  → Status: {verdict_data.get('status', 'UNKNOWN')}",
+                f"  → Score: {verdict_data.get('overall_score', 0)}/100"
+            )
+            emit("verdict", f"Verdict: {verdict_data.get('status', 'UNKNOWN')} - Score: {verdict_data.get('overall_score', 0)}/100", verdict_data)
+            self._emit_step(emit, 6, "complete")
+            return verdict_data
+        
+        # Coordinator only: each extraction chunk acquires the shared budget itself
+        scheduler.add("extract", extract, uses_budget=False)
+        # Coordinator only: each claim check acquires the shared budget itself
+        scheduler.add("fact_check", fact_check, deps=["extract"], uses_budget=False)
+        scheduler.add("source", source)
+        scheduler.add("bias", bias)
+        scheduler.add("media", media)
+        scheduler.add("verdict", verdict, deps=["fact_check", "source", "bias", "media"])
+        return scheduler
 
-    def analyze(self, text: str, url: str = None) -> dict:
+    def analyze(self, text: str, url: str = None, on_event=None,
+                document: FetchedDocument = None, force_refresh: bool = False) -> dict:
         """
         Main analysis function - orchestrates the full pipeline.
         
+        Stages run as a dependency graph: source, bias and media analysis
+        overlap with statement extraction and claim fact-checking, and the
+        verdict is synthesized once all of them are done.
+        
         Args:
             text: The article/paragraph to analyze
             url: Optional URL of the source
+            on_event: Optional callback(log_type, message, data) receiving progress
+                      events in the WebSocket vocabulary (step, claim_start, claim,
+                      source, bias, media, verdict, info). Called from worker threads.
+            document: Optional fetched page the text came from; its source URL,
+                      publisher, publish date and media are used instead of
+                      re-deriving them from the text
+            force_refresh: Run the full pipeline even when the same content was
+                           scanned at the same URL inside the document cache window
             
         Returns:
-            Complete analysis in schema format
+            Complete analysis in schema format (an earlier scan's report, flagged
+            meta.cached, when the document cache has one)
         """
         start_time = datetime.now(timezone.utc)
         scan_id = self._generate_scan_id()
-        source_url = url or self._extract_url(text) or "direct-input"
+        if document is not None:
+            source_url = document.source_url
+        else:
+            source_url = url or self._extract_url(text) or "direct-input"
+        publisher = self._extract_publisher(source_url)
+        fingerprint = document_fingerprint(text)
+        
+        if force_refresh:
+            self.document_cache.skip()
+        else:
+            cached = self.document_cache.lookup(fingerprint, source_url)
+            if cached is not None:
+                report = cached[0]
+                print(f"\n[Cache] Reusing scan {report['meta']['scan_id']} from {report['meta']['cached_at']}")
+                if on_event:
+                    on_event("info", f"Reusing earlier scan {report['meta']['scan_id']}", report["meta"])
+                return report
         
         print("\n" + "=" * 60)
         print("MISINFORMATION DETECTION ANALYSIS")
         print(f"Scan ID: {scan_id}")
         print("=" * 60)
         
-        # Step 1: Extract statements
-        print("\n[1/6] Extracting factual statements...")
-        statements = self.statement_extractor.extract(text)
-        print(f"  → Found {len(statements)} statements")
-        
-        # Step 2: Fact-check each statement IN PARALLEL
-        print("\n[2/6] Fact-checking claims (parallel)...")
-        claims_results = self._parallel_fact_check(statements)
-        print(f"  → Completed {len(claims_results)} claim checks")
-        
-        # Step 3: Analyze source reputation
-        print("\n[3/6] Analyzing source reputation...")
-        publisher = self._extract_publisher(source_url)
-        source_data = self.source_analyzer.analyze(publisher)
-        print(f"  → Publisher: {source_data.get('publisher_name', 'Unknown')}")
-        print(f"  → Credibility: {source_data.get('credibility_score', {}).get('rating_text', 'Unknown')}")
-        
-        # Step 4: Analyze political bias
-        print("\n[4/6] Analyzing political bias...")
-        bias_data = self.political_bias_analyzer.analyze(text)
-        print(f"  → Rating: {bias_data.get('rating', 'Unknown')}")
-        
-        # Step 5: Analyze media
-        print("\n[5/6] Analyzing media content...")
-        media_urls = self.media_analyzer.extract_media_urls(text)
-        media_data = self.media_analyzer.analyze(text, media_urls)
-        print(f"  → Found {len(media_data.get('assets', []))} media assets")
-        deepfake_prob = media_data.get('deepfake_probability_avg', 0)
-        try:
-            deepfake_prob = float(deepfake_prob) if deepfake_prob else 0.0
-            print(f"  → Deepfake probability: {deepfake_prob:.1%}")
-        except (ValueError, TypeError):
-            print(f"  → Deepfake probability: {deepfake_prob}")
+        if on_event:
+            on_event("info", f"Scan ID: {scan_id}", {"scan_id": scan_id, "source_url": source_url})
         
-        # Step 6: Synthesize final verdict
-        print("\n[6/6] Synthesizing final verdict...")
-        verdict = self.verdict_synthesizer.synthesize(
-            claims_results, source_data, bias_data, media_data
-        )
-        print(f"  → Status: {verdict.get('status', 'UNKNOWN')}")
-        print(f"  → Score: {verdict.get('overall_score', 0)}/100")
+        scheduler = self._build_scheduler(text, publisher, on_event, document)
+        results = scheduler.run()
         
         # Calculate scan duration
         end_time = datetime.now(timezone.utc)
@@ -210,21 +444,21 @@ class MisinformationDetector:
             scan_id=scan_id,
             url=source_url,
             duration_ms=duration_ms,
-            verdict=verdict,
-            claims=claims_results,
-            source=source_data,
-            bias=bias_data,
-            media=media_data
+            verdict=results["verdict"],
+            claims=results["fact_check"],
+            source=results["source"],
+            bias=results["bias"],
+            media=results["media"],
+            stage_timings=scheduler.timings,
+            document=document,
+            fingerprint=fingerprint
         )
+        self.document_cache.save(report)
         
-        # Store in Neo4j
-        if self.store_in_neo4j and self.neo4j_client:
-            print("\n[Neo4j] Storing analysis in graph database...")
-            try:
-                self.neo4j_client.store_full_analysis(report)
-                print("  → Stored successfully")
-            except Exception as e:
-                print(f"  → Storage error: {e}")
+        # Queue for Neo4j storage (written in the background)
+        if self.store_in_neo4j and self.neo4j_writer:
+            outcome = self.neo4j_writer.enqueue(report)
+            print(f"\n[Neo4j] Analysis {outcome} for background storage")
         
         # Print summary
         self._print_summary(report)
@@ -233,7 +467,8 @@ class MisinformationDetector:
 
     def _build_report(self, scan_id: str, url: str, duration_ms: int,
                       verdict: dict, claims: list, source: dict,
-                      bias: dict, media: dict) -> dict:
+                      bias: dict, media: dict, stage_timings: dict = None,
+                      document: FetchedDocument = None, fingerprint: str = None) -> dict:
         """Build the full report in schema format"""
         
         # Build cross-references between claims and media
@@ -254,7 +489,12 @@ class MisinformationDetector:
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "url_scanned": url,
                 "agent_version": self.VERSION,
-                "scan_duration_ms": duration_ms
+                "scan_duration_ms": duration_ms,
+                "stage_timings": stage_timings or {},
+                "publisher": document.publisher if document else None,
+                "published_at": document.published_at if document else None,
+                "content_fingerprint": fingerprint,
+                "cached": False
             },
             "final_verdict": {
                 "status": verdict.get("status", "UNKNOWN"),
@@ -275,7 +515,11 @@ class MisinformationDetector:
                     "domain_rating_score": source.get("domain_rating_score", 50),
                     "trust_history_flags": source.get("trust_history_flags", 0),
                     "ownership_structure": source.get("ownership_structure", "Unknown"),
-                    "bias_source": source.get("bias_source")
+                    "bias_source": source.get("bias_source"),
+                    "domain": source.get("domain"),
+                    "rated_at": source.get("rated_at"),
+                    "cached": source.get("cached", False),
+                    "fallback": source.get("fallback", False)
                 },
                 "political_bias": {
                     "rating": bias.get("rating", "Center"),
@@ -294,7 +538,10 @@ class MisinformationDetector:
                         "confidence": c.get("confidence", 0.5),
                         "verification_source": c.get("verification_source"),
                         "note": c.get("note"),
-                        "supported_by_media_id": c.get("supported_by_media_id")
+                        "supported_by_media_id": c.get("supported_by_media_id"),
+                        "cached": c.get("cached", False),
+                        "checked_at": c.get("checked_at"),
+                        "cache_match": c.get("cache_match")
                     }
                     for c in claims
                 ]
@@ -380,5 +627,7 @@ class MisinformationDetector:
     
     def close(self):
         """Clean up resources"""
-        if self.neo4j_client:
+        if self.neo4j_writer and self._owns_neo4j_writer:
+            self.neo4j_writer.close()
+        if self.neo4j_client and self._owns_neo4j_client:
             self.neo4j_client.close()
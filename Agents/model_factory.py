@@ -4,7 +4,10 @@ Creates the appropriate LLM model based on configuration.
 
 This factory supports multiple LLM providers (OpenAI, Anthropic, Google, Ollama)
 and automatically selects the appropriate model based on available API keys.
+Hosted models get the provider's rate limit callback, so every request they make
+is paced by the shared per-provider budget.
 """
+from Agents.rate_limiter import rate_limit_callbacks
 from config import Config
 
 
@@ -29,6 +32,7 @@ def create_model(temperature: float = None):
     provider = Config.get_model_provider()
     model_name = Config.get_model()
     temp = temperature if temperature is not None else Config.MODEL_TEMPERATURE
+    callbacks = rate_limit_callbacks(provider)
     
     if provider == "openai":
         from langchain_openai import ChatOpenAI
@@ -39,7 +43,9 @@ def create_model(temperature: float = None):
         return ChatOpenAI(
             model=model_name,
             temperature=temp,
-            api_key=Config.OPENAI_API_KEY
+            api_key=Config.OPENAI_API_KEY,
+            callbacks=callbacks,
+            include_response_headers=bool(callbacks)  # Rate limit headers teach the limiter
         )
     
     elif provider == "anthropic":
@@ -51,7 +57,8 @@ def create_model(temperature: float = None):
         return ChatAnthropic(
             model=model_name,
             temperature=temp,
-            api_key=Config.ANTHROPIC_API_KEY
+            api_key=Config.ANTHROPIC_API_KEY,
+            callbacks=callbacks
         )
     
     elif provider == "google":
@@ -63,7 +70,8 @@ def create_model(temperature: float = None):
         return ChatGoogleGenerativeAI(
             model=model_name,
             temperature=temp,
-            google_api_key=Config.GOOGLE_API_KEY
+            google_api_key=Config.GOOGLE_API_KEY,
+            callbacks=callbacks
         )
     
     elif provider == "ollama":
@@ -79,6 +87,41 @@ def create_model(temperature: float = None):
         raise ValueError(f"Unsupported model provider: {provider}")
 
 
+def supports_prompt_caching(model=None) -> bool:
+    """True when system prompts for this model (default: the configured provider) take cache breakpoints"""
+    if not Config.PROMPT_CACHING_ENABLED:
+        return False
+    if model is not None:
+        return type(model).__module__.startswith("langchain_anthropic")
+    return Config.get_model_provider() == "anthropic"
+
+
+def cacheable_system_prompt(prompt: str, model=None):
+    """
+    Wrap a static system prompt so the provider can cache it across calls.
+    
+    For Anthropic the prompt becomes a SystemMessage whose text block carries a
+    cache_control breakpoint; tool definitions precede the system prompt in the
+    request, so they are cached with it. Other providers get the plain string
+    (OpenAI and Gemini cache long prompt prefixes automatically).
+    
+    Args:
+        prompt: The agent's system prompt
+        model: The model the agent runs on (optional; defaults to the configured provider)
+        
+    Returns:
+        A SystemMessage with a cache breakpoint, or the prompt unchanged
+    """
+    if not supports_prompt_caching(model):
+        return prompt
+    from langchain_core.messages import SystemMessage
+    
+    cache_control = {"type": "ephemeral"}
+    if Config.PROMPT_CACHE_TTL != "5m":
+        cache_control["ttl"] = Config.PROMPT_CACHE_TTL
+    return SystemMessage(content=[{"type": "text", "text": prompt, "cache_control": cache_control}])
+
+
 def get_model_info() -> dict:
     """Get information about the configured model"""
     return {
@@ -4,7 +4,10 @@ Neo4j database tools for misinformation analysis storage
 This module provides a client for storing misinformation analysis results in a Neo4j graph database,
 creating nodes for scans, verdicts, claims, sources, and media assets with their relationships.
 """
+import json
 import os
+import threading
+import time
 from typing import Optional, Dict, Any, List
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
@@ -15,25 +18,217 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
 NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+NEO4J_BOOTSTRAP_SCHEMA = os.getenv("NEO4J_BOOTSTRAP_SCHEMA", "true").lower() == "true"
+# Keep each scan's full report on its Scan node so the document cache can reuse it
+NEO4J_STORE_REPORTS = os.getenv("DOCUMENT_CACHE_NEO4J", "false").lower() == "true"
+
+# Idempotent schema migrations applied at client startup (constraints back their own index)
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT scan_id_unique IF NOT EXISTS FOR (s:Scan) REQUIRE s.scan_id IS UNIQUE",
+    "CREATE INDEX scan_timestamp IF NOT EXISTS FOR (s:Scan) ON (s.timestamp)",
+    "CREATE INDEX scan_content_fingerprint IF NOT EXISTS FOR (s:Scan) ON (s.content_fingerprint)",
+    "CREATE INDEX claim_id IF NOT EXISTS FOR (c:Claim) ON (c.claim_id)",
+    "CREATE INDEX media_asset_id IF NOT EXISTS FOR (a:MediaAsset) ON (a.asset_id)",
+    "CREATE INDEX source_publisher_name IF NOT EXISTS FOR (sr:SourceReputation) ON (sr.publisher_name)",
+    "CREATE CONSTRAINT publisher_domain_unique IF NOT EXISTS FOR (p:Publisher) REQUIRE p.domain IS UNIQUE"
+]
 
 
 class Neo4jClient:
     """Neo4j client for misinformation analysis storage"""
     
-    def __init__(self):
+    def __init__(self, bootstrap_schema: bool = None, store_reports: bool = None):
         self.driver = GraphDatabase.driver(
             NEO4J_URI, 
             auth=(NEO4J_USERNAME, NEO4J_PASSWORD)
         )
+        self.bootstrap_schema = NEO4J_BOOTSTRAP_SCHEMA if bootstrap_schema is None else bootstrap_schema
+        self.store_reports = NEO4J_STORE_REPORTS if store_reports is None else store_reports
+        self.schema_ready = False
+        self._schema_lock = threading.Lock()
+        if self.bootstrap_schema:
+            self.ensure_schema()
     
     def close(self):
         self.driver.close()
     
+    def ensure_schema(self) -> bool:
+        """
+        Create the constraints and indexes used by hot lookups (idempotent).
+        
+        Failures (e.g. database unreachable) are logged rather than raised; the
+        migration is retried before the next write.
+        
+        Returns:
+            True if the schema is in place
+        """
+        with self._schema_lock:
+            if self.schema_ready:
+                return True
+            try:
+                with self.driver.session(database=NEO4J_DATABASE) as session:
+                    for statement in SCHEMA_STATEMENTS:
+                        session.run(statement).consume()
+                self.schema_ready = True
+            except Exception as e:
+                print(f"  ⚠️ Neo4j schema bootstrap failed: {e}")
+                return False
+        
+        pending = [i["name"] for i in self.index_status() if i["state"] != "ONLINE"]
+        if pending:
+            print(f"  ⚠️ Neo4j indexes not yet online: {', '.join(pending)}")
+        return True
+    
+    @property
+    def available(self) -> bool:
+        """False while the schema bootstrap is failing (i.e. the database looks unreachable)"""
+        return self.schema_ready or not self.bootstrap_schema
+    
+    def index_status(self) -> List[Dict]:
+        """Current state of every index (name, labels, properties, state, population %)"""
+        query = """
+        SHOW INDEXES
+        YIELD name, type, labelsOrTypes, properties, state, populationPercent, owningConstraint
+        RETURN name, type, labelsOrTypes AS labels, properties, state,
+               populationPercent AS population_percent, owningConstraint AS constraint
+        ORDER BY name
+        """
+        return self._run_query(query)
+    
     def _run_query(self, query: str, **params) -> List[Dict]:
         with self.driver.session(database=NEO4J_DATABASE) as session:
             result = session.run(query, **params)
             return [dict(record) for record in result]
     
+    # Node property builders (shared by the per-node and batched write paths)
+    
+    @staticmethod
+    def _scan_props(meta: Dict) -> Dict:
+        return {
+            "scan_id": meta.get("scan_id"),
+            "timestamp": meta.get("timestamp"),
+            "url_scanned": meta.get("url_scanned"),
+            "agent_version": meta.get("agent_version"),
+            "scan_duration_ms": meta.get("scan_duration_ms"),
+            "publisher": meta.get("publisher"),
+            "published_at": meta.get("published_at"),
+            "content_fingerprint": meta.get("content_fingerprint")
+        }
+    
+    @staticmethod
+    def _verdict_props(verdict: Dict) -> Dict:
+        return {
+            "status": verdict.get("status"),
+            "label": verdict.get("label"),
+            "overall_score": verdict.get("overall_score"),
+            "confidence_score": verdict.get("confidence_score"),
+            "summary_statement": verdict.get("summary_statement")
+        }
+    
+    @staticmethod
+    def _factor_props(factor: Dict) -> Dict:
+        return {
+            "module": factor.get("module"),
+            "severity": factor.get("severity"),
+            "message": factor.get("message"),
+            "details_link": factor.get("details_link")
+        }
+    
+    @staticmethod
+    def _content_props(content_data: Dict) -> Dict:
+        cred = content_data.get("credibility_score", {})
+        return {
+            "credibility_score": cred.get("value", 0),
+            "credibility_rating": cred.get("rating_text", "Unknown"),
+            "credibility_color": cred.get("color_code", "#888888")
+        }
+    
+    @staticmethod
+    def _source_props(source_data: Dict) -> Dict:
+        return {
+            "publisher_name": source_data.get("publisher_name"),
+            "domain_rating_score": source_data.get("domain_rating_score"),
+            "trust_history_flags": source_data.get("trust_history_flags"),
+            "ownership_structure": source_data.get("ownership_structure"),
+            "bias_source": source_data.get("bias_source")
+        }
+    
+    @classmethod
+    def _publisher_props(cls, content_data: Dict) -> Dict:
+        """Shared Publisher node update; only fresh (non-cached, non-fallback) ratings overwrite it"""
+        source = content_data.get("source_reputation", {})
+        reputation = {
+            **cls._source_props(source),
+            "credibility_score": content_data.get("credibility_score")
+        }
+        fresh = not source.get("cached", False) and not source.get("fallback", False) \
+            and source.get("rated_at") is not None
+        return {
+            "domain": source.get("domain"),
+            "fresh": fresh,
+            "props": {
+                "name": source.get("publisher_name"),
+                "domain_rating_score": source.get("domain_rating_score"),
+                "trust_history_flags": source.get("trust_history_flags"),
+                "reputation_json": json.dumps(reputation, default=str),
+                "rated_at": source.get("rated_at")
+            }
+        }
+    
+    @staticmethod
+    def _bias_props(bias_data: Dict) -> Dict:
+        dist = bias_data.get("score_distribution", [])
+        return {
+            "rating": bias_data.get("rating", "Unknown"),
+            "confidence": bias_data.get("confidence", 0),
+            "left_score": next((d["value"] for d in dist if d["label"] == "Left"), 0),
+            "center_score": next((d["value"] for d in dist if d["label"] == "Center"), 0),
+            "right_score": next((d["value"] for d in dist if "Right" in d["label"]), 0)
+        }
+    
+    @staticmethod
+    def _claim_props(claim: Dict) -> Dict:
+        vs = claim.get("verification_source") or {}
+        return {
+            "claim_id": claim.get("id"),
+            "text": claim.get("text"),
+            "status": claim.get("status"),
+            "confidence": claim.get("confidence", 0),
+            "verification_source_name": vs.get("name"),
+            "verification_source_url": vs.get("url"),
+            "note": claim.get("note"),
+            "supported_by_media_id": claim.get("supported_by_media_id")
+        }
+    
+    @staticmethod
+    def _media_props(media_data: Dict) -> Dict:
+        return {"deepfake_probability_avg": media_data.get("deepfake_probability_avg", 0)}
+    
+    @staticmethod
+    def _asset_props(asset: Dict) -> Dict:
+        forensics = asset.get("forensics") or {}
+        return {
+            "asset_id": asset.get("id"),
+            "type": asset.get("type"),
+            "url": asset.get("url"),
+            "ai_probability": asset.get("ai_probability", 0),
+            "is_deepfake": asset.get("is_deepfake", False),
+            "artifact_flag": forensics.get("artifact_flag"),
+            "audio_sync_status": forensics.get("audio_sync_status"),
+            "reverse_search_matches": forensics.get("reverse_search_matches", 0),
+            "metadata_signature": forensics.get("metadata_signature"),
+            "copy_paste_detection": forensics.get("copy_paste_detection", False)
+        }
+    
+    @staticmethod
+    def _xref_props(xref: Dict) -> Dict:
+        return {
+            "primary_id": xref.get("primary_element_id"),
+            "secondary_id": xref.get("secondary_element_id"),
+            "type": xref.get("type"),
+            "description": xref.get("description")
+        }
+    
     def create_scan_node(self, scan_data: Dict) -> str:
         """Create the main scan node"""
         query = """
@@ -42,11 +237,14 @@ class Neo4jClient:
             timestamp: $timestamp,
             url_scanned: $url_scanned,
             agent_version: $agent_version,
-            scan_duration_ms: $scan_duration_ms
+            scan_duration_ms: $scan_duration_ms,
+            publisher: $publisher,
+            published_at: $published_at,
+            content_fingerprint: $content_fingerprint
         })
         RETURN elementId(s) as id
         """
-        result = self._run_query(query, **scan_data)
+        result = self._run_query(query, **self._scan_props(scan_data))
         return result[0]["id"] if result else None
     
     def create_verdict_node(self, scan_id: str, verdict_data: Dict) -> str:
@@ -63,7 +261,7 @@ class Neo4jClient:
         CREATE (s)-[:HAS_VERDICT]->(v)
         RETURN elementId(v) as id
         """
-        result = self._run_query(query, scan_id=scan_id, **verdict_data)
+        result = self._run_query(query, scan_id=scan_id, **self._verdict_props(verdict_data))
         return result[0]["id"] if result else None
     
     def create_contributing_factor(self, scan_id: str, factor: Dict) -> str:
@@ -79,14 +277,7 @@ class Neo4jClient:
         CREATE (v)-[:HAS_FACTOR]->(f)
         RETURN elementId(f) as id
         """
-        result = self._run_query(
-            query, 
-            scan_id=scan_id,
-            module=factor.get("module"),
-            severity=factor.get("severity"),
-            message=factor.get("message"),
-            details_link=factor.get("details_link")
-        )
+        result = self._run_query(query, scan_id=scan_id, **self._factor_props(factor))
         return result[0]["id"] if result else None
     
     def create_content_analysis_node(self, scan_id: str, content_data: Dict) -> str:
@@ -101,14 +292,7 @@ class Neo4jClient:
         CREATE (s)-[:HAS_CONTENT_ANALYSIS]->(c)
         RETURN elementId(c) as id
         """
-        cred = content_data.get("credibility_score", {})
-        result = self._run_query(
-            query,
-            scan_id=scan_id,
-            credibility_score=cred.get("value", 0),
-            credibility_rating=cred.get("rating_text", "Unknown"),
-            credibility_color=cred.get("color_code", "#888888")
-        )
+        result = self._run_query(query, scan_id=scan_id, **self._content_props(content_data))
         return result[0]["id"] if result else None
     
     def create_source_reputation_node(self, scan_id: str, source_data: Dict) -> str:
@@ -125,7 +309,7 @@ class Neo4jClient:
         CREATE (c)-[:HAS_SOURCE_REPUTATION]->(sr)
         RETURN elementId(sr) as id
         """
-        result = self._run_query(query, scan_id=scan_id, **source_data)
+        result = self._run_query(query, scan_id=scan_id, **self._source_props(source_data))
         return result[0]["id"] if result else None
     
     def create_political_bias_node(self, scan_id: str, bias_data: Dict) -> str:
@@ -142,20 +326,7 @@ class Neo4jClient:
         CREATE (c)-[:HAS_POLITICAL_BIAS]->(pb)
         RETURN elementId(pb) as id
         """
-        dist = bias_data.get("score_distribution", [])
-        left = next((d["value"] for d in dist if d["label"] == "Left"), 0)
-        center = next((d["value"] for d in dist if d["label"] == "Center"), 0)
-        right = next((d["value"] for d in dist if "Right" in d["label"]), 0)
-        
-        result = self._run_query(
-            query,
-            scan_id=scan_id,
-            rating=bias_data.get("rating", "Unknown"),
-            confidence=bias_data.get("confidence", 0),
-            left_score=left,
-            center_score=center,
-            right_score=right
-        )
+        result = self._run_query(query, scan_id=scan_id, **self._bias_props(bias_data))
         return result[0]["id"] if result else None
     
     def create_claim_node(self, scan_id: str, claim: Dict) -> str:
@@ -175,19 +346,7 @@ class Neo4jClient:
         CREATE (c)-[:HAS_CLAIM]->(cl)
         RETURN elementId(cl) as id
         """
-        vs = claim.get("verification_source", {})
-        result = self._run_query(
-            query,
-            scan_id=scan_id,
-            claim_id=claim.get("id"),
-            text=claim.get("text"),
-            status=claim.get("status"),
-            confidence=claim.get("confidence", 0),
-            verification_source_name=vs.get("name"),
-            verification_source_url=vs.get("url"),
-            note=claim.get("note"),
-            supported_by_media_id=claim.get("supported_by_media_id")
-        )
+        result = self._run_query(query, scan_id=scan_id, **self._claim_props(claim))
         return result[0]["id"] if result else None
     
     def create_media_analysis_node(self, scan_id: str, media_data: Dict) -> str:
@@ -200,16 +359,11 @@ class Neo4jClient:
         CREATE (s)-[:HAS_MEDIA_ANALYSIS]->(ma)
         RETURN elementId(ma) as id
         """
-        result = self._run_query(
-            query,
-            scan_id=scan_id,
-            deepfake_probability_avg=media_data.get("deepfake_probability_avg", 0)
-        )
+        result = self._run_query(query, scan_id=scan_id, **self._media_props(media_data))
         return result[0]["id"] if result else None
     
     def create_media_asset_node(self, scan_id: str, asset: Dict) -> str:
         """Create media asset node"""
-        forensics = asset.get("forensics", {})
         query = """
         MATCH (s:Scan {scan_id: $scan_id})-[:HAS_MEDIA_ANALYSIS]->(ma:MediaAnalysis)
         CREATE (a:MediaAsset {
@@ -227,20 +381,7 @@ class Neo4jClient:
         CREATE (ma)-[:HAS_ASSET]->(a)
         RETURN elementId(a) as id
         """
-        result = self._run_query(
-            query,
-            scan_id=scan_id,
-            asset_id=asset.get("id"),
-            type=asset.get("type"),
-            url=asset.get("url"),
-            ai_probability=asset.get("ai_probability", 0),
-            is_deepfake=asset.get("is_deepfake", False),
-            artifact_flag=forensics.get("artifact_flag"),
-            audio_sync_status=forensics.get("audio_sync_status"),
-            reverse_search_matches=forensics.get("reverse_search_matches", 0),
-            metadata_signature=forensics.get("metadata_signature"),
-            copy_paste_detection=forensics.get("copy_paste_detection", False)
-        )
+        result = self._run_query(query, scan_id=scan_id, **self._asset_props(asset))
         return result[0]["id"] if result else None
     
     def create_cross_reference(self, scan_id: str, xref: Dict) -> str:
@@ -255,63 +396,254 @@ class Neo4jClient:
         }]->(a)
         RETURN cl, a
         """
-        result = self._run_query(
-            query,
-            scan_id=scan_id,
-            primary_id=xref.get("primary_element_id"),
-            secondary_id=xref.get("secondary_element_id"),
-            type=xref.get("type"),
-            description=xref.get("description")
-        )
+        result = self._run_query(query, scan_id=scan_id, **self._xref_props(xref))
         return len(result) > 0
     
-    def store_full_analysis(self, analysis: Dict) -> str:
-        """Store complete analysis in Neo4j graph"""
+    # Whole analysis graphs in one statement; optional parts are 0/1-element lists
+    STORE_ANALYSES_QUERY = """
+    UNWIND $analyses AS analysis
+    CREATE (s:Scan)
+    SET s = analysis.scan
+    CREATE (s)-[:HAS_VERDICT]->(v:Verdict)
+    SET v = analysis.verdict
+    CREATE (s)-[:HAS_CONTENT_ANALYSIS]->(c:ContentAnalysis)
+    SET c = analysis.content
+    WITH analysis, s, v, c
+    CALL {
+        WITH analysis, v
+        UNWIND analysis.factors AS factor
+        CREATE (v)-[:HAS_FACTOR]->(f:ContributingFactor)
+        SET f = factor
+    }
+    CALL {
+        WITH analysis, c
+        UNWIND analysis.sources AS source
+        CREATE (c)-[:HAS_SOURCE_REPUTATION]->(sr:SourceReputation)
+        SET sr = source
+    }
+    CALL {
+        WITH analysis, s
+        UNWIND analysis.publishers AS publisher
+        MERGE (p:Publisher {domain: publisher.domain})
+        SET p.scan_count = coalesce(p.scan_count, 0) + 1
+        SET p += CASE
+            WHEN publisher.fresh AND coalesce(p.rated_at, 0) < publisher.props.rated_at
+            THEN publisher.props ELSE {} END
+        CREATE (s)-[:PUBLISHED_BY]->(p)
+    }
+    CALL {
+        WITH analysis, c
+        UNWIND analysis.biases AS bias
+        CREATE (c)-[:HAS_POLITICAL_BIAS]->(pb:PoliticalBias)
+        SET pb = bias
+    }
+    CALL {
+        WITH analysis, c
+        UNWIND analysis.claims AS claim
+        CREATE (c)-[:HAS_CLAIM]->(cl:Claim)
+        SET cl = claim
+    }
+    CALL {
+        WITH analysis, s
+        UNWIND analysis.media AS media
+        CREATE (s)-[:HAS_MEDIA_ANALYSIS]->(ma:MediaAnalysis)
+        SET ma = media
+        WITH analysis, ma
+        UNWIND analysis.assets AS asset
+        CREATE (ma)-[:HAS_ASSET]->(a:MediaAsset)
+        SET a = asset
+    }
+    CALL {
+        WITH analysis, s, c
+        UNWIND analysis.cross_references AS xref
+        MATCH (c)-[:HAS_CLAIM]->(cl:Claim {claim_id: xref.primary_id})
+        MATCH (s)-[:HAS_MEDIA_ANALYSIS]->(:MediaAnalysis)-[:HAS_ASSET]->(a:MediaAsset {asset_id: xref.secondary_id})
+        CREATE (cl)-[:CROSS_REFERENCE {type: xref.type, description: xref.description}]->(a)
+    }
+    RETURN count(s) AS scans
+    """
+    
+    def _analysis_params(self, analysis: Dict) -> Dict:
+        """One element of the $analyses parameter of STORE_ANALYSES_QUERY"""
+        verdict = analysis.get("final_verdict", {})
+        content = analysis.get("content_analysis", {})
+        media = analysis.get("media_analysis", {})
+        scan = self._scan_props(analysis.get("meta", {}))
+        if self.store_reports:
+            report = {k: v for k, v in analysis.items() if k not in ("search_logs", "search_summary")}
+            scan["report_json"] = json.dumps(report, default=str)
+            scan["report_stored_at"] = time.time()
+        return {
+            "scan": scan,
+            "verdict": self._verdict_props(verdict),
+            "factors": [self._factor_props(f) for f in verdict.get("contributing_factors", [])],
+            "content": self._content_props(content),
+            "sources": [self._source_props(content["source_reputation"])] if "source_reputation" in content else [],
+            "publishers": [self._publisher_props(content)]
+                          if content.get("source_reputation", {}).get("domain") else [],
+            "biases": [self._bias_props(content["political_bias"])] if "political_bias" in content else [],
+            "claims": [self._claim_props(c) for c in content.get("claims_list", [])],
+            "media": [self._media_props(media)] if media else [],
+            "assets": [self._asset_props(a) for a in media.get("assets", [])] if media else [],
+            "cross_references": [self._xref_props(x) for x in analysis.get("cross_references", [])]
+        }
+    
+    def get_publisher(self, domain: str, min_rated_at: float) -> Optional[Dict]:
+        """Shared publisher rating rated at or after min_rated_at (epoch seconds), or None"""
+        query = """
+        MATCH (p:Publisher {domain: $domain})
+        WHERE p.rated_at >= $min_rated_at AND p.reputation_json IS NOT NULL
+        RETURN p.reputation_json AS reputation_json, p.rated_at AS rated_at
+        """
+        result = self._run_query(query, domain=domain, min_rated_at=min_rated_at)
+        if not result:
+            return None
+        return {"reputation": json.loads(result[0]["reputation_json"]), "rated_at": result[0]["rated_at"]}
+    
+    def find_scan_report(self, fingerprint: str, url: str, min_stored_at: float) -> Optional[Dict]:
+        """Newest stored report of a scan of this content at this URL stored at or after min_stored_at (epoch seconds), or None"""
+        query = """
+        MATCH (s:Scan {content_fingerprint: $fingerprint})
+        WHERE s.url_scanned = $url AND s.report_stored_at >= $min_stored_at AND s.report_json IS NOT NULL
+        RETURN s.report_json AS report_json, s.report_stored_at AS stored_at
+        ORDER BY s.report_stored_at DESC
+        LIMIT 1
+        """
+        result = self._run_query(query, fingerprint=fingerprint, url=url, min_stored_at=min_stored_at)
+        if not result:
+            return None
+        return {"report": json.loads(result[0]["report_json"]), "detailed_report": None,
+                "stored_at": result[0]["stored_at"]}
+    
+    def store_analyses(self, analyses: List[Dict]) -> Dict:
+        """
+        Store several complete analyses in one transaction with a single UNWIND statement.
+        
+        Returns:
+            Write stats: scans, queries (round trips) and duration_ms
+        """
+        if self.bootstrap_schema and not self.schema_ready:
+            self.ensure_schema()
+        
+        start = time.perf_counter()
+        params = [self._analysis_params(a) for a in analyses]
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            session.execute_write(
+                lambda tx: tx.run(self.STORE_ANALYSES_QUERY, analyses=params).consume()
+            )
+        return {
+            "scans": len(analyses),
+            "queries": 1,
+            "duration_ms": int((time.perf_counter() - start) * 1000)
+        }
+    
+    def store_full_analysis(self, analysis: Dict, batched: bool = True) -> Dict:
+        """
+        Store complete analysis in Neo4j graph.
+        
+        By default the whole graph is written by one parameterized UNWIND statement in
+        a single transaction, so the cost barely grows with the number of claims and
+        assets. batched=False uses the original one-query-per-node path.
+        
+        Returns:
+            Write stats: scan_id, mode, queries (round trips) and duration_ms
+        """
+        scan_id = analysis.get("meta", {}).get("scan_id")
+        if batched:
+            stats = self.store_analyses([analysis])
+            return {"scan_id": scan_id, "mode": "batched", "queries": 1, "duration_ms": stats["duration_ms"]}
+        
+        if self.bootstrap_schema and not self.schema_ready:
+            self.ensure_schema()
+        start = time.perf_counter()
+        queries = self._store_full_analysis_per_node(analysis)
+        return {
+            "scan_id": scan_id,
+            "mode": "per_node",
+            "queries": queries,
+            "duration_ms": int((time.perf_counter() - start) * 1000)
+        }
+    
+    def _store_full_analysis_per_node(self, analysis: Dict) -> int:
+        """Store the analysis one node per query; returns the number of queries run"""
         meta = analysis.get("meta", {})
         scan_id = meta.get("scan_id")
+        queries = 0
         
         # Create main scan node
         self.create_scan_node(meta)
+        queries += 1
         
         # Create verdict
         verdict = analysis.get("final_verdict", {})
-        self.create_verdict_node(scan_id, {
-            "status": verdict.get("status"),
-            "label": verdict.get("label"),
-            "overall_score": verdict.get("overall_score"),
-            "confidence_score": verdict.get("confidence_score"),
-            "summary_statement": verdict.get("summary_statement")
-        })
+        self.create_verdict_node(scan_id, verdict)
+        queries += 1
         
         # Create contributing factors
         for factor in verdict.get("contributing_factors", []):
             self.create_contributing_factor(scan_id, factor)
+            queries += 1
         
         # Create content analysis
         content = analysis.get("content_analysis", {})
         self.create_content_analysis_node(scan_id, content)
+        queries += 1
         
         # Create source reputation
         if "source_reputation" in content:
             self.create_source_reputation_node(scan_id, content["source_reputation"])
+            queries += 1
         
         # Create political bias
         if "political_bias" in content:
             self.create_political_bias_node(scan_id, content["political_bias"])
+            queries += 1
         
         # Create claims
         for claim in content.get("claims_list", []):
             self.create_claim_node(scan_id, claim)
+            queries += 1
         
         # Create media analysis
         media = analysis.get("media_analysis", {})
         if media:
             self.create_media_analysis_node(scan_id, media)
+            queries += 1
             for asset in media.get("assets", []):
                 self.create_media_asset_node(scan_id, asset)
+                queries += 1
         
         # Create cross-references
         for xref in analysis.get("cross_references", []):
             self.create_cross_reference(scan_id, xref)
+            queries += 1
         
-        return scan_id
+        return queries
+
+
+# Process-wide client: the driver is thread-safe and pools its own connections
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_neo4j_client() -> Neo4jClient:
+    """Get the process-wide Neo4j client, creating its driver on first use"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = Neo4jClient()
+        return _shared_client
+
+
+def close_shared_neo4j_client():
+    """Close the process-wide Neo4j driver (call on shutdown)"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+            _shared_client = None
+
+
+def shared_neo4j_client_initialized() -> bool:
+    """Whether the process-wide driver has been created"""
+    return _shared_client is not None
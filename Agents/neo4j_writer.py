@@ -0,0 +1,290 @@
+"""
+Neo4j write-behind queue
+Persists finished analyses to Neo4j in the background so scans never wait on the graph.
+
+Analyses are queued in memory (bounded) and a single writer thread stores them several
+scans per transaction. While Neo4j is unavailable the writer retries with exponential
+backoff; when the queue is full, new analyses are appended to a local JSONL journal
+that is replayed once the queue has drained. Analyses Neo4j rejects outright are
+written to a dead-letter file instead of being retried forever.
+"""
+from Agents.neo4j_tools import Neo4jClient, get_shared_neo4j_client
+from config import Config
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from typing import Dict, List, Optional
+import json
+import os
+import queue
+import threading
+import time
+
+
+# Errors worth retrying: the database is down, restarting or briefly overloaded
+RETRYABLE_ERRORS = (ServiceUnavailable, SessionExpired, TransientError, OSError)
+
+
+class Neo4jWriteQueue:
+    """Bounded write-behind queue with a background writer thread"""
+
+    def __init__(self, client: Neo4jClient, max_size: int = None, batch_size: int = None,
+                 journal_path: str = None):
+        self.client = client
+        self.max_size = max(1, max_size or Config.NEO4J_WRITE_QUEUE_SIZE)
+        self.batch_size = max(1, batch_size or Config.NEO4J_WRITE_BATCH_SIZE)
+        self.journal_path = journal_path or Config.NEO4J_WRITE_JOURNAL_PATH
+        self.dead_letter_path = f"{self.journal_path}.failed"
+
+        self._queue = queue.Queue(maxsize=self.max_size)
+        self._journal_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._in_flight = []  # (enqueued_at, analysis) of the batch being written
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.last_error = None
+        self.last_write_lag_ms = None
+        self.last_batch_ms = None
+
+        self.start()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._writer_loop, name="neo4j-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, analysis: Dict) -> str:
+        """
+        Queue an analysis for storage without blocking.
+
+        Returns:
+            "queued", or "journaled" when the queue was full
+        """
+        with self._stats_lock:
+            self.enqueued += 1
+        try:
+            self._queue.put_nowait((time.time(), analysis))
+            return "queued"
+        except queue.Full:
+            self._append_journal(self.journal_path, [analysis])
+            with self._stats_lock:
+                self.spilled += 1
+            return "journaled"
+
+    def close(self, timeout: float = 10.0):
+        """Flush what can be written within timeout, journal the rest and stop the writer"""
+        deadline = time.time() + timeout
+        while (self._queue.qsize() or self._in_flight) and time.time() < deadline and self._thread.is_alive():
+            time.sleep(0.05)
+        self._stop.set()
+        self._thread.join(timeout=max(0.1, deadline - time.time()))
+        leftover = self._drain(self.max_size)
+        if leftover:
+            self._append_journal(self.journal_path, [analysis for _, analysis in leftover])
+
+    # Writer thread
+
+    def _drain(self, limit: int) -> List[tuple]:
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _writer_loop(self):
+        self._replay_journal()
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                self._replay_journal()
+                continue
+            batch = [first] + self._drain(self.batch_size - 1)
+            if not self._write_batch(batch):
+                # Stopping while Neo4j is down - keep the batch for the next run
+                self._append_journal(self.journal_path, [analysis for _, analysis in batch])
+                return
+            if self._queue.empty():
+                self._replay_journal()
+
+    def _write_batch(self, batch: List[tuple]) -> bool:
+        """
+        Store one batch, retrying with backoff while Neo4j is unavailable.
+
+        Returns:
+            False if the writer was stopped before the batch could be written
+        """
+        self._in_flight = batch
+        delay = Config.NEO4J_WRITE_RETRY_BASE_SECONDS
+        try:
+            while True:
+                try:
+                    stats = self.client.store_analyses([analysis for _, analysis in batch])
+                    self._record_success(batch, stats["duration_ms"])
+                    return True
+                except RETRYABLE_ERRORS as e:
+                    with self._stats_lock:
+                        self.retries += 1
+                        self.last_error = str(e)
+                    print(f"  ⚠️ Neo4j unavailable, retrying {len(batch)} scan(s) in {delay:.1f}s: {e}")
+                    if self._stop.wait(delay):
+                        return False
+                    delay = min(delay * 2, Config.NEO4J_WRITE_RETRY_MAX_SECONDS)
+                except Exception as e:
+                    with self._stats_lock:
+                        self.last_error = str(e)
+                    self._write_individually(batch)
+                    return True
+        finally:
+            self._in_flight = []
+
+    def _write_individually(self, batch: List[tuple]):
+        """
+        Isolate analyses Neo4j rejects so one bad scan doesn't sink its batch.
+
+        Only rejections are dead-lettered: if Neo4j becomes unavailable part-way,
+        the unwritten analyses go back to the journal and are retried later.
+        """
+        for i, item in enumerate(batch):
+            try:
+                stats = self.client.store_analyses([item[1]])
+                self._record_success([item], stats["duration_ms"])
+            except RETRYABLE_ERRORS as e:
+                remaining = [analysis for _, analysis in batch[i:]]
+                print(f"  ⚠️ Neo4j unavailable, journaling {len(remaining)} scan(s) for retry: {e}")
+                self._append_journal(self.journal_path, remaining)
+                with self._stats_lock:
+                    self.spilled += len(remaining)
+                    self.last_error = str(e)
+                return
+            except Exception as e:
+                scan_id = item[1].get("meta", {}).get("scan_id")
+                print(f"  ❌ Neo4j rejected scan {scan_id}: {e}")
+                self._append_journal(self.dead_letter_path, [item[1]])
+                with self._stats_lock:
+                    self.dead_lettered += 1
+                    self.last_error = str(e)
+
+    def _record_success(self, batch: List[tuple], duration_ms: int):
+        oldest = min(enqueued_at for enqueued_at, _ in batch)
+        with self._stats_lock:
+            self.written += len(batch)
+            self.batches += 1
+            self.last_batch_ms = duration_ms
+            self.last_write_lag_ms = int((time.time() - oldest) * 1000)
+
+    # Journal
+
+    def _append_journal(self, path: str, analyses: List[Dict]):
+        directory = os.path.dirname(path)
+        with self._journal_lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                for analysis in analyses:
+                    f.write(json.dumps(analysis, default=str) + "\n")
+
+    def _replay_journal(self):
+        """Write back analyses spilled to the journal (also resumes an interrupted replay)"""
+        replay_path = f"{self.journal_path}.replay"
+        with self._journal_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0:
+                    return
+                os.replace(self.journal_path, replay_path)
+
+        with open(replay_path, "r", encoding="utf-8") as f:
+            pending = []
+            for line in f:
+                try:
+                    pending.append((time.time(), json.loads(line)))
+                except json.JSONDecodeError:
+                    continue  # Partially written line from a crash
+        print(f"  → Replaying {len(pending)} journaled scan(s) into Neo4j")
+
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            if not self._write_batch(batch):
+                # Stopped mid-replay: keep what is left for the next run
+                self._append_journal(self.journal_path, [analysis for _, analysis in pending[i:]])
+                break
+            with self._stats_lock:
+                self.replayed += len(batch)
+        os.remove(replay_path)
+
+    def _journal_entries(self) -> int:
+        count = 0
+        with self._journal_lock:
+            for path in (self.journal_path, f"{self.journal_path}.replay"):
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        count += sum(1 for _ in f)
+        return count
+
+    def stats(self) -> dict:
+        """Queue depth, write lag and counters"""
+        in_flight = list(self._in_flight)
+        oldest_pending = None
+        with self._queue.mutex:
+            if self._queue.queue:
+                oldest_pending = self._queue.queue[0][0]
+        if in_flight:
+            oldest_pending = min(enqueued_at for enqueued_at, _ in in_flight)
+
+        with self._stats_lock:
+            return {
+                "depth": self._queue.qsize() + len(in_flight),
+                "max_size": self.max_size,
+                "journal_entries": self._journal_entries(),
+                "oldest_pending_ms": int((time.time() - oldest_pending) * 1000) if oldest_pending else 0,
+                "last_write_lag_ms": self.last_write_lag_ms,
+                "last_batch_ms": self.last_batch_ms,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "retries": self.retries,
+                "spilled_to_journal": self.spilled,
+                "replayed_from_journal": self.replayed,
+                "dead_lettered": self.dead_lettered,
+                "last_error": self.last_error,
+                "writer_alive": self._thread is not None and self._thread.is_alive()
+            }
+
+
+# Process-wide writer over the shared client
+_shared_writer = None
+_shared_writer_lock = threading.Lock()
+
+
+def get_shared_neo4j_writer() -> Neo4jWriteQueue:
+    """Get the process-wide write queue, starting its writer on first use"""
+    global _shared_writer
+    with _shared_writer_lock:
+        if _shared_writer is None:
+            _shared_writer = Neo4jWriteQueue(get_shared_neo4j_client())
+        return _shared_writer
+
+
+def close_shared_neo4j_writer(timeout: float = 10.0):
+    """Flush and stop the process-wide writer (call before closing the shared client)"""
+    global _shared_writer
+    with _shared_writer_lock:
+        if _shared_writer is not None:
+            _shared_writer.close(timeout)
+            _shared_writer = None
+
+
+def shared_neo4j_writer_stats() -> Optional[dict]:
+    """Stats of the process-wide writer, or None if it was never started"""
+    writer = _shared_writer
+    return writer.stats() if writer else None
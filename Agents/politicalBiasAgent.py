@@ -8,9 +8,10 @@ and ideological indicators to classify content on the political spectrum.
 from langchain.agents import create_agent
 from Agents.prompts import POLITICAL_BIAS_PROMPT
 from Agents.rate_limit_utils import invoke_with_rate_limit_retry
-from Agents.model_factory import create_model
-import json
-import re
+from Agents.llm_cache import register_agent
+from Agents.model_factory import create_model, cacheable_system_prompt
+from Agents.structured_output import StructuredOutput, PoliticalBias
+from config import Config
 
 
 class PoliticalBiasAgent:
@@ -18,26 +19,27 @@ class PoliticalBiasAgent:
     
     def __init__(self, model=None):
         self.model = model or create_model()
+        self.output = StructuredOutput(self.model, PoliticalBias, "political_bias")
         self.agent = create_agent(
             model=self.model,
             tools=[],
-            system_prompt=POLITICAL_BIAS_PROMPT
+            system_prompt=cacheable_system_prompt(POLITICAL_BIAS_PROMPT, self.model),
+            response_format=self.output.response_format
         )
+        register_agent(self.agent, self.model, POLITICAL_BIAS_PROMPT, [], self.output.response_format)
     
     def analyze(self, text: str) -> dict:
         """Analyze political bias in text"""
+        # Tone and framing show in the opening of long documents; don't pay for all of it
+        if len(text) > Config.ANALYSIS_CONTEXT_CHARS:
+            text = text[:Config.ANALYSIS_CONTEXT_CHARS] + "..."
         response = invoke_with_rate_limit_retry(self.agent, {
             "messages": [{"role": "user", "content": f"Analyze political bias in this text:\n\n{text}"}]
-        })
+        }, agent_name="political_bias", validate=self.output.is_valid)
         
-        content = response["messages"][-1].content if "messages" in response else str(response)
-        
-        try:
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                return json.loads(match.group())
-        except json.JSONDecodeError:
-            pass
+        result = self.output.parse(response)
+        if result is not None:
+            return result
         
         return {
             "rating": "Center",
@@ -0,0 +1,140 @@
+"""
+Publisher Store
+Persistent publisher reputation shared across scans.
+
+Ratings are keyed by normalized domain. Lookups check a local two-tier cache first and
+then the shared Publisher nodes in Neo4j (merged with every stored analysis by the
+write-behind queue), so the source analyzer only runs for publishers without a rating
+newer than the staleness window.
+"""
+from Agents.cache_utils import TwoTierCache
+from config import Config
+from typing import Callable, Optional
+import re
+import threading
+import time
+
+
+# Local publisher ratings (None when disabled); also the fallback without Neo4j
+publisher_cache = TwoTierCache(
+    Config.PUBLISHER_STORE_PATH,
+    table="publishers",
+    memory_entries=Config.PUBLISHER_STORE_MEMORY_ENTRIES,
+    max_entries=Config.PUBLISHER_STORE_MAX_ENTRIES
+) if Config.PUBLISHER_STORE_ENABLED else None
+
+
+def normalize_domain(url_or_publisher: str) -> Optional[str]:
+    """Lowercase host without scheme, www., port or path (None if not a domain)"""
+    if not url_or_publisher:
+        return None
+    host = re.sub(r'^[a-z][a-z0-9+.-]*://', '', url_or_publisher.strip().lower())
+    host = re.split(r'[/?#]', host, maxsplit=1)[0]
+    host = host.rsplit('@', 1)[-1].split(':', 1)[0].strip('.')
+    if host.startswith("www."):
+        host = host[4:]
+    if "." not in host or not re.fullmatch(r'[a-z0-9.-]+', host):
+        return None
+    return host
+
+
+class PublisherStore:
+    """Looks up and saves publisher reputations by normalized domain"""
+
+    def __init__(self, neo4j_client=None, staleness_seconds: int = None):
+        self.neo4j_client = neo4j_client
+        self.staleness_seconds = staleness_seconds or Config.PUBLISHER_STALENESS_SECONDS
+        self._lock = threading.Lock()
+        self.hits_local = 0
+        self.hits_neo4j = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, publisher: str) -> Optional[dict]:
+        """
+        Get a fresh rating for the publisher's domain.
+
+        Returns:
+            The source analysis annotated with domain, rated_at, cached and
+            cache_source ("local" or "neo4j"), or None when no fresh rating exists
+        """
+        domain = normalize_domain(publisher)
+        if domain is None or publisher_cache is None:
+            return None
+
+        entry = publisher_cache.get(domain)
+        cache_source = "local"
+        if entry is None and self.neo4j_client is not None and self.neo4j_client.available:
+            try:
+                entry = self.neo4j_client.get_publisher(domain, time.time() - self.staleness_seconds)
+            except Exception as e:
+                print(f"  ⚠️ Publisher lookup failed for {domain}: {e}")
+                entry = None
+            if entry is not None:
+                cache_source = "neo4j"
+                self._remember(domain, entry)
+
+        if entry is None:
+            self._count("misses")
+            return None
+
+        self._count("hits_local" if cache_source == "local" else "hits_neo4j")
+        return {
+            **entry["reputation"],
+            "domain": domain,
+            "rated_at": entry["rated_at"],
+            "cached": True,
+            "cache_source": cache_source
+        }
+
+    def save(self, publisher: str, source_data: dict) -> dict:
+        """
+        Remember a fresh rating locally; returns source_data annotated like lookup().
+
+        Fallback placeholders (the analyzer's answer could not be parsed) are returned
+        unrated and not remembered, so the publisher is analyzed again on the next scan
+        and the placeholder never overwrites the shared Publisher node.
+        """
+        domain = normalize_domain(publisher)
+        rated_at = time.time()
+        if source_data.get("fallback"):
+            self._count("fallbacks")
+            rated_at = None
+        elif domain is not None:
+            self._remember(domain, {"reputation": source_data, "rated_at": rated_at})
+        return {
+            **source_data,
+            "domain": domain,
+            "rated_at": rated_at,
+            "cached": False,
+            "cache_source": None
+        }
+
+    def _remember(self, domain: str, entry: dict):
+        ttl = entry["rated_at"] + self.staleness_seconds - time.time()
+        if publisher_cache is not None and ttl > 0:
+            publisher_cache.set(domain, entry, ttl)
+
+    def get_or_analyze(self, publisher: str, analyze: Callable[[str], dict]) -> dict:
+        """Return the stored rating, running analyze(publisher) only when it is missing or stale"""
+        source_data = self.lookup(publisher)
+        if source_data is not None:
+            return source_data
+        return self.save(publisher, analyze(publisher))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits_local + self.hits_neo4j + self.misses
+            hits = self.hits_local + self.hits_neo4j
+            return {
+                "hits_local": self.hits_local,
+                "hits_neo4j": self.hits_neo4j,
+                "misses": self.misses,
+                "fallbacks_not_saved": self.fallbacks,
+                "hit_rate": f"{(hits / lookups * 100):.1f}%" if lookups else "N/A",
+                "cache": publisher_cache.stats() if publisher_cache else None
+            }
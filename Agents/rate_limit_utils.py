@@ -1,18 +1,98 @@
 """
-Rate Limit Utilities for Claude API
+Rate Limit Utilities for LLM APIs
 Handles rate limiting with automatic retry and delay.
 
 This module provides decorators and utilities for handling API rate limits with exponential
-backoff and automatic retry logic to ensure robust API interactions.
+backoff and automatic retry logic to ensure robust API interactions. Calls are paced
+up front by the per-provider limiter (see rate_limiter); a 429 from any provider is
+retried after its Retry-After or a jittered exponential backoff.
 """
 import time
 import functools
-from anthropic import RateLimitError
+import threading
+from collections import deque
+from typing import Callable
+from Agents.rate_limiter import backoff_delay, error_headers, is_rate_limit_error, retry_after_seconds
+from Agents.single_flight import SingleFlight
+from Agents.cache_utils import make_cache_key
+from Agents.llm_cache import response_cache_key, get_cached_response, store_response
+from config import Config
+
+
+class CallCounter:
+    """Thread-safe cumulative call counter (never reset - compare snapshots instead)"""
+    
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+    
+    def increment(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+    
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+# Global counter of agent invocations (including retries)
+llm_call_counter = CallCounter()
+
+# Global token counters, from the usage metadata of each response's model turns
+llm_input_token_counter = CallCounter()
+llm_output_token_counter = CallCounter()
+# Input tokens served from / written to the provider's prompt cache (subsets of the input count)
+llm_cache_read_token_counter = CallCounter()
+llm_cache_write_token_counter = CallCounter()
+
+# Coalesces concurrent identical agent invocations into one LLM call
+llm_flight = SingleFlight("llm")
+
+
+class LLMUsageStats:
+    """Per-agent token usage and latency of agent invocations, plus the most recent calls"""
+    
+    RECENT_CALLS = 50
+    
+    def __init__(self):
+        self._agents = {}
+        self._recent = deque(maxlen=self.RECENT_CALLS)
+        self._lock = threading.Lock()
+    
+    def record(self, agent_name: str, usage: dict, latency_ms: int):
+        call = {"agent": agent_name or "unnamed", **usage, "latency_ms": latency_ms}
+        with self._lock:
+            totals = self._agents.setdefault(call["agent"], {
+                "calls": 0, "input_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0,
+                "uncached_input_tokens": 0, "output_tokens": 0, "latency_ms": 0
+            })
+            totals["calls"] += 1
+            for field in totals:
+                if field != "calls":
+                    totals[field] += call[field]
+            self._recent.append(call)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            agents = {name: dict(totals) for name, totals in self._agents.items()}
+            recent = list(self._recent)
+        for totals in agents.values():
+            input_tokens = totals["input_tokens"]
+            totals["cache_read_rate"] = f"{(totals['cache_read_tokens'] / input_tokens * 100):.1f}%" if input_tokens else "N/A"
+            totals["avg_latency_ms"] = int(totals.pop("latency_ms") / totals["calls"])
+        return {"agents": agents, "recent_calls": recent}
+
+
+llm_usage = LLMUsageStats()
+
+
+def llm_usage_stats() -> dict:
+    return llm_usage.stats()
 
 
 def with_rate_limit_retry(func):
     """
-    Decorator that handles rate limit errors with 1-2 second delay and retry.
+    Decorator that retries rate limit errors (429s from any provider) with backoff.
     
     Usage:
         @with_rate_limit_retry
@@ -21,46 +101,105 @@ def with_rate_limit_retry(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        max_retries = 3
-        retry_delay = 1.5  # 1.5 seconds (between 1-2 seconds)
-        
-        for attempt in range(max_retries):
-            try:
-                return func(*args, **kwargs)
-            except RateLimitError as e:
-                if attempt < max_retries - 1:
-                    print(f"  ⏳ Rate limit hit, waiting {retry_delay}s before retry ({attempt + 1}/{max_retries})...")
-                    time.sleep(retry_delay)
-                else:
-                    raise e
-        
-        return func(*args, **kwargs)
+        return _call_with_retries(lambda: func(*args, **kwargs), Config.RATE_LIMIT_MAX_RETRIES)
     
     return wrapper
 
 
-def invoke_with_rate_limit_retry(agent, input_data: dict, max_retries: int = 3) -> dict:
+def _call_with_retries(call, max_retries: int):
+    """Run call, retrying rate limit errors after Retry-After or a jittered exponential backoff"""
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, retry_after_seconds(error_headers(e)))
+            attempt += 1
+            print(f"  ⏳ Rate limit hit, waiting {delay:.1f}s before retry ({attempt}/{max_retries})...")
+            time.sleep(delay)
+
+
+def invoke_with_rate_limit_retry(agent, input_data: dict, max_retries: int = None,
+                                 agent_name: str = None, validate: Callable[[dict], bool] = None) -> dict:
     """
     Invoke an agent with rate limit retry handling.
     
+    When agent_name is given (and the model is deterministic), concurrent
+    invocations of the same agent with identical input share one LLM call, and
+    with LLM_CACHE_ENABLED the response is served from / saved to the LLM
+    response cache. With validate, only responses it accepts are saved, so an
+    answer the caller cannot parse is never replayed.
+    
     Args:
         agent: The LangChain agent to invoke
         input_data: The input dictionary for the agent
-        max_retries: Maximum number of retries (default: 3)
+        max_retries: Maximum number of retries (default: RATE_LIMIT_MAX_RETRIES)
+        agent_name: Stable name of the agent type, used to coalesce identical calls
+        validate: Optional check of a fresh response (e.g. StructuredOutput.is_valid)
         
     Returns:
         The agent response
     """
-    retry_delay = 1.5  # 1.5 seconds (between 1-2 seconds)
+    cache_key = response_cache_key(agent, agent_name, input_data)
+    if cache_key:
+        cached = get_cached_response(cache_key, agent_name)
+        if cached is not None:
+            return cached
     
-    for attempt in range(max_retries):
-        try:
-            return agent.invoke(input_data)
-        except RateLimitError as e:
-            if attempt < max_retries - 1:
-                print(f"  ⏳ Rate limit hit, waiting {retry_delay}s before retry ({attempt + 1}/{max_retries})...")
-                time.sleep(retry_delay)
-            else:
-                raise e
+    def invoke():
+        response = _invoke_with_retries(agent, input_data, max_retries, agent_name)
+        if cache_key and (validate is None or validate(response)):
+            store_response(cache_key, agent_name, response)
+        return response
+    
+    if agent_name and Config.MODEL_TEMPERATURE == 0:
+        flight_key = make_cache_key(agent_name, Config.get_model(), input_data)
+        response, _ = llm_flight.do(flight_key, invoke)
+        return response
+    return invoke()
+
+
+def _invoke_with_retries(agent, input_data: dict, max_retries: int = None, agent_name: str = None) -> dict:
+    """Invoke an agent, retrying on rate limit errors"""
+    if max_retries is None:
+        max_retries = Config.RATE_LIMIT_MAX_RETRIES
+    return _call_with_retries(lambda: _timed_invoke(agent, input_data, agent_name), max_retries)
+
+
+def _timed_invoke(agent, input_data: dict, agent_name: str = None) -> dict:
+    """One agent invocation, with its token usage and latency recorded"""
+    llm_call_counter.increment()
+    start = time.perf_counter()
+    response = agent.invoke(input_data)
+    llm_usage.record(agent_name, _count_tokens(response), int((time.perf_counter() - start) * 1000))
+    return response
+
+
+def _count_tokens(response) -> dict:
+    """
+    Add the token usage of every model turn in an agent response to the global counters.
     
-    return agent.invoke(input_data)
+    Returns:
+        The invocation's totals: input_tokens (including cached), cache_read_tokens,
+        cache_write_tokens, uncached_input_tokens and output_tokens
+    """
+    totals = {"input_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0, "output_tokens": 0}
+    messages = response.get("messages", []) if isinstance(response, dict) else []
+    for message in messages:
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            details = usage.get("input_token_details") or {}
+            totals["input_tokens"] += usage.get("input_tokens", 0)
+            totals["output_tokens"] += usage.get("output_tokens", 0)
+            totals["cache_read_tokens"] += details.get("cache_read") or 0
+            totals["cache_write_tokens"] += details.get("cache_creation") or 0
+    llm_input_token_counter.increment(totals["input_tokens"])
+    llm_output_token_counter.increment(totals["output_tokens"])
+    llm_cache_read_token_counter.increment(totals["cache_read_tokens"])
+    llm_cache_write_token_counter.increment(totals["cache_write_tokens"])
+    totals["uncached_input_tokens"] = max(
+        0, totals["input_tokens"] - totals["cache_read_tokens"] - totals["cache_write_tokens"]
+    )
+    return totals
@@ -0,0 +1,362 @@
+"""
+Rate Limiter
+Proactive per-provider request and token budgets shared by every thread and task.
+
+Each provider (anthropic, openai, google, perplexity) has two token buckets, one for
+requests per minute and one for tokens per minute, refilled continuously. A call
+reserves its share before it is sent and sleeps for exactly the time its reservation
+is short, so concurrent claim checks queue up behind the budget instead of all firing
+and bouncing off 429s. Limits come from RATE_LIMIT_RPM_* / RATE_LIMIT_TPM_* and are
+replaced by what the provider reports in its rate-limit response headers; a provider
+that throttles without saying its limits gets one estimated from the recent request
+rate. Successful responses only carry headers for OpenAI (include_response_headers)
+and Perplexity; ChatAnthropic and Gemini expose none, so those providers are paced by
+the configured limits and learn from the headers on their 429 errors. A 429 also pauses the whole provider for its Retry-After, so the other workers
+wait instead of piling on.
+
+LLM calls are paced per model request (every turn of an agent's tool loop) through
+RateLimitCallback, which model_factory attaches to every chat model.
+"""
+from collections import deque
+from config import Config
+from email.utils import parsedate_to_datetime
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import List, Optional
+import random
+import threading
+import time
+
+
+# Rate-limit response headers, most specific first (OpenAI/Perplexity style, then Anthropic)
+REQUEST_LIMIT_HEADERS = ("x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit")
+REQUEST_REMAINING_HEADERS = ("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining")
+TOKEN_LIMIT_HEADERS = ("x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit")
+TOKEN_REMAINING_HEADERS = ("x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining")
+
+ESTIMATED_LIMIT_TTL = 600  # Seconds an RPM estimated from a header-less 429 is kept
+_CHARS_PER_TOKEN = 4  # Rough input size estimate, settled against the reported usage
+
+
+class _Bucket:
+    """Per-minute budget refilled continuously; reservations may run it negative (queued)"""
+
+    def __init__(self, limit: int):
+        self.limit = 0
+        self.level = 0.0
+        self.updated = time.monotonic()
+        self.set_limit(limit)
+
+    def set_limit(self, limit: int):
+        if limit == self.limit:
+            return
+        # Keep the used share when the limit changes; start full when first limited
+        self.level = float(limit) if not self.limit else self.level * limit / self.limit
+        self.limit = limit
+
+    def _refill(self, now: float):
+        if self.limit:
+            self.level = min(float(self.limit), self.level + (now - self.updated) * self.limit / 60)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the budget; returns seconds until it is actually available"""
+        self._refill(now)
+        if not self.limit or amount <= 0:
+            return 0.0
+        self.level -= min(amount, self.limit)
+        return max(0.0, -self.level * 60 / self.limit)
+
+    def adjust(self, amount: float, now: float):
+        """Return (positive) or take (negative) budget after the fact"""
+        self._refill(now)
+        if self.limit:
+            self.level = min(float(self.limit), self.level + amount)
+
+    def clamp(self, remaining: int, now: float):
+        """Never assume more budget than the provider says is left"""
+        self._refill(now)
+        if self.limit:
+            self.level = min(self.level, float(remaining))
+
+
+def _header(headers: dict, names: tuple) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _lower_headers(headers) -> dict:
+    try:
+        return {str(k).lower(): v for k, v in dict(headers).items()}
+    except (TypeError, ValueError):
+        return {}
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Retry-After (seconds or HTTP date) or retry-after-ms from response headers"""
+    headers = _lower_headers(headers or {})
+    if headers.get("retry-after-ms"):
+        try:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def error_headers(error) -> dict:
+    """Response headers carried by an HTTP/SDK exception, if any"""
+    response = getattr(error, "response", None)
+    return _lower_headers(getattr(response, "headers", None) or {})
+
+
+def is_rate_limit_error(error) -> bool:
+    """429s from the Anthropic/OpenAI SDKs, requests/httpx, and Google's RESOURCE_EXHAUSTED"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code
+    if status == 429:
+        return True
+    name = type(error).__name__
+    return name in ("RateLimitError", "ResourceExhausted") or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """
+    Seconds to wait before retry number attempt + 1.
+
+    Exponential backoff with jitter: between half and all of RATE_LIMIT_BACKOFF_BASE *
+    2^attempt, capped at RATE_LIMIT_BACKOFF_MAX. A Retry-After from the provider
+    replaces it, plus a little jitter so waiting workers don't retry in lockstep.
+    """
+    if retry_after is not None:
+        return min(retry_after, Config.RATE_LIMIT_MAX_RETRY_AFTER) + random.uniform(0, Config.RATE_LIMIT_BACKOFF_BASE)
+    cap = min(Config.RATE_LIMIT_BACKOFF_MAX, Config.RATE_LIMIT_BACKOFF_BASE * 2 ** attempt)
+    return random.uniform(cap / 2, cap)
+
+
+class ProviderLimiter:
+    """Requests-per-minute and tokens-per-minute budgets of one provider"""
+
+    def __init__(self, provider: str, rpm: int = 0, tpm: int = 0):
+        self.provider = provider
+        self._lock = threading.Lock()
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self._limit_source = "config" if rpm or tpm else None
+        self._estimated_until = 0.0
+        self._paused_until = 0.0
+        self._recent = deque()  # monotonic times of the last minute's requests
+        self.requests = 0
+        self.tokens = 0
+        self.throttled = 0
+        self.waits = 0
+        self.wait_ms = 0
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._limit_source == "estimate" and now > self._estimated_until:
+                self._requests.set_limit(Config.RATE_LIMIT_RPM.get(self.provider, 0))
+                self._limit_source = "config" if self._requests.limit or self._tokens.limit else None
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - 60:
+                self._recent.popleft()
+            self.requests += 1
+            self.tokens += tokens
+            wait = max(
+                self._requests.reserve(1, now),
+                self._tokens.reserve(tokens, now),
+                self._paused_until - now
+            )
+            if wait > 0:
+                self.waits += 1
+                self.wait_ms += int(wait * 1000)
+            return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Reserve one request and an estimated token count, sleeping until they are available"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def settle(self, reserved: int, used: int):
+        """Correct a token reservation with the usage the provider reported"""
+        if used == reserved:
+            return
+        with self._lock:
+            self.tokens += used - reserved
+            self._tokens.adjust(reserved - used, time.monotonic())
+
+    def observe_headers(self, headers):
+        """Learn limits and the remaining budget from rate-limit response headers"""
+        headers = _lower_headers(headers or {})
+        if not headers:
+            return
+        request_limit = _header(headers, REQUEST_LIMIT_HEADERS)
+        token_limit = _header(headers, TOKEN_LIMIT_HEADERS)
+        request_remaining = _header(headers, REQUEST_REMAINING_HEADERS)
+        token_remaining = _header(headers, TOKEN_REMAINING_HEADERS)
+        with self._lock:
+            now = time.monotonic()
+            if request_limit:
+                self._requests.set_limit(request_limit)
+                self._limit_source = "headers"
+            if token_limit:
+                self._tokens.set_limit(token_limit)
+                self._limit_source = "headers"
+            if request_remaining is not None:
+                self._requests.clamp(request_remaining, now)
+            if token_remaining is not None:
+                self._tokens.clamp(token_remaining, now)
+
+    def throttle(self, headers=None) -> Optional[float]:
+        """
+        Record a 429: learn from its headers, pause the provider for its Retry-After,
+        and estimate an RPM limit from the recent request rate when none is known.
+
+        Returns:
+            The provider's Retry-After in seconds, or None if it gave none
+        """
+        self.observe_headers(headers)
+        retry_after = retry_after_seconds(headers)
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + min(retry_after, Config.RATE_LIMIT_MAX_RETRY_AFTER))
+            if not self._requests.limit or self._limit_source == "estimate":
+                recent = sum(1 for t in self._recent if t >= now - 60)
+                estimate = max(1, int(recent * 0.8))
+                if not self._requests.limit or estimate < self._requests.limit:
+                    self._requests.set_limit(estimate)
+                    self._requests.level = min(self._requests.level, 0.0)
+                self._limit_source = "estimate"
+                self._estimated_until = now + ESTIMATED_LIMIT_TTL
+        return retry_after
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rpm_limit": self._requests.limit or None,
+                "tpm_limit": self._tokens.limit or None,
+                "limit_source": self._limit_source,
+                "requests": self.requests,
+                "tokens": self.tokens,
+                "throttled": self.throttled,
+                "waits": self.waits,
+                "wait_ms": self.wait_ms
+            }
+
+
+_limiters = {}  # provider -> ProviderLimiter
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> Optional[ProviderLimiter]:
+    """The process-wide limiter of a provider, or None when limiting is off (or for local Ollama)"""
+    if not Config.RATE_LIMIT_ENABLED or not provider or provider == "ollama":
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = _limiters[provider] = ProviderLimiter(
+                provider,
+                rpm=Config.RATE_LIMIT_RPM.get(provider, 0),
+                tpm=Config.RATE_LIMIT_TPM.get(provider, 0)
+            )
+        return limiter
+
+
+def estimate_tokens(text: str, max_output_tokens: int = 0) -> int:
+    return len(text or "") // _CHARS_PER_TOKEN + max_output_tokens
+
+
+def _message_text(message) -> str:
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        return "".join(b.get("text", "") if isinstance(b, dict) else str(b) for b in content)
+    return str(content or "")
+
+
+def _used_tokens(usage: dict) -> int:
+    """Input (minus prompt-cache reads) plus output tokens of one model response"""
+    details = usage.get("input_token_details") or {}
+    return max(0, usage.get("input_tokens", 0) - (details.get("cache_read") or 0)) + usage.get("output_tokens", 0)
+
+
+class RateLimitCallback(BaseCallbackHandler):
+    """Paces every request of a chat model through its provider's limiter"""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._reserved = {}  # run_id -> reserved tokens
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        limiter = get_limiter(self.provider)
+        if limiter is None:
+            return
+        tokens = sum(estimate_tokens(_message_text(m)) for batch in messages for m in batch)
+        with self._lock:
+            self._reserved[run_id] = tokens
+        limiter.acquire(tokens)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        limiter = get_limiter(self.provider)
+        with self._lock:
+            reserved = self._reserved.pop(run_id, None)
+        if limiter is None or reserved is None:
+            return
+        used = None
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                metadata = getattr(message, "response_metadata", None) or {}
+                limiter.observe_headers(metadata.get("headers"))
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    used = (used or 0) + _used_tokens(usage)
+        if used is not None:
+            limiter.settle(reserved, used)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        limiter = get_limiter(self.provider)
+        with self._lock:
+            reserved = self._reserved.pop(run_id, None)
+        if limiter is None or reserved is None:
+            return
+        limiter.settle(reserved, 0)  # A failed request used no tokens
+        if is_rate_limit_error(error):
+            limiter.throttle(error_headers(error))
+
+
+def rate_limit_callbacks(provider: str) -> List[BaseCallbackHandler]:
+    """Callbacks for a chat model of this provider (empty when limiting is off)"""
+    return [RateLimitCallback(provider)] if get_limiter(provider) is not None else []
+
+
+def rate_limit_stats() -> Optional[dict]:
+    if not Config.RATE_LIMIT_ENABLED:
+        return None
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
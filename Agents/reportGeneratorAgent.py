@@ -8,9 +8,10 @@ with executive summaries, detailed findings, risk assessments, and actionable re
 from langchain.agents import create_agent
 from Agents.prompts import REPORT_GENERATOR_PROMPT
 from Agents.rate_limit_utils import invoke_with_rate_limit_retry
-from Agents.model_factory import create_model
+from Agents.llm_cache import register_agent
+from Agents.model_factory import create_model, cacheable_system_prompt
+from Agents.structured_output import first_json_object
 import json
-import re
 from datetime import datetime
 
 
@@ -22,8 +23,9 @@ class ReportGeneratorAgent:
         self.agent = create_agent(
             model=self.model,
             tools=[],
-            system_prompt=REPORT_GENERATOR_PROMPT
+            system_prompt=cacheable_system_prompt(REPORT_GENERATOR_PROMPT, self.model)
         )
+        register_agent(self.agent, self.model, REPORT_GENERATOR_PROMPT, [])
     
     def generate(self, analysis_result: dict) -> dict:
         """
@@ -46,21 +48,12 @@ Create a professional report that explains the findings in clear, accessible lan
         
         response = invoke_with_rate_limit_retry(self.agent, {
             "messages": [{"role": "user", "content": prompt}]
-        })
+        }, agent_name="report_generator")
         
         content = response["messages"][-1].content if "messages" in response else str(response)
         
-        # Try to parse structured report if agent returns JSON
-        try:
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                structured_report = json.loads(match.group())
-                return self._build_report(analysis_result, structured_report, content)
-        except json.JSONDecodeError:
-            pass
-        
-        # Fallback: use the text content as the report
-        return self._build_report(analysis_result, None, content)
+        # The report is free-form text; use its JSON object if the agent returned one
+        return self._build_report(analysis_result, first_json_object(content), content)
     
     def _build_report(self, analysis: dict, structured: dict = None, text_content: str = "") -> dict:
         """Build the final report structure"""
@@ -3,10 +3,39 @@ Search utilities with logging for transparency.
 
 This module provides search functionality using the Perplexity API with comprehensive
 logging for transparency and debugging. All search operations are tracked and can be reviewed.
+Requests are paced by the shared Perplexity rate limiter, and 429s are retried.
 """
 import requests
 from config import Config
 from datetime import datetime
+from typing import Optional
+from Agents.rate_limit_utils import CallCounter
+from Agents.rate_limiter import backoff_delay, estimate_tokens, get_limiter, retry_after_seconds
+from Agents.cache_utils import TwoTierCache, make_cache_key
+from Agents.http_client import get_http_session, http_timeout
+from Agents.single_flight import SingleFlight
+from contextlib import contextmanager
+from contextvars import ContextVar
+import re
+import time
+
+
+# Search log of the scan running in the current context (None outside a scan)
+_scan_logs = ContextVar("scan_search_logs", default=None)
+
+
+@contextmanager
+def scan_search_log():
+    """
+    Give the searches of one scan their own log, so concurrent scans neither clear
+    nor mix each other's search_logs. Worker threads started by the scan must run in
+    a copy of its context (contextvars.copy_context, asyncio.to_thread).
+    """
+    token = _scan_logs.set([])
+    try:
+        yield
+    finally:
+        _scan_logs.reset(token)
 
 
 class SearchLogger:
@@ -17,18 +46,27 @@ class SearchLogger:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.logs = []
+            cls._instance._logs = []  # Searches made outside any scan (CLI)
             cls._instance.verbose = True
         return cls._instance
     
-    def log(self, query: str, success: bool, result_preview: str = None, error: str = None):
+    @property
+    def logs(self) -> list:
+        """The current scan's log, or the process-wide one outside a scan"""
+        scan_logs = _scan_logs.get()
+        return self._logs if scan_logs is None else scan_logs
+    
+    def log(self, query: str, success: bool, result_preview: str = None, error: str = None,
+            cached: bool = False, coalesced: bool = False):
         """Log a search operation"""
         entry = {
             "timestamp": datetime.now().isoformat(),
             "query": query[:100] + "..." if len(query) > 100 else query,
             "success": success,
             "result_preview": result_preview,
-            "error": error
+            "error": error,
+            "cached": cached,
+            "coalesced": coalesced
         }
         self.logs.append(entry)
         
@@ -38,7 +76,8 @@ class SearchLogger:
     def _print_log(self, entry: dict):
         """Print log entry to console"""
         status = "✅" if entry["success"] else "❌"
-        print(f"\n    {status} [SEARCH] {entry['timestamp']}")
+        source = " (cached)" if entry.get("cached") else " (coalesced)" if entry.get("coalesced") else ""
+        print(f"\n    {status} [SEARCH{source}] {entry['timestamp']}")
         print(f"       Query: {entry['query']}")
         if entry["success"] and entry["result_preview"]:
             preview = entry["result_preview"][:150] + "..." if len(entry["result_preview"]) > 150 else entry["result_preview"]
@@ -48,33 +87,222 @@ class SearchLogger:
     
     def get_logs(self) -> list:
         """Get all logs"""
-        return self.logs
+        return list(self.logs)
     
     def clear(self):
         """Clear logs"""
-        self.logs = []
+        self.logs.clear()
     
     def summary(self) -> dict:
         """Get summary of search operations"""
-        total = len(self.logs)
-        successful = sum(1 for l in self.logs if l["success"])
+        logs = list(self.logs)
+        total = len(logs)
+        successful = sum(1 for l in logs if l["success"])
         failed = total - successful
+        cached = sum(1 for l in logs if l.get("cached"))
+        coalesced = sum(1 for l in logs if l.get("coalesced"))
         return {
             "total_searches": total,
             "successful": successful,
             "failed": failed,
-            "success_rate": f"{(successful/total*100):.1f}%" if total > 0 else "N/A"
+            "success_rate": f"{(successful/total*100):.1f}%" if total > 0 else "N/A",
+            "cached": cached,
+            "coalesced": coalesced,
+            "cache": search_cache.stats() if search_cache else None,
+            "coalescing": search_flight.stats()
         }
 
 
 # Global logger instance
 search_logger = SearchLogger()
 
+# Cumulative count of Perplexity API requests (unaffected by search logs)
+search_call_counter = CallCounter()
+
+# Coalesces concurrent identical searches into one upstream request
+search_flight = SingleFlight("search")
+
+# Persistent search result cache (None when disabled)
+search_cache = TwoTierCache(
+    Config.SEARCH_CACHE_PATH,
+    table="search_cache",
+    memory_entries=Config.SEARCH_CACHE_MEMORY_ENTRIES,
+    max_entries=Config.SEARCH_CACHE_MAX_ENTRIES
+) if Config.SEARCH_CACHE_ENABLED else None
+
+
+def _normalize_query(query: str) -> str:
+    """Fold case and whitespace so trivially different queries share a cache entry"""
+    return re.sub(r'\s+', ' ', query).strip().casefold()
+
+
+def _search_cache_key(query: str, context: str) -> str:
+    return make_cache_key(_normalize_query(query), context, Config.PERPLEXITY_MODEL)
+
+
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+
+
+def _prepare_search(query: str, context: str, max_length: int) -> tuple:
+    """Truncate the query and look it up in the cache. Returns (query, cache_key, cached_result)."""
+    # Truncate query to avoid excessive token usage
+    if len(query) > max_length:
+        query = query[:max_length] + "..."
+        print(f"⚠️ Query truncated to {max_length} characters")
+    
+    # Serve repeat queries from the cache
+    cache_key = _search_cache_key(query, context) if search_cache else None
+    if cache_key:
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            search_logger.log(
+                query=query,
+                success=True,
+                result_preview=cached[:200],
+                cached=True
+            )
+            return query, cache_key, cached
+    return query, cache_key, None
+
+
+def _build_search_request(query: str, context: str) -> tuple:
+    """Build (headers, payload) for a Perplexity chat completion"""
+    headers = {
+        "Authorization": f"Bearer {Config.PERPLEXITY_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    
+    # Customize prompt based on context - keep prompts concise
+    if context == "fact-check":
+        prompt = f"Briefly fact-check with sources: {query}"
+    elif context == "source-reputation":
+        prompt = f"Credibility of {query}? Brief summary."
+    elif context == "media-verification":
+        prompt = f"Is this media authentic or manipulated: {query}"
+    else:
+        prompt = query
+    
+    payload = {
+        "model": Config.PERPLEXITY_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": 500  # Limit response length to reduce costs
+    }
+    return headers, payload
+
+
+def _finish_search(query: str, context: str, cache_key: str, result: dict) -> str:
+    """Extract, log and cache the content of a successful response"""
+    content = result["choices"][0]["message"]["content"]
+    
+    # Log successful search
+    search_logger.log(
+        query=query,
+        success=True,
+        result_preview=content[:200] if content else "Empty response"
+    )
+    
+    if cache_key and content:
+        search_cache.set(cache_key, content, Config.get_search_cache_ttl(context))
+    
+    return content
+
+
+def _fail_search(query: str, error_msg: str) -> str:
+    search_logger.log(query=query, success=False, error=error_msg)
+    return f"Search error: {error_msg}"
+
+
+def _log_coalesced(query: str, result: str):
+    """Log a search answered by another caller's identical in-flight request"""
+    success = not result.startswith("Search error:")
+    search_logger.log(
+        query=query,
+        success=success,
+        result_preview=result[:200] if success else None,
+        error=None if success else result,
+        coalesced=True
+    )
+
+
+def _search_tokens(payload: dict) -> int:
+    """Token reservation for one search: the prompt estimate plus the max_tokens answer"""
+    return estimate_tokens(payload["messages"][0]["content"], payload["max_tokens"])
+
+
+def _throttle_delay(response, attempt: int, tokens: int) -> Optional[float]:
+    """
+    Feed a response's rate limit headers to the limiter.
+    
+    Returns:
+        Seconds to wait before retrying a 429, or None to keep the response
+    """
+    limiter = get_limiter("perplexity")
+    if response.status_code != 429:
+        if limiter is not None:
+            limiter.observe_headers(response.headers)
+        return None
+    if limiter is not None:
+        limiter.settle(tokens, 0)
+        retry_after = limiter.throttle(response.headers)
+    else:
+        retry_after = retry_after_seconds(response.headers)
+    if attempt >= Config.RATE_LIMIT_MAX_RETRIES:
+        return None
+    delay = backoff_delay(attempt, retry_after)
+    print(f"  ⏳ Search rate limited, waiting {delay:.1f}s before retry ({attempt + 1}/{Config.RATE_LIMIT_MAX_RETRIES})...")
+    return delay
+
+
+def _settle_search(tokens: int, result: dict):
+    """Correct the token reservation with the usage Perplexity reported"""
+    limiter = get_limiter("perplexity")
+    used = (result.get("usage") or {}).get("total_tokens")
+    if limiter is not None and used is not None:
+        limiter.settle(tokens, used)
+
+
+def _request_search(query: str, context: str, cache_key: str) -> str:
+    """Perform one upstream Perplexity request (sync), retrying 429s"""
+    try:
+        headers, payload = _build_search_request(query, context)
+        limiter = get_limiter("perplexity")
+        tokens = _search_tokens(payload)
+        
+        for attempt in range(Config.RATE_LIMIT_MAX_RETRIES + 1):
+            if limiter is not None:
+                limiter.acquire(tokens)
+            search_call_counter.increment()
+            response = get_http_session().post(
+                PERPLEXITY_URL, headers=headers, json=payload, timeout=http_timeout()
+            )
+            delay = _throttle_delay(response, attempt, tokens)
+            if delay is None:
+                break
+            time.sleep(delay)
+        response.raise_for_status()
+        
+        result = response.json()
+        _settle_search(tokens, result)
+        return _finish_search(query, context, cache_key, result)
+        
+    except requests.exceptions.Timeout:
+        return _fail_search(query, f"Search timed out after {Config.HTTP_READ_TIMEOUT} seconds")
+        
+    except requests.exceptions.HTTPError as e:
+        return _fail_search(query, f"HTTP error: {e.response.status_code}")
+        
+    except Exception as e:
+        return _fail_search(query, str(e))
+
 
 def perplexity_search(query: str, context: str = "general", max_length: int = 150) -> str:
     """
     Search using Perplexity API with logging and rate limiting.
     
+    Uses the process-wide pooled session, so concurrent searches reuse
+    keep-alive connections instead of a new TCP+TLS handshake each.
+    Concurrent identical searches are coalesced into one upstream request.
+    
     Args:
         query: Search query (will be truncated if too long)
         context: Context for the search (fact-check, source-reputation, etc.)
@@ -84,62 +312,20 @@ def perplexity_search(query: str, context: str = "general", max_length: int = 15
         Search results or error message
     """
     try:
-        # Truncate query to avoid excessive token usage
-        if len(query) > max_length:
-            query = query[:max_length] + "..."
-            print(f"⚠️ Query truncated to {max_length} characters")
-        
-        url = "https://api.perplexity.ai/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {Config.PERPLEXITY_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        query, cache_key, cached = _prepare_search(query, context, max_length)
+        if cached is not None:
+            return cached
         
-        # Customize prompt based on context - keep prompts concise
-        if context == "fact-check":
-            prompt = f"Briefly fact-check with sources: {query}"
-        elif context == "source-reputation":
-            prompt = f"Credibility of {query}? Brief summary."
-        elif context == "media-verification":
-            prompt = f"Is this media authentic or manipulated: {query}"
-        else:
-            prompt = query
-        
-        payload = {
-            "model": "sonar",
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 500  # Limit response length to reduce costs
-        }
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
-        
-        result = response.json()
-        content = result["choices"][0]["message"]["content"]
-        
-        # Log successful search
-        search_logger.log(
-            query=query,
-            success=True,
-            result_preview=content[:200] if content else "Empty response"
+        flight_key = cache_key or _search_cache_key(query, context)
+        result, is_leader = search_flight.do(
+            flight_key, lambda: _request_search(query, context, cache_key)
         )
-        
-        return content
-        
-    except requests.exceptions.Timeout:
-        error_msg = "Search timed out after 30 seconds"
-        search_logger.log(query=query, success=False, error=error_msg)
-        return f"Search error: {error_msg}"
-        
-    except requests.exceptions.HTTPError as e:
-        error_msg = f"HTTP error: {e.response.status_code}"
-        search_logger.log(query=query, success=False, error=error_msg)
-        return f"Search error: {error_msg}"
+        if not is_leader:
+            _log_coalesced(query, result)
+        return result
         
     except Exception as e:
-        error_msg = str(e)
-        search_logger.log(query=query, success=False, error=error_msg)
-        return f"Search error: {error_msg}"
+        return _fail_search(query, str(e))
 
 
 def print_search_summary():
@@ -152,4 +338,8 @@ def print_search_summary():
     print(f"Successful: {summary['successful']}")
     print(f"Failed: {summary['failed']}")
     print(f"Success Rate: {summary['success_rate']}")
+    if summary.get("cache"):
+        cache = summary["cache"]
+        print(f"Served from cache: {summary['cached']}")
+        print(f"Cache hit rate (process): {cache['hit_rate']} ({cache['hits']} hits / {cache['misses']} misses)")
     print("=" * 40)
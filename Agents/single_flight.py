@@ -0,0 +1,74 @@
+"""
+Single-flight request coalescing
+Collapses concurrent identical calls into one upstream call.
+
+When several threads ask for the same key at the same time, only the first
+one (the leader) runs the function; the others wait for it and share its result or
+exception. Nothing is cached after the leader finishes - that is the caches' job.
+"""
+from typing import Any, Callable, Tuple
+import threading
+
+
+class _Call:
+    """An in-flight call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key among concurrent callers.
+
+        Returns:
+            (result, is_leader) - is_leader is False when the result was shared
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, True
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.executions + self.coalesced
+            return {
+                "upstream_calls": self.executions,
+                "coalesced_calls": self.coalesced,
+                "in_flight": len(self._calls),
+                "coalesced_rate": f"{(self.coalesced / total * 100):.1f}%" if total else "N/A"
+            }
@@ -10,9 +10,9 @@ from langchain_core.tools import tool
 from Agents.prompts import SOURCE_ANALYZER_PROMPT
 from Agents.search_utils import perplexity_search
 from Agents.rate_limit_utils import invoke_with_rate_limit_retry
-from Agents.model_factory import create_model
-import json
-import re
+from Agents.llm_cache import register_agent
+from Agents.model_factory import create_model, cacheable_system_prompt
+from Agents.structured_output import StructuredOutput, SourceReputation
 
 
 class SourceAnalyzerAgent:
@@ -20,6 +20,7 @@ class SourceAnalyzerAgent:
     
     def __init__(self, model=None):
         self.model = model or create_model()
+        self.output = StructuredOutput(self.model, SourceReputation, "source_analyzer")
         self._setup_agent()
     
     def _setup_agent(self):
@@ -31,29 +32,29 @@ class SourceAnalyzerAgent:
         self.agent = create_agent(
             model=self.model,
             tools=[search_source_reputation],
-            system_prompt=SOURCE_ANALYZER_PROMPT
+            system_prompt=cacheable_system_prompt(SOURCE_ANALYZER_PROMPT, self.model),
+            response_format=self.output.response_format
         )
+        register_agent(self.agent, self.model, SOURCE_ANALYZER_PROMPT, [search_source_reputation],
+                       self.output.response_format)
     
     def analyze(self, url_or_publisher: str) -> dict:
         """Analyze source reputation"""
         response = invoke_with_rate_limit_retry(self.agent, {
             "messages": [{"role": "user", "content": f"Analyze this source: {url_or_publisher}"}]
-        })
+        }, agent_name="source_analyzer", validate=self.output.is_valid)
         
-        content = response["messages"][-1].content if "messages" in response else str(response)
-        
-        try:
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                return json.loads(match.group())
-        except json.JSONDecodeError:
-            pass
+        result = self.output.parse(response)
+        if result is not None:
+            return result
         
+        # Parse failure: neutral placeholder, flagged so it is never stored as a rating
         return {
             "publisher_name": url_or_publisher,
             "domain_rating_score": 50,
             "trust_history_flags": 0,
             "ownership_structure": "Unknown",
             "bias_source": None,
-            "credibility_score": {"value": 50, "rating_text": "Medium", "color_code": "#F59E0B"}
+            "credibility_score": {"value": 50, "rating_text": "Medium", "color_code": "#F59E0B"},
+            "fallback": True
         }
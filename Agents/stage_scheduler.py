@@ -0,0 +1,145 @@
+"""
+Stage Scheduler
+Runs pipeline stages as a dependency graph with a shared concurrency budget.
+
+Each stage declares the stages it depends on and is started as soon as all of them
+have finished, so independent stages (source, bias, media) overlap with claim
+fact-checking instead of running one after another. LLM-bound work acquires a slot
+from a single shared budget, and every stage records its own timing.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable
+import contextvars
+import threading
+import time
+
+
+class Stage:
+    """A single node in the pipeline graph"""
+
+    def __init__(self, name: str, func: Callable, deps: Iterable[str] = (), uses_budget: bool = True):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.uses_budget = uses_budget
+
+
+class StageScheduler:
+    """
+    Dependency-graph scheduler for pipeline stages.
+
+    Stage functions are called with the results of their dependencies as keyword
+    arguments. Stages that only coordinate other work (e.g. parallel claim checks)
+    should set uses_budget=False and acquire the budget per unit of work instead.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self._budget = threading.BoundedSemaphore(self.max_concurrency)
+        self._stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, dict] = {}
+        self._timings_lock = threading.Lock()
+
+    def add(self, name: str, func: Callable, deps: Iterable[str] = (), uses_budget: bool = True):
+        """Register a stage"""
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self._stages[name] = Stage(name, func, deps, uses_budget)
+        return self
+
+    @contextmanager
+    def budget(self):
+        """Hold one slot of the shared concurrency budget"""
+        self._budget.acquire()
+        try:
+            yield
+        finally:
+            self._budget.release()
+
+    def _validate(self):
+        """Ensure every dependency exists and the graph is acyclic"""
+        for stage in self._stages.values():
+            for dep in stage.deps:
+                if dep not in self._stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self._stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self._stages:
+            visit(name)
+
+    def _run_stage(self, stage: Stage, results: dict, origin: float):
+        """Execute one stage and record its timing"""
+        kwargs = {dep: results[dep] for dep in stage.deps}
+        queued_at = time.perf_counter()
+
+        if stage.uses_budget:
+            self._budget.acquire()
+        started_at = time.perf_counter()
+        try:
+            return stage.func(**kwargs)
+        finally:
+            if stage.uses_budget:
+                self._budget.release()
+            finished_at = time.perf_counter()
+            with self._timings_lock:
+                self.timings[stage.name] = {
+                    "start_ms": int((started_at - origin) * 1000),
+                    "end_ms": int((finished_at - origin) * 1000),
+                    "duration_ms": int((finished_at - started_at) * 1000),
+                    "wait_ms": int((started_at - queued_at) * 1000)
+                }
+
+    def run(self) -> dict:
+        """
+        Run all stages, starting each as soon as its dependencies are done.
+
+        Returns:
+            Dictionary mapping stage name to its result
+
+        Raises:
+            The first exception raised by any stage (pending stages are cancelled)
+        """
+        self._validate()
+
+        results = {}
+        pending = dict(self._stages)
+        running = {}
+        origin = time.perf_counter()
+
+        # One thread per stage: threads only wait, the budget bounds real work
+        with ThreadPoolExecutor(max_workers=max(1, len(self._stages))) as executor:
+            while pending or running:
+                ready = [s for s in pending.values() if all(d in results for d in s.deps)]
+                for stage in ready:
+                    del pending[stage.name]
+                    # Stages run in the caller's context (e.g. its scan's search log)
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, self._run_stage, stage, results, origin)] = stage.name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        return results
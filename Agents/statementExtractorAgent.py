@@ -4,27 +4,127 @@ Extracts individual factual statements from input text.
 
 This agent parses input text to identify and extract verifiable factual claims,
 filtering out opinions and non-factual content for subsequent fact-checking.
+
+Long documents are handled map-reduce style: the text is split on paragraph
+boundaries into chunks, statements are extracted from every chunk in parallel, and
+the combined list is deduplicated and ranked down to max_statements. Cost grows
+linearly with document length while wall time stays close to a single call. Given
+the pipeline's shared budget, every chunk call holds one slot of it.
+
+The local check-worthiness pre-filter (on by default) skips the LLM for inputs with
+nothing checkable in them - questions, greetings, instructions, personal taste - and
+trims documents longer than one chunk to their most check-worthy sentences. Short
+inputs with anything checkable are extracted as given.
 """
 from langchain.agents import create_agent
 from Agents.prompts import STATEMENT_EXTRACTOR_PROMPT
 from Agents.rate_limit_utils import invoke_with_rate_limit_retry
-from Agents.model_factory import create_model
-import json
+from Agents.llm_cache import register_agent
+from Agents.model_factory import create_model, cacheable_system_prompt
+from Agents.structured_output import StructuredOutput, ExtractedStatements
+from Agents.claim_cache import normalize_claim
+from Agents.check_worthiness import select_candidates, split_sentences
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from typing import List
+import contextvars
 import re
 
 
+def split_into_chunks(text: str, chunk_chars: int) -> List[str]:
+    """
+    Split text on paragraph boundaries into chunks of at most chunk_chars.
+
+    Paragraphs longer than a chunk are split on sentence boundaries, and sentences
+    longer than a chunk are hard-wrapped, so no text is dropped.
+    """
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n|\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= chunk_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            while len(sentence) > chunk_chars:
+                pieces.append(sentence[:chunk_chars])
+                sentence = sentence[chunk_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > chunk_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _specificity(statement: str) -> float:
+    """Rough check-worthiness: numbers, dates and named entities make claims verifiable"""
+    score = 0.0
+    if re.search(r'\d', statement):
+        score += 1.0
+    # Capitalized words after the first one are likely names, places or organizations
+    names = [word for word in statement.split()[1:] if word[:1].isupper()]
+    score += min(len(names), 3) * 0.25
+    return score
+
+
+def rank_statements(chunk_results: List[List[str]], max_statements: int) -> List[str]:
+    """
+    Merge per-chunk statements, dropping duplicates and keeping the best max_statements.
+
+    Statements are ranked by how many chunks repeated them, then by specificity, then
+    by their rank within their chunk (the extractor lists key claims first); ties keep
+    document order. The result is returned in document order.
+    """
+    merged = {}  # normalized -> candidate
+    for chunk_index, statements in enumerate(chunk_results):
+        for rank, statement in enumerate(statements):
+            key = normalize_claim(statement)
+            if not key:
+                continue
+            candidate = merged.get(key)
+            if candidate is None:
+                merged[key] = {
+                    "text": statement,
+                    "support": 1,
+                    "rank": rank,
+                    "position": (chunk_index, rank)
+                }
+            else:
+                candidate["support"] += 1
+                candidate["rank"] = min(candidate["rank"], rank)
+
+    candidates = list(merged.values())
+    candidates.sort(key=lambda c: (-c["support"], -_specificity(c["text"]), c["rank"], c["position"]))
+    selected = sorted(candidates[:max_statements], key=lambda c: c["position"])
+    return [c["text"] for c in selected]
+
+
 class StatementExtractorAgent:
     """Agent that extracts factual statements from text"""
     
-    def __init__(self, model=None):
+    def __init__(self, model=None, chunk_chars: int = None, max_concurrency: int = None):
         self.model = model or create_model()
+        self.chunk_chars = chunk_chars or Config.EXTRACTION_CHUNK_CHARS
+        self.max_concurrency = max(1, max_concurrency or Config.EXTRACTION_CONCURRENCY)
+        self.output = StructuredOutput(self.model, ExtractedStatements, "statement_extractor")
         self.agent = create_agent(
             model=self.model,
             tools=[],
-            system_prompt=STATEMENT_EXTRACTOR_PROMPT
+            system_prompt=cacheable_system_prompt(STATEMENT_EXTRACTOR_PROMPT, self.model),
+            response_format=self.output.response_format
         )
+        register_agent(self.agent, self.model, STATEMENT_EXTRACTOR_PROMPT, [], self.output.response_format)
     
-    def extract(self, text: str, max_statements: int = 5) -> list:
+    def extract(self, text: str, max_statements: int = 5, budget=None) -> list:
         """
         Extract individual factual statements from input text.
         
@@ -32,47 +132,55 @@ class StatementExtractorAgent:
             text: Input text to analyze
             max_statements: Maximum number of statements to extract (default: 5)
                            Helps avoid rate limits by reducing API calls
+            budget: Optional context manager factory limiting concurrent LLM work,
+                    acquired once per chunk call
         
         Returns:
             List of factual statements (limited to max_statements)
         """
-        # Truncate very long text to avoid excessive token usage
-        if len(text) > 5000:
-            text = text[:5000] + "..."
-            print(f"⚠️ Text truncated to 5000 characters to reduce API usage")
+        if Config.CHECK_WORTHINESS_ENABLED:
+            # Only long documents are trimmed; short inputs go to the extractor as given
+            limit = Config.CHECK_WORTHINESS_MAX_SENTENCES if len(text) > self.chunk_chars else None
+            candidates, total = select_candidates(text, max_sentences=limit)
+            if not candidates:
+                print(f"  → No checkable claims in {total} sentences (local pre-filter), skipping extraction")
+                return []
+            if len(candidates) < total:
+                print(f"  → Pre-filter kept {len(candidates)} of {total} sentences")
+                text = "\n".join(candidates)
         
+        if len(text) <= self.chunk_chars:
+            return self._extract_budgeted(text, max_statements, budget)
+        
+        chunks = split_into_chunks(text, self.chunk_chars)
+        print(f"  → Long document ({len(text)} chars): extracting from {len(chunks)} chunks in parallel")
+        # Ask each chunk for its own top claims; the ranking picks the overall best
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(chunks))) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._extract_budgeted, chunk, max_statements, budget)
+                for chunk in chunks
+            ]
+            chunk_results = [future.result() for future in futures]
+        return rank_statements(chunk_results, max_statements)
+    
+    def _extract_budgeted(self, text: str, max_statements: int, budget) -> list:
+        """_extract_chunk holding one slot of the shared budget, if any"""
+        if budget is not None:
+            with budget():
+                return self._extract_chunk(text, max_statements)
+        return self._extract_chunk(text, max_statements)
+    
+    def _extract_chunk(self, text: str, max_statements: int) -> list:
+        """One extractor call over a chunk that fits the prompt"""
         response = invoke_with_rate_limit_retry(self.agent, {
             "messages": [{"role": "user", "content": f"Extract up to {max_statements} key factual statements from:\n\n{text}"}]
-        })
-        
-        content = response["messages"][-1].content if "messages" in response else str(response)
+        }, agent_name="statement_extractor", validate=self.output.is_valid)
         
-        try:
-            match = re.search(r'\[.*\]', content, re.DOTALL)
-            if match:
-                parsed = json.loads(match.group())
-                # Ensure we have a flat list of strings
-                if isinstance(parsed, list):
-                    statements = []
-                    for item in parsed:
-                        if isinstance(item, str):
-                            statements.append(item)
-                        elif isinstance(item, dict) and 'statement' in item:
-                            statements.append(item['statement'])
-                        elif isinstance(item, dict) and 'text' in item:
-                            statements.append(item['text'])
-                        elif isinstance(item, list):
-                            # Flatten nested lists
-                            for subitem in item:
-                                if isinstance(subitem, str):
-                                    statements.append(subitem)
-                    if statements:
-                        # Limit to max_statements to reduce subsequent API calls
-                        return statements[:max_statements]
-        except (json.JSONDecodeError, TypeError, KeyError):
-            pass
+        parsed = self.output.parse(response)
+        if parsed and parsed["statements"]:
+            # Limit to max_statements to reduce subsequent API calls
+            return parsed["statements"][:max_statements]
         
         # Fallback: split by sentences and limit
-        sentences = re.split(r'[.!?]+', text)
-        filtered = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
+        filtered = [s for s in split_sentences(text) if len(s) > 10]
         return filtered[:max_statements]
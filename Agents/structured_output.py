@@ -0,0 +1,352 @@
+"""
+Structured Output
+Typed schemas and one shared parsing path for every agent's JSON answer.
+
+Agents are created with their schema as response_format, so providers that support
+it return schema-constrained output (native JSON mode or a structured-output tool
+call). Answers that arrive as text are scanned for JSON values in order - fenced
+blocks first, then each balanced object/array - and the first one that validates
+wins. When nothing validates, one targeted re-ask sends the broken answer and the
+validation error back to the model (no tools, no pipeline rerun) before the agent
+falls back to its defaults. How each answer was obtained is counted per agent, so
+fallbacks (wasted LLM calls) show up in /health.
+"""
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, ValidationError
+from typing import Annotated, Any, Iterator, List, Literal, Optional, Type
+from langchain.agents import create_agent
+from Agents.rate_limit_utils import invoke_with_rate_limit_retry
+from Agents.llm_cache import register_agent
+from Agents.model_factory import cacheable_system_prompt
+from Agents.prompts import JSON_REPAIR_PROMPT
+from config import Config
+import json
+import re
+import threading
+
+
+def _round_score(value):
+    """LLMs write scores as 72.5 or "72"; keep them whole numbers"""
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+    try:
+        return round(float(value))
+    except (TypeError, ValueError):
+        return value
+
+
+def _upper(value):
+    """'Missing context' -> 'MISSING_CONTEXT'"""
+    return re.sub(r'[\s-]+', '_', value.strip().upper()) if isinstance(value, str) else value
+
+
+def _bias_label(value):
+    """'center left', 'Center_Left' -> 'Center-Left'"""
+    if not isinstance(value, str):
+        return value
+    return "-".join(word.capitalize() for word in re.split(r'[\s_-]+', value.strip()) if word)
+
+
+Score = Annotated[int, BeforeValidator(_round_score), Field(ge=0, le=100)]
+Probability = Annotated[float, Field(ge=0.0, le=1.0)]
+Count = Annotated[int, BeforeValidator(_round_score), Field(ge=0)]
+
+
+class _Schema(BaseModel):
+    # Agents may add fields beyond the documented ones; keep them
+    model_config = ConfigDict(extra="allow")
+
+
+# Claims
+
+def _flatten_statements(value):
+    """["a", {"statement": "b"}, ["c"]] -> ["a", "b", "c"]"""
+    if not isinstance(value, list):
+        return value
+    statements = []
+    for item in value:
+        if isinstance(item, str):
+            statements.append(item)
+        elif isinstance(item, dict) and isinstance(item.get("statement") or item.get("text"), str):
+            statements.append(item.get("statement") or item.get("text"))
+        elif isinstance(item, list):
+            statements.extend(s for s in item if isinstance(s, str))
+    return [s.strip() for s in statements if s.strip()]
+
+
+class ExtractedStatements(_Schema):
+    statements: Annotated[List[str], BeforeValidator(_flatten_statements)]
+
+
+class VerificationSource(_Schema):
+    name: Optional[str] = None
+    url: Optional[str] = None
+
+
+def _source_object(value):
+    """A bare "Reuters" or URL string -> {"name": ...} / {"url": ...}"""
+    if isinstance(value, str):
+        return {"url": value} if value.startswith("http") else {"name": value}
+    return value
+
+
+class ClaimVerdict(_Schema):
+    id: Optional[str] = None
+    text: Optional[str] = None
+    status: Annotated[Literal["VERIFIED", "DEBUNKED", "MISLEADING", "MISSING_CONTEXT", "UNVERIFIABLE"],
+                      BeforeValidator(_upper)]
+    confidence: Probability = 0.5
+    verification_source: Annotated[Optional[VerificationSource], BeforeValidator(_source_object)] = None
+    note: Optional[str] = None
+    positive_count: Count = 0
+    negative_count: Count = 0
+    positive_evidence: List[Any] = []  # Strings, or {source, summary} objects from some models
+    negative_evidence: List[Any] = []
+
+
+class ClaimVerdictBatch(_Schema):
+    # Items are validated one by one (ClaimVerdict) so one bad verdict doesn't sink the batch
+    verdicts: List[dict]
+
+
+# Source
+
+class CredibilityScore(_Schema):
+    value: Score
+    rating_text: str = "Medium"
+    color_code: str = "#F59E0B"
+
+
+class SourceReputation(_Schema):
+    publisher_name: str
+    domain_rating_score: Score
+    trust_history_flags: Count = 0
+    ownership_structure: str = "Unknown"
+    bias_source: Optional[str] = None
+    credibility_score: CredibilityScore
+
+
+# Bias
+
+class BiasScore(_Schema):
+    label: str
+    value: Score
+
+
+class PoliticalBias(_Schema):
+    rating: Annotated[Literal["Far-Left", "Left", "Center-Left", "Center", "Center-Right", "Right", "Far-Right"],
+                      BeforeValidator(_bias_label)]
+    confidence: Probability
+    score_distribution: List[BiasScore]
+    indicators: List[str] = []
+
+
+# Media
+
+class MediaAsset(_Schema):
+    id: Optional[str] = None
+    type: Optional[str] = None
+    url: Optional[str] = None
+    ai_probability: Probability = 0.0
+    is_deepfake: bool = False
+    forensics: dict = {}
+
+
+class MediaAnalysis(_Schema):
+    assets: List[MediaAsset] = []
+    deepfake_probability_avg: Probability = 0.0
+
+
+# Verdict
+
+class ContributingFactor(_Schema):
+    module: str
+    severity: Annotated[Literal["LOW", "MEDIUM", "HIGH", "CRITICAL"], BeforeValidator(_upper)]
+    message: str
+    details_link: Optional[str] = None
+
+
+class FinalVerdict(_Schema):
+    status: Annotated[Literal["ACCURATE", "INACCURATE", "MISLEADING", "UNVERIFIABLE"], BeforeValidator(_upper)]
+    label: str
+    overall_score: Score
+    confidence_score: Probability
+    summary_statement: str
+    contributing_factors: List[ContributingFactor] = []
+
+
+# Parsing
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL | re.IGNORECASE)
+_MAX_JSON_STARTS = 50  # Bracket positions tried per answer
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_values(content: str) -> Iterator[Any]:
+    """
+    JSON values found in a model answer, most likely first: the whole answer, fenced
+    blocks, then the value starting at each '{' or '[' in order (raw_decode stops at
+    the end of that value, unlike a greedy regex).
+    """
+    content = (content or "").strip()
+    if not content:
+        return
+    try:
+        yield json.loads(content)
+    except json.JSONDecodeError:
+        pass
+    for block in _FENCE_RE.findall(content):
+        try:
+            yield json.loads(block)
+        except json.JSONDecodeError:
+            pass
+    starts = [m.start() for m in re.finditer(r'[\[{]', content)][:_MAX_JSON_STARTS]
+    for start in starts:
+        try:
+            value, _ = _decoder.raw_decode(content, start)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, (dict, list)):
+            yield value
+
+
+def first_json_object(content: str) -> Optional[dict]:
+    """First JSON object in a free-form answer (no schema), or None"""
+    return next((v for v in iter_json_values(content) if isinstance(v, dict)), None)
+
+
+def _response_text(response) -> str:
+    if isinstance(response, dict) and response.get("messages"):
+        content = response["messages"][-1].content
+    else:
+        content = str(response)
+    if isinstance(content, list):  # Content blocks
+        content = "".join(b.get("text", "") if isinstance(b, dict) else str(b) for b in content)
+    return content or ""
+
+
+_counts = {}  # agent name -> {"native", "text", "repaired", "fallback"}
+_counts_lock = threading.Lock()
+
+
+def _count(agent_name: str, outcome: str):
+    with _counts_lock:
+        counts = _counts.setdefault(agent_name, {"native": 0, "text": 0, "repaired": 0, "fallback": 0})
+        counts[outcome] += 1
+
+
+class StructuredOutput:
+    """Schema, response_format and parser for one agent's answers"""
+
+    def __init__(self, model, schema: Type[BaseModel], agent_name: str):
+        self.model = model
+        self.schema = schema
+        self.agent_name = agent_name
+        self._repair_agent = None
+        self._repair_lock = threading.Lock()
+
+    @property
+    def response_format(self) -> Optional[Type[BaseModel]]:
+        """Schema for create_agent(response_format=...), or None when native output is off"""
+        return self.schema if Config.STRUCTURED_OUTPUT_NATIVE else None
+
+    def validate(self, data: Any) -> dict:
+        """Validate data against the schema; raises ValidationError"""
+        if isinstance(data, BaseModel):
+            data = data.model_dump()
+        fields = list(self.schema.model_fields)
+        if isinstance(data, list) and len(fields) == 1:
+            data = {fields[0]: data}  # A bare array for a single-list schema
+        return self.schema.model_validate(data).model_dump()
+
+    def _from_text(self, content: str) -> tuple:
+        """(validated dict or None, last error message)"""
+        error = "no JSON value found"
+        for value in iter_json_values(content):
+            try:
+                return self.validate(value), None
+            except ValidationError as e:
+                error = str(e)
+        return None, error
+
+    def _parse_direct(self, response) -> tuple:
+        """(validated dict or None, "native" or "text", answer text, last error) without a re-ask"""
+        structured = response.get("structured_response") if isinstance(response, dict) else None
+        if structured is not None:
+            try:
+                return self.validate(structured), "native", None, None
+            except ValidationError:
+                pass
+        content = _response_text(response)
+        result, error = self._from_text(content)
+        return result, "text", content, error
+
+    def is_valid(self, response) -> bool:
+        """Whether the response holds a schema-valid answer as is (gates the LLM response cache)"""
+        return self._parse_direct(response)[0] is not None
+
+    def parse(self, response, repair: bool = None) -> Optional[dict]:
+        """
+        Validated answer from an agent response, or None when the agent should use
+        its defaults.
+
+        Args:
+            response: The agent response (dict with "messages", and
+                      "structured_response" when native output was used)
+            repair: Re-ask once on malformed output (default: STRUCTURED_OUTPUT_REPAIR)
+        """
+        result, outcome, content, error = self._parse_direct(response)
+        if result is not None:
+            _count(self.agent_name, outcome)
+            return result
+
+        if repair is None:
+            repair = Config.STRUCTURED_OUTPUT_REPAIR
+        if repair:
+            result = self._repair(content, error)
+            if result is not None:
+                _count(self.agent_name, "repaired")
+                return result
+
+        _count(self.agent_name, "fallback")
+        print(f"  ⚠️ {self.agent_name}: no valid {self.schema.__name__} in the answer, using defaults")
+        return None
+
+    def _repair(self, content: str, error: str) -> Optional[dict]:
+        """One re-ask without tools: fix the previous answer into schema-valid JSON"""
+        if not content.strip():
+            return None
+        prompt = (
+            f"JSON Schema:\n{json.dumps(self.schema.model_json_schema())}\n\n"
+            f"Previous answer:\n{content[:Config.ANALYSIS_CONTEXT_CHARS]}\n\n"
+            f"Rejected because:\n{error[:1000]}"
+        )
+        try:
+            response = invoke_with_rate_limit_retry(self._get_repair_agent(), {
+                "messages": [{"role": "user", "content": prompt}]
+            }, agent_name=f"{self.agent_name}_repair", validate=self.is_valid)
+        except Exception as e:
+            print(f"  ⚠️ {self.agent_name}: JSON repair failed: {e}")
+            return None
+        return self._from_text(_response_text(response))[0]
+
+    def _get_repair_agent(self):
+        with self._repair_lock:
+            if self._repair_agent is None:
+                self._repair_agent = create_agent(
+                    model=self.model,
+                    tools=[],
+                    system_prompt=cacheable_system_prompt(JSON_REPAIR_PROMPT, self.model)
+                )
+                register_agent(self._repair_agent, self.model, JSON_REPAIR_PROMPT, [])
+            return self._repair_agent
+
+
+def structured_output_stats() -> dict:
+    with _counts_lock:
+        agents = {name: dict(counts) for name, counts in _counts.items()}
+    for counts in agents.values():
+        total = sum(counts.values())
+        counts["fallback_rate"] = f"{(counts['fallback'] / total * 100):.1f}%" if total else "N/A"
+    return {"native": Config.STRUCTURED_OUTPUT_NATIVE, "repair": Config.STRUCTURED_OUTPUT_REPAIR,
+            "agents": agents}
@@ -8,9 +8,10 @@ to produce a final verdict with an overall credibility score and risk assessment
 from langchain.agents import create_agent
 from Agents.prompts import VERDICT_SYNTHESIZER_PROMPT
 from Agents.rate_limit_utils import invoke_with_rate_limit_retry
-from Agents.model_factory import create_model
+from Agents.llm_cache import register_agent
+from Agents.model_factory import create_model, cacheable_system_prompt
+from Agents.structured_output import StructuredOutput, FinalVerdict
 import json
-import re
 
 
 class VerdictSynthesizerAgent:
@@ -18,11 +19,14 @@ class VerdictSynthesizerAgent:
     
     def __init__(self, model=None):
         self.model = model or create_model()
+        self.output = StructuredOutput(self.model, FinalVerdict, "verdict_synthesizer")
         self.agent = create_agent(
             model=self.model,
             tools=[],
-            system_prompt=VERDICT_SYNTHESIZER_PROMPT
+            system_prompt=cacheable_system_prompt(VERDICT_SYNTHESIZER_PROMPT, self.model),
+            response_format=self.output.response_format
         )
+        register_agent(self.agent, self.model, VERDICT_SYNTHESIZER_PROMPT, [], self.output.response_format)
     
     def synthesize(self, claims_results: list, source_data: dict, 
                    bias_data: dict, media_data: dict) -> dict:
@@ -46,16 +50,11 @@ Based on all this data, provide the final verdict.
         
         response = invoke_with_rate_limit_retry(self.agent, {
             "messages": [{"role": "user", "content": analysis_summary}]
-        })
+        }, agent_name="verdict_synthesizer", validate=self.output.is_valid)
         
-        content = response["messages"][-1].content if "messages" in response else str(response)
-        
-        try:
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                return json.loads(match.group())
-        except json.JSONDecodeError:
-            pass
+        result = self.output.parse(response)
+        if result is not None:
+            return result
         
         # Calculate fallback verdict from claims
         return self._calculate_fallback_verdict(claims_results, source_data)
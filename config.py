@@ -23,6 +23,10 @@ class Config:
     # Model Configuration
     MODEL = os.getenv("MODEL", None)  # Will be auto-detected if not set
     MODEL_TEMPERATURE = float(os.getenv("MODEL_TEMPERATURE", "0"))
+    PROMPT_CACHING_ENABLED = os.getenv("PROMPT_CACHING_ENABLED", "true").lower() == "true"  # Mark static system prompts cacheable (Anthropic cache_control)
+    PROMPT_CACHE_TTL = os.getenv("PROMPT_CACHE_TTL", "5m")  # Anthropic cache lifetime: "5m" or "1h"
+    STRUCTURED_OUTPUT_NATIVE = os.getenv("STRUCTURED_OUTPUT_NATIVE", "true").lower() == "true"  # Ask providers for schema-constrained answers (native JSON or tool calling)
+    STRUCTURED_OUTPUT_REPAIR = os.getenv("STRUCTURED_OUTPUT_REPAIR", "true").lower() == "true"  # One targeted re-ask for malformed JSON before falling back to defaults
     
     @classmethod
     def _auto_detect_model(cls):
@@ -51,6 +55,28 @@ class Config:
     # Performance Configuration
     MAX_PARALLEL_CLAIMS = int(os.getenv("MAX_PARALLEL_CLAIMS", "3"))  # Max concurrent claim checks (reduced to avoid rate limits)
     MAX_CLAIMS_TO_CHECK = int(os.getenv("MAX_CLAIMS_TO_CHECK", "5"))  # Max total claims to extract and verify
+    FACT_CHECK_BATCH_SIZE = int(os.getenv("FACT_CHECK_BATCH_SIZE", "1"))  # Claims checked per fact-checker run (1 = one run per claim)
+    EXTRACTION_CHUNK_CHARS = int(os.getenv("EXTRACTION_CHUNK_CHARS", "5000"))  # Longer documents are split into chunks of this size for statement extraction
+    EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "4"))  # Chunks extracted at once for long documents
+    CHECK_WORTHINESS_ENABLED = os.getenv("CHECK_WORTHINESS_ENABLED", "true").lower() == "true"  # Local pre-filter: skip extraction for inputs with nothing checkable
+    CHECK_WORTHINESS_MAX_SENTENCES = int(os.getenv("CHECK_WORTHINESS_MAX_SENTENCES", "200"))  # Best sentences kept from documents longer than one extraction chunk
+    MAX_DOCUMENT_CHARS = int(os.getenv("MAX_DOCUMENT_CHARS", "200000"))  # Safety cap on fetched page text
+    MAX_MEDIA_ITEMS = int(os.getenv("MAX_MEDIA_ITEMS", "20"))  # Media items kept per fetched page
+    ANALYSIS_CONTEXT_CHARS = int(os.getenv("ANALYSIS_CONTEXT_CHARS", "15000"))  # Text sent to whole-document bias and media analysis
+    MAX_CONCURRENT_STAGES = int(os.getenv("MAX_CONCURRENT_STAGES", "4"))  # Shared budget of concurrent LLM calls across pipeline stages
+    AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))  # Max warm agent sets shared by server requests
+    AGENT_POOL_ACQUIRE_TIMEOUT = float(os.getenv("AGENT_POOL_ACQUIRE_TIMEOUT", "120"))  # Seconds a WebSocket scan waits for a free agent set
+    MAX_INFLIGHT_SCANS = int(os.getenv("MAX_INFLIGHT_SCANS", "4"))  # Max concurrent HTTP scans per server worker
+    SCAN_RETRY_AFTER_SECONDS = int(os.getenv("SCAN_RETRY_AFTER_SECONDS", "30"))  # Retry-After sent when the worker is saturated
+    
+    # Job Queue Configuration
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Background workers running /jobs scans
+    JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")  # SQLite file persisting jobs and their events
+    JOB_EVENT_POLL_SECONDS = float(os.getenv("JOB_EVENT_POLL_SECONDS", "0.5"))  # SSE poll interval for new job events
+    
+    # Batch Configuration
+    BATCH_DOC_CONCURRENCY = int(os.getenv("BATCH_DOC_CONCURRENCY", "2"))  # Documents analyzed at once in batch runs
+    BATCH_DIR = os.getenv("BATCH_DIR", "batches")  # Output/checkpoint directory for /analyze/batch runs
     
     # API Keys
     ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
@@ -58,6 +84,118 @@ class Config:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")  # For Gemini
     PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
     
+    # Perplexity Search Configuration
+    PERPLEXITY_MODEL = os.getenv("PERPLEXITY_MODEL", "sonar")
+    
+    # HTTP Client Configuration (shared keep-alive pools)
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # Distinct hosts kept pooled
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))  # Keep-alive connections per host
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    
+    # Rate Limit Configuration (per-provider budgets shared by all threads; 0 = learn from the provider)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_RPM = {  # Requests per minute per provider
+        "anthropic": int(os.getenv("RATE_LIMIT_RPM_ANTHROPIC", "0")),
+        "openai": int(os.getenv("RATE_LIMIT_RPM_OPENAI", "0")),
+        "google": int(os.getenv("RATE_LIMIT_RPM_GOOGLE", "0")),
+        "perplexity": int(os.getenv("RATE_LIMIT_RPM_PERPLEXITY", "0"))
+    }
+    RATE_LIMIT_TPM = {  # Tokens per minute per provider (input minus prompt-cache reads, plus output)
+        "anthropic": int(os.getenv("RATE_LIMIT_TPM_ANTHROPIC", "0")),
+        "openai": int(os.getenv("RATE_LIMIT_TPM_OPENAI", "0")),
+        "google": int(os.getenv("RATE_LIMIT_TPM_GOOGLE", "0")),
+        "perplexity": int(os.getenv("RATE_LIMIT_TPM_PERPLEXITY", "0"))
+    }
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))  # Retries of a call rejected with 429
+    RATE_LIMIT_BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", "1"))  # First backoff in seconds, doubled per retry
+    RATE_LIMIT_BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", "30"))  # Backoff cap in seconds
+    RATE_LIMIT_MAX_RETRY_AFTER = float(os.getenv("RATE_LIMIT_MAX_RETRY_AFTER", "60"))  # Cap on a provider's Retry-After
+    
+    # Search Cache Configuration
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "cache/search_cache.db")
+    SEARCH_CACHE_MEMORY_ENTRIES = int(os.getenv("SEARCH_CACHE_MEMORY_ENTRIES", "1024"))  # In-memory LRU size
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "50000"))  # On-disk size bound
+    SEARCH_CACHE_TTLS = {  # Seconds per search context
+        "fact-check": int(os.getenv("SEARCH_CACHE_TTL_FACT_CHECK", str(6 * 3600))),
+        "source-reputation": int(os.getenv("SEARCH_CACHE_TTL_SOURCE_REPUTATION", str(7 * 24 * 3600))),
+        "media-verification": int(os.getenv("SEARCH_CACHE_TTL_MEDIA_VERIFICATION", str(24 * 3600))),
+        "general": int(os.getenv("SEARCH_CACHE_TTL_GENERAL", str(24 * 3600)))
+    }
+    
+    @classmethod
+    def get_search_cache_ttl(cls, context: str) -> int:
+        """TTL in seconds for cached searches of the given context"""
+        return cls.SEARCH_CACHE_TTLS.get(context, cls.SEARCH_CACHE_TTLS["general"])
+    
+    # LLM Response Cache Configuration (opt-in, temperature 0 only)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.db")
+    LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))  # In-memory LRU size
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))  # On-disk size bound
+    LLM_CACHE_TTLS = {  # Seconds per agent; web-search-backed agents expire with their searches
+        "fact_checker": int(os.getenv("LLM_CACHE_TTL_FACT_CHECKER", str(6 * 3600))),
+        "fact_checker_batch": int(os.getenv("LLM_CACHE_TTL_FACT_CHECKER", str(6 * 3600))),
+        "media_analyzer": int(os.getenv("LLM_CACHE_TTL_MEDIA_ANALYZER", str(24 * 3600))),
+        "default": int(os.getenv("LLM_CACHE_TTL_DEFAULT", str(7 * 24 * 3600)))
+    }
+    
+    @classmethod
+    def get_llm_cache_ttl(cls, agent_name: str) -> int:
+        """TTL in seconds for cached responses of the given agent"""
+        return cls.LLM_CACHE_TTLS.get(agent_name, cls.LLM_CACHE_TTLS["default"])
+    
+    # Claim Verdict Cache Configuration (cross-scan)
+    CLAIM_CACHE_ENABLED = os.getenv("CLAIM_CACHE_ENABLED", "true").lower() == "true"
+    CLAIM_CACHE_PATH = os.getenv("CLAIM_CACHE_PATH", "cache/claim_cache.db")
+    CLAIM_CACHE_MEMORY_ENTRIES = int(os.getenv("CLAIM_CACHE_MEMORY_ENTRIES", "2048"))  # In-memory LRU size
+    CLAIM_CACHE_MAX_ENTRIES = int(os.getenv("CLAIM_CACHE_MAX_ENTRIES", "200000"))  # On-disk size bound
+    CLAIM_CACHE_TTLS = {  # Seconds per verdict status; settled facts live longer than breaking claims
+        "VERIFIED": int(os.getenv("CLAIM_CACHE_TTL_VERIFIED", str(30 * 24 * 3600))),
+        "DEBUNKED": int(os.getenv("CLAIM_CACHE_TTL_DEBUNKED", str(30 * 24 * 3600))),
+        "MISLEADING": int(os.getenv("CLAIM_CACHE_TTL_MISLEADING", str(7 * 24 * 3600))),
+        "MISSING_CONTEXT": int(os.getenv("CLAIM_CACHE_TTL_MISSING_CONTEXT", str(3 * 24 * 3600))),
+        "UNVERIFIABLE": int(os.getenv("CLAIM_CACHE_TTL_UNVERIFIABLE", str(6 * 3600)))
+    }
+    
+    @classmethod
+    def get_claim_cache_ttl(cls, status: str) -> int:
+        """TTL in seconds for a cached claim verdict of the given status"""
+        return cls.CLAIM_CACHE_TTLS.get(status, cls.CLAIM_CACHE_TTLS["UNVERIFIABLE"])
+    
+    # Near-duplicate claim index (offline hashing vectorizer + memory-mapped vectors)
+    CLAIM_INDEX_ENABLED = os.getenv("CLAIM_INDEX_ENABLED", "true").lower() == "true"
+    CLAIM_INDEX_DIR = os.getenv("CLAIM_INDEX_DIR", "cache/claim_index")
+    CLAIM_INDEX_DIM = int(os.getenv("CLAIM_INDEX_DIM", "256"))  # Hashed feature buckets per claim
+    CLAIM_INDEX_SKETCH_BITS = int(os.getenv("CLAIM_INDEX_SKETCH_BITS", "128"))  # Random-projection sketch size for candidate search
+    CLAIM_INDEX_CANDIDATES = int(os.getenv("CLAIM_INDEX_CANDIDATES", "256"))  # Sketch candidates re-scored exactly per query
+    CLAIM_SIMILAR_REUSE_ENABLED = os.getenv("CLAIM_SIMILAR_REUSE_ENABLED", "false").lower() == "true"  # Reuse near-duplicates' verdicts outright (default: seeds only)
+    CLAIM_REUSE_THRESHOLD = float(os.getenv("CLAIM_REUSE_THRESHOLD", "0.9"))  # Similarity to reuse a stored verdict outright (with CLAIM_SIMILAR_REUSE_ENABLED)
+    CLAIM_SEED_THRESHOLD = float(os.getenv("CLAIM_SEED_THRESHOLD", "0.6"))  # Similarity to pass a stored verdict to the fact-checker as a lead
+    
+    # Publisher Reputation Store Configuration
+    PUBLISHER_STORE_ENABLED = os.getenv("PUBLISHER_STORE_ENABLED", "true").lower() == "true"
+    PUBLISHER_STORE_PATH = os.getenv("PUBLISHER_STORE_PATH", "cache/publishers.db")  # Local fallback store
+    PUBLISHER_STORE_MEMORY_ENTRIES = int(os.getenv("PUBLISHER_STORE_MEMORY_ENTRIES", "1024"))
+    PUBLISHER_STORE_MAX_ENTRIES = int(os.getenv("PUBLISHER_STORE_MAX_ENTRIES", "100000"))
+    PUBLISHER_STALENESS_SECONDS = int(os.getenv("PUBLISHER_STALENESS_SECONDS", str(7 * 24 * 3600)))  # Re-rate publishers older than this
+
+    # Document Result Cache Configuration (whole-scan reuse for repeat submissions)
+    DOCUMENT_CACHE_ENABLED = os.getenv("DOCUMENT_CACHE_ENABLED", "true").lower() == "true"
+    DOCUMENT_CACHE_PATH = os.getenv("DOCUMENT_CACHE_PATH", "cache/documents.db")
+    DOCUMENT_CACHE_MEMORY_ENTRIES = int(os.getenv("DOCUMENT_CACHE_MEMORY_ENTRIES", "256"))  # In-memory LRU size
+    DOCUMENT_CACHE_MAX_ENTRIES = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", "20000"))  # On-disk size bound
+    DOCUMENT_CACHE_TTL_SECONDS = int(os.getenv("DOCUMENT_CACHE_TTL_SECONDS", str(6 * 3600)))  # Freshness window for repeat scans
+    DOCUMENT_CACHE_NEO4J = os.getenv("DOCUMENT_CACHE_NEO4J", "false").lower() == "true"  # Also store/look up reports on Scan nodes
+    
+    # Neo4j Write Queue Configuration (write-behind persistence)
+    NEO4J_WRITE_QUEUE_SIZE = int(os.getenv("NEO4J_WRITE_QUEUE_SIZE", "200"))  # Analyses held in memory before spilling to the journal
+    NEO4J_WRITE_BATCH_SIZE = int(os.getenv("NEO4J_WRITE_BATCH_SIZE", "10"))  # Scans written per transaction
+    NEO4J_WRITE_JOURNAL_PATH = os.getenv("NEO4J_WRITE_JOURNAL_PATH", "cache/neo4j_journal.jsonl")
+    NEO4J_WRITE_RETRY_BASE_SECONDS = float(os.getenv("NEO4J_WRITE_RETRY_BASE_SECONDS", "1"))
+    NEO4J_WRITE_RETRY_MAX_SECONDS = float(os.getenv("NEO4J_WRITE_RETRY_MAX_SECONDS", "60"))
+    
     # Ollama Configuration
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     
@@ -8,6 +8,7 @@ It provides an interactive prompt for analyzing text and URLs for misinformation
 from Agents.misinfoAgent import MisinformationDetector
 from Agents.search_utils import print_search_summary, search_logger
 from config import Config
+import argparse
 import json
 
 
@@ -104,12 +105,136 @@ def main():
         detector.close()
 
 
+def run_batch(args):
+    """Analyze every document of a JSONL file, resuming from the output file if present"""
+    from Agents.batch_runner import BatchRunner, read_jsonl
+    
+    print("\n" + "=" * 60)
+    print("BATCH ANALYSIS")
+    print(f"Input: {args.batch}")
+    print(f"Output: {args.out}")
+    print("=" * 60)
+    
+    detector = MisinformationDetector(
+        store_in_neo4j=not args.no_neo4j,
+        max_parallel_claims=args.claim_concurrency
+    )
+    runner = BatchRunner(detector, doc_concurrency=args.doc_concurrency)
+    
+    def on_record(record):
+        if record["status"] == "ok":
+            verdict = record["result"]["final_verdict"]
+            print(f"  ✅ {record['id']}: {verdict.get('status')} ({verdict.get('overall_score')}/100)")
+        else:
+            print(f"  ❌ {record['id']}: {record['error']}")
+    
+    try:
+        stats = runner.run(read_jsonl(args.batch), out_path=args.out, on_record=on_record)
+    finally:
+        detector.close()
+    
+    print("\n" + "=" * 40)
+    print("BATCH THROUGHPUT SUMMARY")
+    print("=" * 40)
+    print(f"Processed: {stats['docs_processed']} ({stats['docs_failed']} failed, {stats['docs_skipped_from_checkpoint']} skipped from checkpoint)")
+    print(f"Elapsed: {stats['elapsed_seconds']}s")
+    print(f"Docs/min: {stats['docs_per_minute']}")
+    print(f"LLM calls/doc: {stats['llm_calls_per_doc']}")
+    print(f"Search calls/doc: {stats['search_calls_per_doc']}")
+    print(f"Stats written to {args.out}.stats.json")
+    print("=" * 40)
+
+
+def run_fact_check_benchmark(args):
+    """Fact-check the same claims per claim and in batches, and compare calls, tokens and latency"""
+    from Agents.factCheckerAgent import FactCheckerAgent
+    from Agents.rate_limit_utils import (
+        llm_call_counter, llm_input_token_counter, llm_output_token_counter, llm_cache_read_token_counter
+    )
+    from Agents.search_utils import search_call_counter
+    from concurrent.futures import ThreadPoolExecutor
+    import time
+    
+    with open(args.benchmark_fact_check, "r", encoding="utf-8") as f:
+        statements = [line.strip() for line in f if line.strip()]
+    claims = [(statement, f"CLAIM_A{i}", None) for i, statement in enumerate(statements, 1)]
+    batch_size = max(2, args.batch_size)
+    checker = FactCheckerAgent()
+    
+    print("\n" + "=" * 60)
+    print("FACT-CHECK BENCHMARK")
+    print(f"Claims: {len(claims)}, batch size: {batch_size}, concurrency: {args.claim_concurrency}")
+    if Config.SEARCH_CACHE_ENABLED:
+        print("⚠️ SEARCH_CACHE_ENABLED=true - the second mode may reuse the first mode's searches")
+    print("=" * 60)
+    
+    def per_claim():
+        with ThreadPoolExecutor(max_workers=args.claim_concurrency) as executor:
+            list(executor.map(lambda claim: checker.check(claim[0], claim[1]), claims))
+        return 0
+    
+    def batched():
+        groups = [claims[i:i + batch_size] for i in range(0, len(claims), batch_size)]
+        def run_group(group):
+            answered = checker.check_batch(group)
+            missing = [claim for claim in group if claim[1] not in answered]
+            for statement, claim_id, _ in missing:
+                checker.check(statement, claim_id)
+            return len(missing)
+        with ThreadPoolExecutor(max_workers=args.claim_concurrency) as executor:
+            return sum(executor.map(run_group, groups))
+    
+    rows = []
+    for name, run in (("per-claim", per_claim), ("batched", batched)):
+        counters = (llm_call_counter.value, llm_input_token_counter.value, llm_cache_read_token_counter.value,
+                    llm_output_token_counter.value, search_call_counter.value)
+        start = time.perf_counter()
+        fallbacks = run()
+        elapsed = time.perf_counter() - start
+        rows.append((name, llm_call_counter.value - counters[0], llm_input_token_counter.value - counters[1],
+                     llm_cache_read_token_counter.value - counters[2], llm_output_token_counter.value - counters[3],
+                     search_call_counter.value - counters[4], elapsed, fallbacks))
+    
+    print(f"\n{'mode':<10} {'LLM calls':>9} {'input tok':>10} {'cached tok':>10} {'output tok':>10} {'searches':>9} {'seconds':>8} {'fallbacks':>9}")
+    for name, calls, input_tokens, cached_tokens, output_tokens, searches, elapsed, fallbacks in rows:
+        print(f"{name:<10} {calls:>9} {input_tokens:>10} {cached_tokens:>10} {output_tokens:>10} {searches:>9} {elapsed:>8.1f} {fallbacks:>9}")
+    print("=" * 60)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Misinformation Detection Agent")
+    parser.add_argument("--batch", metavar="IN_JSONL",
+                        help="Analyze documents from a JSONL file (one {\"id\", \"input\"} object per line)")
+    parser.add_argument("--out", metavar="OUT_JSONL",
+                        help="Output JSONL for --batch; also the resume checkpoint")
+    parser.add_argument("--doc-concurrency", type=int, default=Config.BATCH_DOC_CONCURRENCY,
+                        help="Documents analyzed at once in batch mode")
+    parser.add_argument("--claim-concurrency", type=int, default=Config.MAX_PARALLEL_CLAIMS,
+                        help="Claims fact-checked at once per document")
+    parser.add_argument("--no-neo4j", action="store_true",
+                        help="Do not store batch results in Neo4j")
+    parser.add_argument("--benchmark-fact-check", metavar="CLAIMS_TXT",
+                        help="Compare per-claim and batched fact-checking on a file of claims (one per line)")
+    parser.add_argument("--batch-size", type=int, default=max(2, Config.FACT_CHECK_BATCH_SIZE),
+                        help="Claims per fact-checker run for --benchmark-fact-check")
+    args = parser.parse_args()
+    if args.batch and not args.out:
+        parser.error("--out is required with --batch")
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
     print("\nStarting Misinformation Detection Agent...")
     
     try:
         Config.validate()
-        main()
+        if args.benchmark_fact_check:
+            run_fact_check_benchmark(args)
+        elif args.batch:
+            run_batch(args)
+        else:
+            main()
     except ValueError as e:
         print(f"\nConfig Error: {e}")
     except KeyboardInterrupt:
@@ -5,24 +5,122 @@ Provides REST API and WebSocket endpoints for analysis.
 This server exposes the misinformation detection system via REST API and WebSocket endpoints,
 enabling real-time streaming analysis with progress updates and detailed logging.
 """
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import functools
 import json
+import os
+import re
+import threading
 from datetime import datetime
 
 from Agents.misinfoAgent import MisinformationDetector
 from Agents.reportGeneratorAgent import ReportGeneratorAgent
-from Agents.search_utils import search_logger
+from Agents.search_utils import search_logger, search_flight, scan_search_log
+from Agents.rate_limit_utils import llm_flight, llm_usage_stats
+from Agents.rate_limiter import rate_limit_stats
+from Agents.agent_pool import agent_pool
+from Agents.job_queue import JobManager, TERMINAL_STATES
+from Agents.content_fetcher import is_url, fetch_document_sync, FetchedDocument
+from Agents.batch_runner import BatchRunner
+from Agents.http_client import close_http_session
+from Agents.neo4j_tools import (
+    get_shared_neo4j_client,
+    close_shared_neo4j_client,
+    shared_neo4j_client_initialized
+)
+from Agents.publisher_store import PublisherStore
+from Agents.document_cache import DocumentCache, document_fingerprint
+from Agents.claim_cache import match_claim, store_claim, store_claims, claim_cache_stats
+from Agents.check_worthiness import prefilter_stats
+from Agents.structured_output import structured_output_stats
+from Agents.llm_cache import llm_cache_stats
+from Agents.neo4j_writer import (
+    get_shared_neo4j_writer,
+    close_shared_neo4j_writer,
+    shared_neo4j_writer_stats
+)
 from config import Config
 
 
 # Global detector instance (lazy loaded)
 _detector = None
 _report_generator = None
+_job_manager = None
+_publisher_store = None
+_document_cache = None
+_singleton_lock = threading.RLock()  # Re-entered: get_detector builds the stores
+
+# Bounded executor for blocking HTTP scans - keeps the event loop free
+_scan_executor = ThreadPoolExecutor(
+    max_workers=Config.MAX_INFLIGHT_SCANS,
+    thread_name_prefix="scan"
+)
+
+
+class ScanAdmission:
+    """
+    Admission control for HTTP scans on this worker.
+    
+    Scans beyond MAX_INFLIGHT_SCANS are rejected immediately with 503 and a
+    Retry-After header instead of queuing without bound.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self.rejected = 0
+    
+    def try_acquire(self) -> bool:
+        # Only touched from the event loop thread, so no lock is needed
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+    
+    def release(self):
+        self.in_flight -= 1
+    
+    def acquire_or_reject(self):
+        """Take one scan slot or raise 503 with Retry-After"""
+        if not self.try_acquire():
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server busy: {self.limit} scans already in progress",
+                headers={"Retry-After": str(Config.SCAN_RETRY_AFTER_SECONDS)}
+            )
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one scan slot or raise 503 if the worker is saturated"""
+        self.acquire_or_reject()
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "limit": self.limit,
+            "rejected": self.rejected
+        }
+
+
+scan_admission = ScanAdmission(Config.MAX_INFLIGHT_SCANS)
+
+
+async def run_in_scan_executor(func, *args):
+    """Run a blocking scan function on the bounded scan executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_scan_executor, functools.partial(func, *args))
 
 
 @asynccontextmanager
@@ -35,14 +133,24 @@ async def lifespan(app: FastAPI):
     except ValueError as e:
         print(f"⚠️ Configuration warning: {e}")
     
+    # Start background job workers (re-queues jobs left over from a reload)
+    global _job_manager
+    _job_manager = JobManager(runner=run_job_scan)
+    _job_manager.start()
+    
     yield
     
     # Shutdown
     global _detector, _report_generator
+    _job_manager.stop()
     if _detector:
         _detector.close()
         _detector = None
     _report_generator = None
+    _scan_executor.shutdown(wait=False, cancel_futures=True)
+    close_shared_neo4j_writer()
+    close_shared_neo4j_client()
+    close_http_session()
 
 
 app = FastAPI(
@@ -65,46 +173,26 @@ app.add_middleware(
 class AnalyzeRequest(BaseModel):
     input: str  # Can be text content or URL - system auto-detects
     store_in_neo4j: Optional[bool] = True
+    force_refresh: Optional[bool] = False  # Re-run the scan even if this content was scanned recently
 
 
-def is_url(text: str) -> bool:
-    """Check if input is a URL"""
-    import re
-    url_pattern = r'^https?://[^\s<>"{}|\\^`\[\]]+'
-    return bool(re.match(url_pattern, text.strip()))
+class BatchDocument(BaseModel):
+    id: Optional[str] = None
+    input: str  # Text content or URL
 
 
-async def fetch_url_content(url: str) -> tuple[str, str]:
-    """Fetch content from URL and return (content, url)"""
-    import requests
-    from bs4 import BeautifulSoup
-    
+class BatchAnalyzeRequest(BaseModel):
+    documents: List[BatchDocument]
+    batch_id: Optional[str] = None  # Re-use an id to resume an interrupted batch
+    doc_concurrency: Optional[int] = None
+    claim_concurrency: Optional[int] = None
+    store_in_neo4j: Optional[bool] = True
+
+
+async def fetch_url_content(url: str) -> FetchedDocument:
+    """Fetch and parse a URL without blocking the event loop"""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Get text content
-        text = soup.get_text(separator='\n', strip=True)
-        
-        # Clean up whitespace
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        content = '\n'.join(lines)
-        
-        # Limit content length
-        if len(content) > 15000:
-            content = content[:15000] + "..."
-        
-        return content, url
-        
+        return await asyncio.to_thread(fetch_document_sync, url)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {str(e)}")
 
@@ -136,18 +224,97 @@ class LogCapture:
 
 def get_detector(store_in_neo4j: bool = True) -> MisinformationDetector:
     global _detector
-    if _detector is None:
-        _detector = MisinformationDetector(store_in_neo4j=store_in_neo4j)
+    with _singleton_lock:
+        if _detector is None:
+            _detector = MisinformationDetector(
+                store_in_neo4j=store_in_neo4j,
+                neo4j_writer=get_shared_neo4j_writer() if store_in_neo4j else None,
+                publisher_store=get_publisher_store(),
+                document_cache=get_document_cache()
+            )
     return _detector
 
 
+def get_publisher_store() -> PublisherStore:
+    """Process-wide publisher reputation store (backed by the shared Neo4j client)"""
+    global _publisher_store
+    with _singleton_lock:
+        if _publisher_store is None:
+            _publisher_store = PublisherStore(get_shared_neo4j_client())
+    return _publisher_store
+
+
+def get_document_cache() -> DocumentCache:
+    """Process-wide document result cache (backed by the shared Neo4j client)"""
+    global _document_cache
+    with _singleton_lock:
+        if _document_cache is None:
+            _document_cache = DocumentCache(get_shared_neo4j_client())
+    return _document_cache
+
+
 def get_report_generator() -> ReportGeneratorAgent:
     global _report_generator
-    if _report_generator is None:
-        _report_generator = ReportGeneratorAgent()
+    with _singleton_lock:
+        if _report_generator is None:
+            _report_generator = ReportGeneratorAgent()
     return _report_generator
 
 
+def run_detector_scan(text: str, url: Optional[str], store_in_neo4j: bool, on_event=None,
+                      document: Optional[FetchedDocument] = None, force_refresh: bool = False) -> dict:
+    """Run a full detector scan (blocking) and attach its search logs"""
+    detector = get_detector(store_in_neo4j)
+    with scan_search_log():
+        result = detector.analyze(text, url, on_event=on_event, document=document,
+                                  force_refresh=force_refresh)
+        
+        # Include this scan's search logs in the response
+        result["search_logs"] = search_logger.get_logs()
+        result["search_summary"] = search_logger.summary()
+    return result
+
+
+def run_detector_scan_with_report(text: str, url: Optional[str], store_in_neo4j: bool,
+                                  document: Optional[FetchedDocument] = None,
+                                  force_refresh: bool = False) -> dict:
+    """Run a full detector scan plus detailed report generation (blocking)"""
+    analysis_result = run_detector_scan(text, url, store_in_neo4j, document=document,
+                                        force_refresh=force_refresh)
+    detailed_report = None
+    if analysis_result["meta"].get("cached"):
+        detailed_report = get_document_cache().detailed_report(analysis_result)
+    if detailed_report is None:
+        detailed_report = get_report_generator().generate(analysis_result)
+        get_document_cache().save(analysis_result, detailed_report)
+    return {
+        "analysis": analysis_result,
+        "report": detailed_report
+    }
+
+
+def run_job_scan(user_input: str, options: dict, emit) -> dict:
+    """Job runner: fetch the input if it is a URL, then run a full scan with progress events"""
+    if is_url(user_input):
+        emit("info", f"Detected URL input: {user_input}")
+        document = fetch_document_sync(user_input)
+        text, url = document.text, document.url
+        emit("info", f"Fetched {len(text)} characters and {len(document.media)} media items from URL",
+             document.metadata())
+    else:
+        text, url, document = user_input, None, None
+        emit("info", f"Analyzing text input ({len(text)} characters)")
+    
+    return run_detector_scan(text, url, options.get("store_in_neo4j", True), on_event=emit,
+                             document=document, force_refresh=options.get("force_refresh", False))
+
+
+def get_job_manager() -> JobManager:
+    if _job_manager is None:
+        raise HTTPException(status_code=503, detail="Job workers are not running")
+    return _job_manager
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -161,7 +328,39 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "agent_pool": agent_pool.stats(),
+        "http_scans": scan_admission.stats(),
+        "jobs": _job_manager.stats() if _job_manager else None,
+        "coalescing": {"search": search_flight.stats(), "llm": llm_flight.stats()},
+        "neo4j_driver_initialized": shared_neo4j_client_initialized(),
+        "neo4j_writes": shared_neo4j_writer_stats(),
+        "publishers": _publisher_store.stats() if _publisher_store else None,
+        "claim_cache": claim_cache_stats(),
+        "prefilter": prefilter_stats(),
+        "llm_cache": llm_cache_stats(),
+        "llm_usage": llm_usage_stats(),
+        "rate_limits": rate_limit_stats(),
+        "structured_output": structured_output_stats(),
+        "documents": _document_cache.stats() if _document_cache else None
+    }
+
+
+@app.get("/neo4j/schema")
+async def neo4j_schema():
+    """Neo4j schema bootstrap result and current index state"""
+    try:
+        # First use connects and bootstraps the schema, which blocks (or fails when Neo4j is down)
+        client = await asyncio.to_thread(get_shared_neo4j_client)
+        schema_ready = await asyncio.to_thread(client.ensure_schema)
+        indexes = await asyncio.to_thread(client.index_status)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Neo4j unavailable: {str(e)}")
+    return {
+        "schema_ready": schema_ready,
+        "indexes": indexes
+    }
 
 
 @app.post("/analyze")
@@ -174,38 +373,35 @@ async def analyze(request: AnalyzeRequest):
     - URL to fetch and analyze
     
     For real-time progress updates, use the WebSocket endpoint instead.
+    Returns 503 with Retry-After when MAX_INFLIGHT_SCANS scans are already running.
     """
     if not request.input.strip():
         raise HTTPException(status_code=400, detail="Input cannot be empty")
     
-    try:
-        # Determine if input is URL or text
-        user_input = request.input.strip()
-        
-        if is_url(user_input):
-            # Fetch content from URL
-            text, url = await fetch_url_content(user_input)
-        else:
-            # Use input as text directly
-            text = user_input
-            url = None
-        
-        # Clear previous search logs
-        search_logger.clear()
-        
-        detector = get_detector(request.store_in_neo4j)
-        result = detector.analyze(text, url)
-        
-        # Include search logs in response
-        result["search_logs"] = search_logger.get_logs()
-        result["search_summary"] = search_logger.summary()
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    async with scan_admission.slot():
+        try:
+            # Determine if input is URL or text
+            user_input = request.input.strip()
+            
+            if is_url(user_input):
+                # Fetch and parse the page once; the pipeline reuses its metadata and media
+                document = await fetch_url_content(user_input)
+                text, url = document.text, document.url
+            else:
+                # Use input as text directly
+                text = user_input
+                url = None
+                document = None
+            
+            return await run_in_scan_executor(
+                run_detector_scan, text, url, request.store_in_neo4j, None, document,
+                request.force_refresh
+            )
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/analyze/report")
@@ -218,47 +414,185 @@ async def analyze_with_report(request: AnalyzeRequest):
     - URL to fetch and analyze
     
     Returns both the raw analysis and a detailed human-readable report.
+    Returns 503 with Retry-After when MAX_INFLIGHT_SCANS scans are already running.
     """
     if not request.input.strip():
         raise HTTPException(status_code=400, detail="Input cannot be empty")
     
-    try:
-        # Determine if input is URL or text
-        user_input = request.input.strip()
-        
-        if is_url(user_input):
-            # Fetch content from URL
-            text, url = await fetch_url_content(user_input)
-        else:
-            # Use input as text directly
-            text = user_input
-            url = None
-        
-        # Clear previous search logs
-        search_logger.clear()
-        
-        # Run analysis
-        detector = get_detector(request.store_in_neo4j)
-        analysis_result = detector.analyze(text, url)
-        
-        # Include search logs in analysis
-        analysis_result["search_logs"] = search_logger.get_logs()
-        analysis_result["search_summary"] = search_logger.summary()
-        
-        # Generate detailed report
-        report_generator = get_report_generator()
-        detailed_report = await asyncio.to_thread(report_generator.generate, analysis_result)
-        
-        return {
-            "analysis": analysis_result,
-            "report": detailed_report
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    async with scan_admission.slot():
+        try:
+            # Determine if input is URL or text
+            user_input = request.input.strip()
+            
+            if is_url(user_input):
+                # Fetch and parse the page once; the pipeline reuses its metadata and media
+                document = await fetch_url_content(user_input)
+                text, url = document.text, document.url
+            else:
+                # Use input as text directly
+                text = user_input
+                url = None
+                document = None
+            
+            return await run_in_scan_executor(
+                run_detector_scan_with_report, text, url, request.store_in_neo4j, document,
+                request.force_refresh
+            )
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalyzeRequest):
+    """
+    Batch analysis endpoint - streams one NDJSON line per document.
+    
+    Documents run with `doc_concurrency` at a time and `claim_concurrency` claim
+    checks each. Results are checkpointed to BATCH_DIR/<batch_id>.jsonl; submitting
+    the same batch_id again skips documents that already succeeded. The last line
+    carries aggregate throughput stats (docs/min, LLM and search calls per doc).
+    """
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="documents cannot be empty")
+    
+    batch_id = request.batch_id or f"batch-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}"
+    if not re.fullmatch(r'[A-Za-z0-9_.-]+', batch_id):
+        raise HTTPException(status_code=400, detail="batch_id may only contain letters, digits, '.', '_' and '-'")
+    
+    os.makedirs(Config.BATCH_DIR, exist_ok=True)
+    out_path = os.path.join(Config.BATCH_DIR, f"{batch_id}.jsonl")
+    documents = [
+        {"id": doc.id or f"doc-{i}", "input": doc.input}
+        for i, doc in enumerate(request.documents, 1)
+    ]
+    
+    # One admission slot for the whole batch, held until the batch thread finishes
+    scan_admission.acquire_or_reject()
+    
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+    
+    def publish(line):
+        loop.call_soon_threadsafe(lines.put_nowait, line)
+    
+    def run_batch():
+        try:
+            detector = MisinformationDetector(
+                store_in_neo4j=request.store_in_neo4j,
+                neo4j_writer=get_shared_neo4j_writer() if request.store_in_neo4j else None,
+                max_parallel_claims=request.claim_concurrency,
+                publisher_store=get_publisher_store(),
+                document_cache=get_document_cache()
+            )
+            try:
+                runner = BatchRunner(detector, doc_concurrency=request.doc_concurrency)
+                stats = runner.run(
+                    documents,
+                    out_path=out_path,
+                    on_record=lambda record: publish({"type": "record", **record})
+                )
+            finally:
+                detector.close()
+            publish({"type": "stats", "batch_id": batch_id, "stats": stats})
+        except Exception as e:
+            publish({"type": "error", "batch_id": batch_id, "error": str(e)})
+        finally:
+            publish(None)
+    
+    batch_future = loop.run_in_executor(None, run_batch)
+    batch_future.add_done_callback(lambda _: scan_admission.release())
+    
+    async def stream():
+        yield json.dumps({"type": "batch", "batch_id": batch_id, "documents": len(documents), "output": out_path}) + "\n"
+        while True:
+            line = await lines.get()
+            if line is None:
+                return
+            yield json.dumps(line, default=str) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: AnalyzeRequest):
+    """
+    Submit an asynchronous analysis job.
+    
+    Returns a job id immediately; poll GET /jobs/{job_id} or subscribe to
+    GET /jobs/{job_id}/events (Server-Sent Events) for progress and the result.
+    """
+    if not request.input.strip():
+        raise HTTPException(status_code=400, detail="Input cannot be empty")
+    
+    manager = get_job_manager()
+    job_id = await asyncio.to_thread(
+        manager.submit,
+        request.input.strip(),
+        {"store_in_neo4j": request.store_in_neo4j, "force_refresh": request.force_refresh}
+    )
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "events_url": f"/jobs/{job_id}/events"
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get job status, per-step progress and (once completed) the full analysis"""
+    job = await asyncio.to_thread(get_job_manager().store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
 
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """
+    Stream job events as Server-Sent Events.
+    
+    Events use the same types as the WebSocket endpoint (info, step, claim_start,
+    claim, source, bias, media, verdict, result, error). Reconnecting clients can
+    send Last-Event-ID to resume where they left off. The stream ends once the
+    job has finished and all its events were sent.
+    """
+    store = get_job_manager().store
+    job = await asyncio.to_thread(store.get, job_id, False)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    
+    try:
+        after_seq = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        after_seq = 0
+    
+    async def event_stream():
+        cursor = after_seq
+        while True:
+            events = await asyncio.to_thread(store.get_events, job_id, cursor)
+            for seq, entry in events:
+                cursor = seq
+                yield f"id: {seq}\nevent: {entry.get('type', 'info')}\ndata: {json.dumps(entry, default=str)}\n\n"
+            
+            if not events:
+                current = await asyncio.to_thread(store.get, job_id, False)
+                if current is None or current["status"] in TERMINAL_STATES:
+                    # Drain anything written between the two reads before closing
+                    if not await asyncio.to_thread(store.get_events, job_id, cursor):
+                        return
+                    continue
+                yield ": keep-alive\n\n"
+                await asyncio.sleep(Config.JOB_EVENT_POLL_SECONDS)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 class WebSocketLogHandler:
@@ -300,14 +634,16 @@ class WebSocketLogHandler:
             "sources": sources or []
         })
     
-    async def send_claim(self, claim_id: str, text: str, status: str, confidence: float, note: str = None):
+    async def send_claim(self, claim_id: str, text: str, status: str, confidence: float, note: str = None,
+                         cached: bool = False):
         """Send a claim verification update"""
         await self.send_log("claim", f"{claim_id}: {status}", {
             "id": claim_id,
             "text": text,
             "status": status,
             "confidence": confidence,
-            "note": note
+            "note": note,
+            "cached": cached
         })
     
     async def send_result(self, result: dict):
@@ -322,21 +658,12 @@ class WebSocketLogHandler:
 async def run_analysis_with_streaming(
     websocket: WebSocket,
     user_input: str,
-    store_in_neo4j: bool = True
+    store_in_neo4j: bool = True,
+    force_refresh: bool = False
 ):
     """Run analysis with real-time streaming to WebSocket"""
-    from Agents.statementExtractorAgent import StatementExtractorAgent
-    from Agents.factCheckerAgent import FactCheckerAgent
-    from Agents.sourceAnalyzerAgent import SourceAnalyzerAgent
-    from Agents.politicalBiasAgent import PoliticalBiasAgent
-    from Agents.mediaAnalyzerAgent import MediaAnalyzerAgent
-    from Agents.verdictSynthesizerAgent import VerdictSynthesizerAgent
-    from Agents.neo4j_tools import Neo4jClient
-    from Agents.model_factory import create_model
     import uuid
     import re
-    import requests
-    from bs4 import BeautifulSoup
     
     handler = WebSocketLogHandler(websocket)
     
@@ -354,30 +681,16 @@ async def run_analysis_with_streaming(
     # Determine if input is URL or text
     user_input = user_input.strip()
     url = None
+    document = None
     
     if is_url(user_input):
         await handler.send_log("info", f"Detected URL input: {user_input}")
         await handler.send_log("info", "Fetching content from URL...")
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            response = requests.get(user_input, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            text = soup.get_text(separator='\n', strip=True)
-            lines = [line.strip() for line in text.splitlines() if line.strip()]
-            text = '\n'.join(lines)
-            
-            if len(text) > 15000:
-                text = text[:15000] + "..."
-            
-            url = user_input
-            await handler.send_log("info", f"Fetched {len(text)} characters from URL")
+            document = await asyncio.to_thread(fetch_document_sync, user_input)
+            text, url = document.text, document.url
+            await handler.send_log("info", f"Fetched {len(text)} characters and {len(document.media)} media items from URL",
+                                   document.metadata())
         except Exception as e:
             await handler.send_error(f"Failed to fetch URL: {str(e)}")
             return
@@ -385,17 +698,46 @@ async def run_analysis_with_streaming(
         text = user_input
         await handler.send_log("info", f"Analyzing text input ({len(text)} characters)")
     
-    # Initialize model
-    model = create_model()
+    # Extract URL from text if not already set
+    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
+    if document is not None:
+        source_url = document.source_url
+    else:
+        source_url = url or (re.search(url_pattern, text).group() if re.search(url_pattern, text) else "direct-input")
     
-    # Initialize agents
-    statement_extractor = StatementExtractorAgent(model=model)
-    fact_checker = FactCheckerAgent(model=model)
-    source_analyzer = SourceAnalyzerAgent(model=model)
-    political_bias_analyzer = PoliticalBiasAgent(model=model)
-    media_analyzer = MediaAnalyzerAgent(model=model)
-    verdict_synthesizer = VerdictSynthesizerAgent(model=model)
-    neo4j_client = Neo4jClient() if store_in_neo4j else None
+    # Return the earlier report when this content was scanned recently
+    # (first use builds the Neo4j client, which blocks on connect and schema setup)
+    document_cache = await asyncio.to_thread(get_document_cache)
+    fingerprint = document_fingerprint(text)
+    if force_refresh:
+        document_cache.skip()
+    else:
+        cached = await asyncio.to_thread(document_cache.lookup, fingerprint, source_url)
+        if cached is not None:
+            report, detailed_report = cached
+            await handler.send_log("info", f"Reusing earlier scan {report['meta']['scan_id']} "
+                                           f"from {report['meta']['cached_at']}", report["meta"])
+            if detailed_report is None:
+                await handler.send_log("info", "Generating detailed report...")
+                detailed_report = await asyncio.to_thread(
+                    lambda: get_report_generator().generate(report)
+                )
+                await asyncio.to_thread(document_cache.save, report, detailed_report)
+            await handler.send_result({
+                "analysis": report,
+                "report": detailed_report
+            })
+            return
+    
+    # Check out warm agents (built lazily on first use) and the shared Neo4j driver
+    agents = await asyncio.to_thread(agent_pool.acquire)
+    statement_extractor = agents.statement_extractor
+    fact_checker = agents.fact_checker
+    source_analyzer = agents.source_analyzer
+    political_bias_analyzer = agents.political_bias_analyzer
+    media_analyzer = agents.media_analyzer
+    verdict_synthesizer = agents.verdict_synthesizer
+    neo4j_writer = await asyncio.to_thread(get_shared_neo4j_writer) if store_in_neo4j else None
     
     # Generate scan ID
     start_time = datetime.now()
@@ -404,10 +746,6 @@ async def run_analysis_with_streaming(
     scan_id = f"misinfo-scan-{date_str}-{unique_id}"
     
     await handler.send_log("info", f"Scan ID: {scan_id}")
-    
-    # Extract URL from text if not already set
-    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    source_url = url or (re.search(url_pattern, text).group() if re.search(url_pattern, text) else "direct-input")
     await handler.send_log("info", f"Source URL: {source_url}")
     
     # Extract publisher
@@ -416,9 +754,6 @@ async def run_analysis_with_streaming(
         match = re.search(r'https?://(?:www\.)?([^/]+)', source_url)
         publisher = match.group(1) if match else "Unknown Source"
     
-    # Clear search logs
-    search_logger.clear()
-    
     try:
         # Step 1: Extract statements (limited to avoid rate limits)
         from config import Config
@@ -429,43 +764,118 @@ async def run_analysis_with_streaming(
         await handler.send_log("info", f"Found {len(statements)} statements (limited to {max_claims} to avoid rate limits)", {"statements": statements})
         await handler.send_step(1, 6, "Extracting factual statements", "complete")
         
-        # Step 2: Fact-check claims (with streaming)
+        # Step 2: Fact-check claims in parallel (streamed as each one finishes)
         await handler.send_step(2, 6, "Fact-checking claims")
-        claims_results = []
+        claim_semaphore = asyncio.Semaphore(Config.MAX_PARALLEL_CLAIMS)
+        search_cursor = len(search_logger.get_logs())
         
-        for i, statement in enumerate(statements, 1):
-            claim_id = f"CLAIM_A{i}"
-            await handler.send_log("claim_start", f"Checking {claim_id}...", {
-                "id": claim_id,
-                "text": statement[:100] + "..." if len(statement) > 100 else statement
-            })
-            
-            result = await asyncio.to_thread(fact_checker.check, statement, claim_id)
-            claims_results.append(result)
-            
-            # Send claim result
-            await handler.send_claim(
-                claim_id=result.get("id", claim_id),
-                text=result.get("text", statement),
-                status=result.get("status", "UNKNOWN"),
-                confidence=result.get("confidence", 0.5),
-                note=result.get("note")
-            )
-            
-            # Send any search logs that occurred
-            for log in search_logger.get_logs()[len(handler.logs):]:
-                await handler.send_search(
-                    query=log.get("query", ""),
-                    success=log.get("success", False),
-                    result=log.get("result_preview")
+        async def check_claim(statement: str, claim_id: str, seed: dict = None) -> tuple[str, dict]:
+            try:
+                result = await asyncio.to_thread(fact_checker.check, statement, claim_id, seed)
+                await asyncio.to_thread(store_claim, statement, result)
+            except Exception as e:
+                result = {
+                    "id": claim_id,
+                    "text": statement,
+                    "status": "UNVERIFIABLE",
+                    "confidence": 0,
+                    "note": f"Error during verification: {str(e)}",
+                    "fallback": True
+                }
+            return claim_id, result
+        
+        async def check_claims(group: list) -> list[tuple[str, dict]]:
+            """One fact-checker run per group; batch misses fall back to per-claim checks"""
+            async with claim_semaphore:
+                for statement, claim_id, _ in group:
+                    await handler.send_log("claim_start", f"Checking {claim_id}...", {
+                        "id": claim_id,
+                        "text": statement[:100] + "..." if len(statement) > 100 else statement
+                    })
+                answered = {}
+                if len(group) > 1:
+                    try:
+                        answered = await asyncio.to_thread(fact_checker.check_batch, group)
+                    except Exception as e:
+                        print(f"  ⚠️ Batch fact-check failed, checking {len(group)} claims individually: {e}")
+                await asyncio.to_thread(store_claims, [
+                    (statement, answered[claim_id]) for statement, claim_id, _ in group if claim_id in answered
+                ])
+                results = []
+                for statement, claim_id, seed in group:
+                    if claim_id in answered:
+                        results.append((claim_id, answered[claim_id]))
+                    else:
+                        results.append(await check_claim(statement, claim_id, seed))
+                return results
+        
+        statement_by_id = {f"CLAIM_A{i}": statement for i, statement in enumerate(statements, 1)}
+        results_by_id = {}
+        
+        # Reuse verdicts of identical or near-duplicate claims checked in earlier scans
+        seeds = {}
+        for claim_id, statement in statement_by_id.items():
+            cached, seeds[claim_id] = await asyncio.to_thread(match_claim, statement, claim_id)
+            if cached is not None:
+                results_by_id[claim_id] = cached
+                await handler.send_claim(
+                    claim_id=claim_id,
+                    text=statement,
+                    status=cached.get("status", "UNKNOWN"),
+                    confidence=cached.get("confidence", 0.5),
+                    note=cached.get("note"),
+                    cached=True
                 )
         
+        to_check = [
+            (statement, claim_id, seeds[claim_id])
+            for claim_id, statement in statement_by_id.items()
+            if claim_id not in results_by_id
+        ]
+        batch_size = max(1, Config.FACT_CHECK_BATCH_SIZE)
+        claim_tasks = [
+            asyncio.create_task(check_claims(to_check[i:i + batch_size]))
+            for i in range(0, len(to_check), batch_size)
+        ]
+        
+        try:
+            for next_done in asyncio.as_completed(claim_tasks):
+                for claim_id, result in await next_done:
+                    results_by_id[claim_id] = result
+                    
+                    # Send claim result
+                    await handler.send_claim(
+                        claim_id=result.get("id", claim_id),
+                        text=result.get("text", statement_by_id[claim_id]),
+                        status=result.get("status", "UNKNOWN"),
+                        confidence=result.get("confidence", 0.5),
+                        note=result.get("note")
+                    )
+                
+                # Send any search logs that occurred since the last claim finished
+                new_logs = search_logger.get_logs()[search_cursor:]
+                search_cursor += len(new_logs)
+                for log in new_logs:
+                    await handler.send_search(
+                        query=log.get("query", ""),
+                        success=log.get("success", False),
+                        result=log.get("result_preview")
+                    )
+        finally:
+            for task in claim_tasks:
+                task.cancel()
+        
+        # Keep report order stable regardless of completion order
+        claims_results = [results_by_id[claim_id] for claim_id in statement_by_id]
+        
         await handler.send_step(2, 6, "Fact-checking claims", "complete")
         
         # Step 3: Analyze source
         await handler.send_step(3, 6, "Analyzing source reputation")
         await handler.send_log("info", f"Analyzing publisher: {publisher}")
-        source_data = await asyncio.to_thread(source_analyzer.analyze, publisher)
+        source_data = await asyncio.to_thread(
+            lambda: get_publisher_store().get_or_analyze(publisher, source_analyzer.analyze)
+        )
         await handler.send_log("source", f"Source credibility: {source_data.get('credibility_score', {}).get('rating_text', 'Unknown')}", source_data)
         await handler.send_step(3, 6, "Analyzing source reputation", "complete")
         
@@ -477,9 +887,13 @@ async def run_analysis_with_streaming(
         
         # Step 5: Analyze media
         await handler.send_step(5, 6, "Analyzing media content")
-        media_urls = media_analyzer.extract_media_urls(text)
-        await handler.send_log("info", f"Found {len(media_urls)} media URLs", {"urls": media_urls})
-        media_data = await asyncio.to_thread(media_analyzer.analyze, text, media_urls)
+        if document is not None:
+            await handler.send_log("info", f"Found {len(document.media)} media items on the page", {"media": document.media})
+            media_data = await asyncio.to_thread(media_analyzer.analyze, text, None, document.media)
+        else:
+            media_urls = media_analyzer.extract_media_urls(text)
+            await handler.send_log("info", f"Found {len(media_urls)} media URLs", {"urls": media_urls})
+            media_data = await asyncio.to_thread(media_analyzer.analyze, text, media_urls)
         deepfake_prob = media_data.get('deepfake_probability_avg', 0)
         try:
             deepfake_prob = float(deepfake_prob) if deepfake_prob else 0.0
@@ -522,6 +936,10 @@ async def run_analysis_with_streaming(
                 "url_scanned": source_url,
                 "agent_version": "v3.1.0",
                 "scan_duration_ms": duration_ms,
+                "publisher": document.publisher if document else None,
+                "published_at": document.published_at if document else None,
+                "content_fingerprint": fingerprint,
+                "cached": False,
                 "model_used": model_info['model'],
                 "model_provider": model_info['provider'],
                 "model_temperature": model_info['temperature']
@@ -543,7 +961,11 @@ async def run_analysis_with_streaming(
                     "domain_rating_score": source_data.get("domain_rating_score", 50),
                     "trust_history_flags": source_data.get("trust_history_flags", 0),
                     "ownership_structure": source_data.get("ownership_structure", "Unknown"),
-                    "bias_source": source_data.get("bias_source")
+                    "bias_source": source_data.get("bias_source"),
+                    "domain": source_data.get("domain"),
+                    "rated_at": source_data.get("rated_at"),
+                    "cached": source_data.get("cached", False),
+                    "fallback": source_data.get("fallback", False)
                 },
                 "political_bias": {
                     "rating": bias_data.get("rating", "Center"),
@@ -562,7 +984,10 @@ async def run_analysis_with_streaming(
                         "confidence": c.get("confidence", 0.5),
                         "verification_source": c.get("verification_source"),
                         "note": c.get("note"),
-                        "supported_by_media_id": c.get("supported_by_media_id")
+                        "supported_by_media_id": c.get("supported_by_media_id"),
+                        "cached": c.get("cached", False),
+                        "checked_at": c.get("checked_at"),
+                        "cache_match": c.get("cache_match")
                     }
                     for c in claims_results
                 ]
@@ -576,19 +1001,15 @@ async def run_analysis_with_streaming(
             "search_summary": search_logger.summary()
         }
         
-        # Store in Neo4j
-        if store_in_neo4j and neo4j_client:
-            await handler.send_log("info", "Storing analysis in Neo4j...")
-            try:
-                await asyncio.to_thread(neo4j_client.store_full_analysis, report)
-                await handler.send_log("info", "Stored in Neo4j successfully")
-            except Exception as e:
-                await handler.send_log("warning", f"Neo4j storage error: {str(e)}")
+        # Queue for Neo4j storage (written in the background)
+        if store_in_neo4j and neo4j_writer:
+            outcome = neo4j_writer.enqueue(report)
+            await handler.send_log("info", f"Analysis {outcome} for Neo4j storage", {"outcome": outcome})
         
         # Generate detailed report
         await handler.send_log("info", "Generating detailed report...")
-        report_generator = ReportGeneratorAgent()
-        detailed_report = await asyncio.to_thread(report_generator.generate, report)
+        detailed_report = await asyncio.to_thread(agents.report_generator.generate, report)
+        await asyncio.to_thread(document_cache.save, report, detailed_report)
         
         # Send final result with report
         await handler.send_result({
@@ -596,13 +1017,12 @@ async def run_analysis_with_streaming(
             "report": detailed_report
         })
         
-        # Cleanup
-        if neo4j_client:
-            neo4j_client.close()
-            
     except Exception as e:
         await handler.send_error(str(e))
         raise
+    finally:
+        # Return agents to the pool (the shared Neo4j driver stays open)
+        agent_pool.release(agents)
 
 
 @app.websocket("/ws/analyze")
@@ -613,7 +1033,8 @@ async def websocket_analyze(websocket: WebSocket):
     Send a JSON message with:
     {
         "input": "text content OR URL to analyze",
-        "store_in_neo4j": true
+        "store_in_neo4j": true,
+        "force_refresh": false
     }
     
     Receives streaming logs with types:
@@ -638,6 +1059,7 @@ async def websocket_analyze(websocket: WebSocket):
             
             user_input = data.get("input", "")
             store_in_neo4j = data.get("store_in_neo4j", True)
+            force_refresh = data.get("force_refresh", False)
             
             if not user_input.strip():
                 await websocket.send_json({
@@ -646,12 +1068,15 @@ async def websocket_analyze(websocket: WebSocket):
                 })
                 continue
             
-            # Run analysis with streaming
-            await run_analysis_with_streaming(
-                websocket=websocket,
-                user_input=user_input,
-                store_in_neo4j=store_in_neo4j
-            )
+            # Run analysis with streaming (searches logged per scan; worker threads
+            # started with asyncio.to_thread share this task's context)
+            with scan_search_log():
+                await run_analysis_with_streaming(
+                    websocket=websocket,
+                    user_input=user_input,
+                    store_in_neo4j=store_in_neo4j,
+                    force_refresh=force_refresh
+                )
             
     except WebSocketDisconnect:
         print("WebSocket client disconnected")
@@ -0,0 +1,29 @@
+"""
+Test settings
+Dummy API keys, no Neo4j schema bootstrap, and every local cache in a temporary
+directory. Set before the repo modules are imported: they read Config at import time.
+"""
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="misinfo-tests-")
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+os.environ.setdefault("PERPLEXITY_API_KEY", "test-key")
+os.environ["NEO4J_BOOTSTRAP_SCHEMA"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+for name, path in {
+    "SEARCH_CACHE_PATH": "search_cache.db",
+    "LLM_CACHE_PATH": "llm_cache.db",
+    "PUBLISHER_STORE_PATH": "publishers.db",
+    "DOCUMENT_CACHE_PATH": "documents.db",
+    "CLAIM_CACHE_PATH": "claim_cache.db",
+    "CLAIM_INDEX_DIR": "claim_index",
+    "JOB_DB_PATH": "jobs.db",
+    "NEO4J_WRITE_JOURNAL_PATH": "neo4j_journal.jsonl",
+    "BATCH_DIR": "batches",
+}.items():
+    os.environ[name] = os.path.join(_tmp, path)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from Agents.check_worthiness import is_checkable, select_candidates
+from Agents.stage_scheduler import StageScheduler
+from Agents.statementExtractorAgent import StatementExtractorAgent
+from Agents.structured_output import ExtractedStatements, StructuredOutput
+from config import Config
+
+
+class FakeAgent:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, input_data):
+        self.calls += 1
+        return {"messages": [AIMessage(content=json.dumps({"statements": ["A claim."]}))]}
+
+
+@pytest.fixture
+def extractor():
+    agent = StatementExtractorAgent.__new__(StatementExtractorAgent)
+    agent.chunk_chars = 4000
+    agent.max_concurrency = 1
+    agent.output = StructuredOutput(None, ExtractedStatements, "statement_extractor")
+    agent.agent = FakeAgent()
+    return agent
+
+
+def test_prefilter_is_on_by_default():
+    assert Config.CHECK_WORTHINESS_ENABLED
+
+
+@pytest.mark.parametrize("text", [
+    "How are you?",
+    "Thanks so much!",
+    "Hello everyone, good morning.",
+    "Preheat the oven to 180C. Mix 2 cups of flour with sugar. Bake for 25 minutes. I love this cake!",
+])
+def test_uncheckable_input_skips_the_llm(extractor, text):
+    assert extractor.extract(text) == []
+    assert extractor.agent.calls == 0
+
+
+@pytest.mark.parametrize("text", [
+    "Vaccines cause autism.",
+    "I think vaccines cause autism.",
+    "The Eiffel Tower is in Berlin.",
+    "Dr. Smith said the U.S. economy grew 3% in 2023.",
+    "Drink bleach to cure the flu.",
+    "I love how Pfizer hid the trial data.",
+    "lol the moon landing was staged",
+])
+def test_checkable_input_reaches_the_llm(extractor, text):
+    assert extractor.extract(text) == ["A claim."]
+    assert extractor.agent.calls == 1
+
+
+def test_short_input_is_sent_unchanged():
+    text = "What a day? The bridge collapsed on Monday. Thanks!"
+    candidates, total = select_candidates(text)
+    assert total == 3
+    assert len(candidates) == 3
+
+
+def test_long_input_keeps_only_checkable_sentences():
+    text = "Hi all! Stir well. The dam failed in 1975. Why? NASA said the probe landed."
+    candidates, _ = select_candidates(text, max_sentences=10)
+    assert candidates == ["The dam failed in 1975.", "NASA said the probe landed."]
+
+
+@pytest.mark.parametrize("sentence", ["I hope you are well.", "Take care", "We must win!"])
+def test_personal_remarks_are_not_checkable(sentence):
+    assert not is_checkable(sentence)
+
+
+class SlowAgent(FakeAgent):
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, input_data):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return super().invoke(input_data)
+
+
+def test_chunks_share_the_scheduler_budget(extractor):
+    extractor.chunk_chars = 200
+    extractor.max_concurrency = 8
+    extractor.agent = SlowAgent()
+    text = "\n\n".join(f"The bridge in Springfield {i} collapsed in {1900 + i}, officials said." * 3
+                       for i in range(8))
+    scheduler = StageScheduler(2)
+
+    extractor.extract(text, budget=scheduler.budget)
+
+    assert extractor.agent.calls == 8
+    assert extractor.agent.peak == 2
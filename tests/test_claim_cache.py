@@ -0,0 +1,32 @@
+import pytest
+
+from Agents.claim_cache import normalize_claim
+from Agents.claim_index import same_claim_shape
+
+
+@pytest.mark.parametrize("a, b", [
+    ("GDP grew 3.50%", "gdp grew 3.5 %"),
+    ("Sales hit 1,000,000 units.", "sales hit 1000000 units"),
+    ("Temperatures fell to −3°C", "Temperatures fell to -3°C"),
+])
+def test_formatting_variants_share_a_key(a, b):
+    assert normalize_claim(a) == normalize_claim(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("-5% growth", "5% growth"),
+    ("$10m fine", "£10m fine"),
+    ("€10m fine", "10m fine"),
+    ("The lake froze at -3 degrees", "The lake froze at 3 degrees"),
+])
+def test_signs_and_currencies_do_not_collide(a, b):
+    assert normalize_claim(a) != normalize_claim(b)
+    assert not same_claim_shape(normalize_claim(a), normalize_claim(b))
+
+
+@pytest.mark.parametrize("text, normalized", [
+    ("COVID-19 cases", "covid 19 cases"),
+    ("the 2020-2021 season", "the 2020 2021 season"),
+])
+def test_hyphens_are_not_minus_signs(text, normalized):
+    assert normalize_claim(text) == normalized
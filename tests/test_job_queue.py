@@ -0,0 +1,98 @@
+import os
+import tempfile
+import threading
+
+import pytest
+
+from Agents.job_queue import JobManager, JobStore, TERMINAL_STATES
+
+
+class SlowFinishStore(JobStore):
+    """Pauses right after the terminal status is committed, widening any gap before the final event"""
+
+    def mark_completed(self, *args, **kwargs):
+        super().mark_completed(*args, **kwargs)
+        threading.Event().wait(0.2)
+
+    def mark_failed(self, *args, **kwargs):
+        super().mark_failed(*args, **kwargs)
+        threading.Event().wait(0.2)
+
+
+def _store() -> JobStore:
+    return SlowFinishStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+
+
+def _wait(store: JobStore, job_id: str):
+    while store.get(job_id, include_result=False)["status"] not in TERMINAL_STATES:
+        threading.Event().wait(0.01)
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_final_event_is_visible_with_terminal_status(fail):
+    def runner(user_input, options, emit):
+        for i in range(20):
+            emit("info", f"step {i}")
+        if fail:
+            raise RuntimeError("boom")
+        return {"ok": True}
+
+    store = _store()
+    manager = JobManager(runner, store=store, num_workers=1)
+    job_id = store.create("text", {})
+
+    # Read like the SSE stream does: status first, then the events
+    violations = []
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            status = store.get(job_id, include_result=False)["status"]
+            types = [event["type"] for _, event in store.get_events(job_id)]
+            if status in TERMINAL_STATES:
+                if not types or types[-1] != ("error" if fail else "result"):
+                    violations.append(types[-3:])
+                return
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    manager._run_job(job_id)
+    poller.join(timeout=5)
+    done.set()
+
+    assert violations == []
+    assert store.get_events(job_id)[-1][1]["type"] == ("error" if fail else "result")
+
+
+def test_event_stream_always_ends_with_result(monkeypatch):
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    from config import Config
+    import server
+
+    monkeypatch.setattr(Config, "JOB_EVENT_POLL_SECONDS", 0.01)
+
+    release = threading.Event()
+
+    def runner(user_input, options, emit):
+        emit("info", "working")
+        release.wait(5)
+        return {"analysis": {"ok": True}}
+
+    manager = JobManager(runner, store=_store(), num_workers=1)
+    manager.start()
+    previous, server._job_manager = server._job_manager, manager
+    try:
+        client = TestClient(server.app)
+        for _ in range(3):
+            release.clear()
+            job_id = manager.submit("some text")
+            threading.Timer(0.05, release.set).start()
+            with client.stream("GET", f"/jobs/{job_id}/events") as response:
+                events = [line[len("event: "):] for line in response.iter_lines()
+                          if line.startswith("event: ")]
+            assert events[-1] == "result"
+            _wait(manager.store, job_id)
+    finally:
+        manager.stop()
+        server._job_manager = previous
@@ -0,0 +1,59 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from Agents import llm_cache
+from Agents.cache_utils import TwoTierCache
+from Agents.rate_limit_utils import invoke_with_rate_limit_retry
+from Agents.structured_output import ClaimVerdict, StructuredOutput
+
+
+class FakeAgent:
+    def __init__(self, answer: str):
+        self.answer = answer
+        self.calls = 0
+
+    def invoke(self, input_data):
+        self.calls += 1
+        return {"messages": [AIMessage(content=self.answer)]}
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    cache = TwoTierCache(os.path.join(tempfile.mkdtemp(), "llm.db"), table="llm_responses",
+                         memory_entries=16, max_entries=100)
+    monkeypatch.setattr(llm_cache, "llm_response_cache", cache)
+    return cache
+
+
+def _agent(answer: str) -> FakeAgent:
+    agent = FakeAgent(answer)
+    llm_cache.register_agent(agent, SimpleNamespace(model="test-model", temperature=0), "prompt", [])
+    return agent
+
+
+def _invoke(agent, output, text="Fact check: the sky is green"):
+    return invoke_with_rate_limit_retry(agent, {"messages": [{"role": "user", "content": text}]},
+                                        agent_name="fact_checker", validate=output.is_valid)
+
+
+def test_unparseable_response_is_not_cached(response_cache):
+    output = StructuredOutput(None, ClaimVerdict, "fact_checker")
+    agent = _agent("I could not decide, sorry.")
+    _invoke(agent, output)
+    _invoke(agent, output)
+    assert agent.calls == 2
+    assert response_cache.stats()["stores"] == 0
+
+
+def test_valid_response_is_cached(response_cache):
+    output = StructuredOutput(None, ClaimVerdict, "fact_checker")
+    agent = _agent('{"status": "DEBUNKED", "confidence": 0.9, "note": "The sky is blue"}')
+    _invoke(agent, output, "Fact check: the sky is purple")
+    response = _invoke(agent, output, "Fact check: the sky is purple")
+    assert agent.calls == 1
+    assert response.get("cached") is True
+    assert output.parse(response)["status"] == "DEBUNKED"
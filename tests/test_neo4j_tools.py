@@ -0,0 +1,37 @@
+from Agents.misinfoAgent import MisinformationDetector
+from Agents.neo4j_tools import Neo4jClient
+
+
+def _params(claims: list, media: dict = None) -> dict:
+    detector = MisinformationDetector.__new__(MisinformationDetector)
+    report = detector._build_report("scan-1", "https://example.com/a", 10, {}, claims, {}, {}, media or {})
+    client = Neo4jClient(bootstrap_schema=False, store_reports=False)
+    try:
+        return client._analysis_params(report)
+    finally:
+        client.close()
+
+
+def test_unsourced_claim():
+    params = _params([
+        {"id": "CLAIM_A1", "text": "The moon is made of cheese", "status": "UNVERIFIABLE",
+         "confidence": 0.5, "verification_source": None, "fallback": True}
+    ])
+    claim = params["claims"][0]
+    assert claim["claim_id"] == "CLAIM_A1"
+    assert claim["verification_source_name"] is None
+    assert claim["verification_source_url"] is None
+
+
+def test_sourced_claim():
+    params = _params([
+        {"id": "CLAIM_A1", "text": "Water boils at 100C at sea level", "status": "VERIFIED",
+         "verification_source": {"name": "NIST", "url": "https://www.nist.gov"}}
+    ])
+    assert params["claims"][0]["verification_source_name"] == "NIST"
+    assert params["claims"][0]["verification_source_url"] == "https://www.nist.gov"
+
+
+def test_asset_without_forensics():
+    params = _params([], {"assets": [{"id": "MEDIA_1", "type": "image", "forensics": None}]})
+    assert params["assets"][0]["asset_id"] == "MEDIA_1"
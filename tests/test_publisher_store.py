@@ -0,0 +1,52 @@
+from Agents.misinfoAgent import MisinformationDetector
+from Agents.neo4j_tools import Neo4jClient
+from Agents.publisher_store import PublisherStore
+
+
+FALLBACK = {
+    "publisher_name": "example.com",
+    "domain_rating_score": 50,
+    "trust_history_flags": 0,
+    "ownership_structure": "Unknown",
+    "bias_source": None,
+    "credibility_score": {"value": 50, "rating_text": "Medium", "color_code": "#F59E0B"},
+    "fallback": True
+}
+
+
+def _report(source: dict) -> dict:
+    detector = MisinformationDetector.__new__(MisinformationDetector)
+    return detector._build_report("scan-1", "https://example.com/a", 10, {}, [], source, {}, {})
+
+
+def test_fallback_rating_is_not_saved():
+    store = PublisherStore()
+    saved = store.save("https://fallback-only.example/a", FALLBACK)
+    assert saved["fallback"] is True
+    assert saved["rated_at"] is None
+    assert store.lookup("fallback-only.example") is None
+
+
+def test_fallback_rating_does_not_reach_publisher_node():
+    source = PublisherStore().save("https://example.com/a", FALLBACK)
+    report = _report(source)
+    assert report["content_analysis"]["source_reputation"]["fallback"] is True
+
+    client = Neo4jClient(bootstrap_schema=False, store_reports=False)
+    try:
+        publishers = client._analysis_params(report)["publishers"]
+    finally:
+        client.close()
+    assert publishers[0]["domain"] == "example.com"
+    assert publishers[0]["fresh"] is False
+
+
+def test_fresh_rating_updates_publisher_node():
+    source = PublisherStore().save("https://reliable.example/a", {**FALLBACK, "fallback": False})
+    client = Neo4jClient(bootstrap_schema=False, store_reports=False)
+    try:
+        publishers = client._analysis_params(_report(source))["publishers"]
+    finally:
+        client.close()
+    assert publishers[0]["fresh"] is True
+    assert publishers[0]["props"]["rated_at"] == source["rated_at"]
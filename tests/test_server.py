@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+import server
+
+
+def test_neo4j_schema_unavailable_returns_503(monkeypatch):
+    def unavailable():
+        raise ConnectionError("Couldn't connect to localhost:7687")
+
+    monkeypatch.setattr(server, "get_shared_neo4j_client", unavailable)
+    response = TestClient(server.app).get("/neo4j/schema")
+    assert response.status_code == 503
+    assert "Neo4j unavailable" in response.json()["detail"]